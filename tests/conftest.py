@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import to_done as td  # noqa: E402
+
+
+class _Var:
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """
+    A ToDoApp with its task state but no Tk window (tests run without a display),
+    saving into tmp_path. after() callbacks are collected in app.jobs instead
+    of running; status messages in app.statuses.
+    """
+    monkeypatch.setattr(td, "SAVE_FILE", str(tmp_path / "tasks.json"))
+    a = object.__new__(td.ToDoApp)
+    a.__dict__.update(
+        tasks=[], _tasks_by_id={}, _due_index=td.DueIndex(), _tx=None, selected_ids=set(),
+        editing_task_id=None, hidden_courses=set(), class_zoom_urls={}, safe_mode=False,
+        filter_mode=_Var("All"), show_archived=_Var(False), status=_Var(""),
+        history=td.UndoHistory(), _tombstones={}, _store_version=0, _store_sig=None,
+        _task_stream=None, _stream_generation=None, compression="none",
+        _session_bin=td.SessionBinLog(str(tmp_path / "sessions.bin")),
+        _tasks_generation=0, _session_bin_synced=None, _running_ids=set(),
+        _week_totals=td.WeekTotals(), weekly_goals={},
+        _heartbeats=td.TimerHeartbeat(str(tmp_path / "timers.heartbeat")), _heartbeat_job=None,
+        idle_minutes=0, idle_action="split", jobs=[], statuses=[],
+    )
+    a._idle = td.IdleDetector(a, None)
+    a.after = lambda ms, fn: a.jobs.append(fn) or len(a.jobs)
+    a.after_idle = lambda fn: fn()
+    a._set_status = a.statuses.append
+    for name in ("_refresh_list", "_update_cards", "_update_kpi", "_update_course_values", "_update_batch_bar"):
+        setattr(a, name, lambda *args, **kwargs: None)
+
+    class NoDueScheduler:
+        def schedule(self, task, arm=True): pass
+        def arm(self): pass
+        def unschedule(self, task_id): pass
+        def rebuild(self, tasks): pass
+
+    a._due_scheduler = NoDueScheduler()
+    return a
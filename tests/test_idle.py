@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timezone
+
+import to_done as td
+
+
+def iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+def running_app(app, idle_action: str, started_ago: int = 3600):
+    task = td.Task(id="essay", text="Essay", course="ENG 101")
+    with app._transaction("Add") as tx:
+        tx.add_task(task)
+    with app._transaction("Check out") as tx:
+        tx.set(task, "running_start", iso(time.time() - started_ago))
+    backend = td.FakeIdleBackend(0)
+    app._idle = td.IdleDetector(app, backend)
+    app._idle.last_input -= 10 ** 6  # no input in our own windows either
+    app.idle_minutes = 10
+    app.idle_action = idle_action
+    return task, backend
+
+
+def test_idle_stretch_is_cut_out_of_a_running_timer_in_split_mode(app):
+    task, backend = running_app(app, "split")
+    backend.idle = 700  # away for more than 10 minutes ...
+    app._idle.poll()
+    assert app._idle.idle_since is not None
+    assert not task.sessions  # ... but nothing happens until the user is back
+
+    backend.idle = 2
+    app._idle.poll()
+    assert app._idle.idle_since is None
+    [session] = task.sessions
+    assert 3600 - 700 - 10 <= session["seconds"] <= 3600 - 700 + 10
+    assert task.running_start is not None  # a new session runs from the return
+    assert time.time() - datetime.fromisoformat(task.running_start).timestamp() < 10
+    assert "essay" in app._running_ids
+    assert app.statuses[-1].startswith("Away for")
+
+
+def test_idle_stretch_stops_the_timer_in_stop_mode(app):
+    task, backend = running_app(app, "stop")
+    backend.idle = 1200
+    app._idle.poll()
+    backend.idle = 1
+    app._idle.poll()
+    [session] = task.sessions
+    assert 3600 - 1200 - 10 <= session["seconds"] <= 3600 - 1200 + 10
+    assert task.running_start is None
+    assert "essay" not in app._running_ids
+    # undo brings the running timer back in one step
+    app._undo()
+    assert not task.sessions and task.running_start is not None
+
+
+def test_input_in_our_window_counts_as_activity(app):
+    task, backend = running_app(app, "split")
+    backend.idle = 5000  # the OS saw no input, but our window did
+    app._idle.note_input()
+    app._idle.poll()
+    assert app._idle.idle_since is None
+    assert not task.sessions
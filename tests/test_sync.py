@@ -0,0 +1,76 @@
+import os
+
+import to_done as td
+
+
+def session(day: int, seconds: int = 1500) -> dict:
+    return {"start": f"2025-03-{day:02d}T09:00:00+00:00", "end": f"2025-03-{day:02d}T09:25:00+00:00",
+            "seconds": seconds}
+
+
+def save_folder(folder: str, tasks, deleted=None, version: int = 1):
+    path = os.path.join(folder, "tasks.json")
+    deleted = deleted or {}
+    gen = td.write_session_log(path, tasks, deleted)
+    tmp = td.write_task_store(path, {"version": version, "deleted": deleted, "sessions_generation": gen},
+                              (td.task_record(t) for t in tasks))
+    os.replace(tmp, path)
+
+
+def load_folder(folder: str) -> dict:
+    path = os.path.join(folder, "tasks.json")
+    store = td.hydrate_task_store(path, td.read_task_store(path))
+    return {"deleted": store["deleted"],
+            "tasks": [{k: v for k, v in d.items() if k != "sessions_ref"} for d in store["tasks"]]}
+
+
+def test_sync_folders_converges_on_conflicting_edits(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    clock = "2025-03-01T00:00:00.000+00:00"
+
+    def base():
+        return [td.Task(id="shared", text="Essay", course="ENG 101", modified=clock, sessions=[session(1)]),
+                td.Task(id="gone", text="Old quiz", modified=clock)]
+
+    # a renames the shared task later than b marks it done; both log a session
+    ours = base()
+    ours[0].text = "Essay draft"
+    ours[0].modified = "2025-03-03T00:00:00.000+00:00"
+    ours[0].sessions.append(session(3))
+    ours.append(td.Task(id="only-a", text="Lab", modified=clock))
+    save_folder(str(a), ours)
+
+    theirs = base()
+    theirs[0].done = True
+    theirs[0].modified = "2025-03-02T00:00:00.000+00:00"
+    theirs[0].sessions.append(session(2, 600))
+    del theirs[1]
+    theirs.append(td.Task(id="only-b", text="Reading", modified=clock))
+    save_folder(str(b), theirs, deleted={"gone": "2099-01-01T00:00:00.000+00:00"})
+
+    msg = td.sync_folders(str(a), str(b))
+    assert msg.startswith("Synced 3 task(s), 3 session(s)")
+
+    left, right = load_folder(str(a)), load_folder(str(b))
+    assert left == right
+    by_id = {d["id"]: d for d in left["tasks"]}
+    assert set(by_id) == {"shared", "only-a", "only-b"}
+    assert by_id["shared"]["text"] == "Essay draft"  # newest edit wins
+    assert by_id["shared"]["done"] is False
+    assert [s["start"][:10] for s in by_id["shared"]["sessions"]] == ["2025-03-01", "2025-03-02", "2025-03-03"]
+    assert "gone" in left["deleted"]
+
+    # the merged copies load as tasks with their sessions still on disk
+    path = os.path.join(str(b), "tasks.json")
+    store = td.read_task_store(path)
+    tasks = [td.task_from_record(d, path, store["generation"]) for d in store["tasks"]]
+    shared = next(t for t in tasks if t.id == "shared")
+    assert not shared.sessions.loaded
+    assert shared.sessions.total_seconds() == 1500 + 600 + 1500
+    assert list(shared.sessions) == by_id["shared"]["sessions"]
+
+    # a second sync has nothing left to change
+    td.sync_folders(str(a), str(b))
+    assert load_folder(str(a)) == load_folder(str(b)) == left
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+import to_done as td
+
+
+def test_iter_task_store_reads_header_keys_after_tasks(tmp_path):
+    path = tmp_path / "tasks.json"
+    store = {"version": 7, "deleted": {"x": "2025-01-01T00:00:00.000+00:00"}, "sessions_generation": "g1",
+             "schema": 1, "tasks": [{"id": "a", "text": "Essay"}, {"id": "b", "text": "Lab"}]}
+    path.write_text(json.dumps(store, sort_keys=True))  # "tasks" before "version"
+
+    stream = td.iter_task_store(str(path))
+    header = next(stream)
+    assert header == {"schema": 1, "version": 7, "deleted": store["deleted"], "generation": "g1"}
+    assert [d["id"] for d in stream] == ["a", "b"]
+    whole = td.read_task_store(str(path))
+    assert {k: v for k, v in whole.items() if k != "tasks"} == header
+
+
+def test_iter_task_store_streams_a_damaged_file_with_header_last(tmp_path):
+    path = tmp_path / "tasks.json"
+    path.write_text('{"tasks": [{"id": "a", "text": "Essay"}, {"id": "b", "te')
+
+    stream = td.iter_task_store(str(path))
+    assert next(stream)["version"] == 0
+    assert next(stream)["id"] == "a"
+    with pytest.raises(td.TaskStoreDamaged) as err:
+        next(stream)
+    assert err.value.loaded == 1
+
+
+def test_migrate_task_store_upgrades_a_bare_list_and_keeps_a_backup(tmp_path):
+    path = tmp_path / "tasks.json"
+    old = '[{"id": "a", "text": "Essay", "done": false}, {"id": "b", "text": "Lab", "done": true}]'
+    path.write_text(old)
+
+    backup = td.migrate_task_store(str(path))
+    assert backup == f"{path}.schema0.bak"
+    assert open(backup).read() == old
+    store = td.read_task_store(str(path))
+    assert store["schema"] == td.TASKS_SCHEMA
+    assert [(d["id"], d["done"]) for d in store["tasks"]] == [("a", False), ("b", True)]
+    assert td.migrate_task_store(str(path)) is None  # already current
+
+
+@pytest.mark.parametrize("kind", ["gzip", "lzma"])
+def test_compressed_task_store_round_trips_and_is_told_by_its_magic(tmp_path, kind):
+    path = tmp_path / "tasks.json"
+    records = [{"id": "a", "text": "Essay"}, {"id": "b", "text": "Lab — ünïcode"}]
+    tmp = td.write_task_store(str(path), {"version": 3, "deleted": {}, "sessions_generation": "g1"},
+                              iter(records), kind)
+    os.replace(tmp, path)
+
+    magic = dict((k, m) for m, k in td.COMPRESSION_MAGIC)[kind]
+    assert path.read_bytes().startswith(magic)
+    assert td.detect_compression(str(path)) == kind
+    store = td.read_task_store(str(path))
+    assert store["version"] == 3 and store["generation"] == "g1"
+    assert [{k: d[k] for k in ("id", "text")} for d in store["tasks"]] == records
+
+    path.write_text(json.dumps({"tasks": records}))
+    assert td.detect_compression(str(path)) is None
+
+
+def test_save_merges_a_newer_store_without_losing_its_delete(app):
+    essay, lab = td.Task(id="essay", text="Essay"), td.Task(id="lab", text="Lab")
+    with app._transaction("Add") as tx:
+        tx.add_task(essay)
+        tx.add_task(lab)
+    assert td.read_task_store(td.SAVE_FILE)["version"] == app._store_version == 1
+
+    # meanwhile another window deletes the lab and saves a few times
+    deleted = {"lab": td.utc_clock()}
+    theirs = [td.Task(id="essay", text="Essay", modified=essay.modified)]
+    gen = td.write_session_log(td.SAVE_FILE, theirs, deleted)
+    os.replace(td.write_task_store(td.SAVE_FILE, {"version": 3, "deleted": deleted, "sessions_generation": gen},
+                                   (td.task_record(t) for t in theirs)), td.SAVE_FILE)
+
+    with app._transaction("Edit") as tx:
+        tx.set(essay, "text", "Essay draft")
+
+    store = td.read_task_store(td.SAVE_FILE)
+    assert store["version"] == 4
+    assert [(d["id"], d["text"]) for d in store["tasks"]] == [("essay", "Essay draft")]
+    assert "lab" in store["deleted"]
+    assert [t.id for t in app.tasks] == ["essay"]
+    assert app.statuses[-1] == "Merged changes saved by another DYFH window."
@@ -1,22 +1,39 @@
 import json
 import os
-from tkinter import messagebox
+import csv
+import time
 from datetime import datetime, timezone
 import datetime as _dt
 import uuid
-import customtkinter as ctk
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field, fields
+from array import array
 from typing import List, Optional, Dict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import heapq
+import operator
+import bisect
+import mmap
+import struct
+import shutil
+import subprocess
+import socket
+import secrets
+import argparse
+import base64
+import html
+import io
+import gzip
+import lzma
+import tarfile
 import sys
+import multiprocessing
 from pathlib import Path
 import webbrowser
 from urllib.parse import urlparse
 import platform
-import matplotlib
-matplotlib.use("Agg")  # safe default backend
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 def app_base_dir() -> Path:
@@ -26,15 +43,342 @@ def app_base_dir() -> Path:
 def local_path(*parts) -> str:
     return str(app_base_dir().joinpath(*parts))
 
+# port + token of the running window, so a second launch can hand off to it
+INSTANCE_FILE = local_path("dyfh.instance")
+
+# ---------- Single instance / command line ----------
+
+def parse_cli(argv: List[str]) -> dict:
+    """
+    Turn command-line arguments into a command dict, e.g.
+        to_done.py add "Read ch. 3" --due 2025-11-01 --course 550
+        to_done.py start "Read ch. 3"      (task id, id prefix, or title)
+        to_done.py stop "Read ch. 3"
+        to_done.py focus                   (default: just bring the window up)
+        to_done.py sync D:\\DYFH            (merge with another copy of the data folder)
+        to_done.py bench-memory            (task/session memory, old vs. compact layout)
+    """
+    parser = argparse.ArgumentParser(prog="DYFH", description="Do Your Homework task tracker")
+    sub = parser.add_subparsers(dest="cmd")
+
+    add = sub.add_parser("add", help="add a task")
+    add.add_argument("text")
+    add.add_argument("--due", default="")
+    add.add_argument("--course", default="")
+    add.add_argument("--url", default="")
+
+    for name in ("start", "stop"):
+        p = sub.add_parser(name, help=f"{name} the timer of a task")
+        p.add_argument("task", help="task id, id prefix, or exact title")
+
+    sub.add_parser("focus", help="show the DYFH window")
+
+    sync = sub.add_parser("sync", help="merge tasks with another DYFH data folder")
+    sync.add_argument("folder")
+
+    bench = sub.add_parser("bench-memory", help="measure in-memory size of tasks and sessions")
+    bench.add_argument("--tasks", type=int, default=2000)
+    bench.add_argument("--sessions", type=int, default=50, help="sessions per task")
+
+    args = vars(parser.parse_args(argv))
+    args["cmd"] = args.get("cmd") or "focus"
+    return args
+
+
+def forward_to_running_instance(cmd: dict, timeout: float = 0.5) -> Optional[str]:
+    """
+    Send cmd to an already-running DYFH over loopback and return its reply,
+    or None when no instance answers (stale or missing INSTANCE_FILE) or
+    whatever holds the port now doesn't speak our protocol.
+    """
+    try:
+        with open(INSTANCE_FILE, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        with socket.create_connection(("127.0.0.1", int(info["port"])), timeout=timeout) as conn:
+            conn.sendall(json.dumps({"token": info["token"], **cmd}).encode("utf-8") + b"\n")
+            reply = conn.makefile("r", encoding="utf-8").readline().strip()
+    except (OSError, ValueError, KeyError):
+        return None
+    if not reply.startswith(("ok", "error")):
+        return None
+    return reply
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # analytics workers in the PyInstaller build
+    # hand the request to a running window before paying for Tk/customtkinter/matplotlib imports
+    CLI_COMMAND = parse_cli(sys.argv[1:])
+    # these run here on their own; a running window picks sync results up from disk
+    LOCAL_COMMANDS = ("sync", "bench-memory")
+    _reply = forward_to_running_instance(CLI_COMMAND) if CLI_COMMAND["cmd"] not in LOCAL_COMMANDS else None
+    if _reply is not None:
+        print(_reply)
+        sys.exit(0 if _reply.startswith("ok") else 1)
+
+from tkinter import messagebox, filedialog
+import customtkinter as ctk
+import matplotlib
+matplotlib.use("Agg")  # safe default backend
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+
+
+def _event_in_entry(root) -> bool:
+    """True when keyboard focus is in a text entry (so shortcuts shouldn't fire)."""
+    try:
+        return root.focus_get().winfo_class() in ("Entry", "Text")
+    except Exception:
+        return False
+
 SAVE_FILE = local_path("tasks.json")
 ZOOM_LINKS_FILE = local_path("zoom_links.json")
 SETTINGS_FILE = local_path("settings.json")
 
+# how often the data files are checked for edits made outside the app
+WATCH_INTERVAL_MS = 2000
+FIRST_SCREEN_TASKS = 40    # open tasks parsed before the window first shows
+LOAD_BATCH_TASKS = 500     # tasks parsed per event-loop turn after that
+
+# deleted-task markers are kept this long so other copies of the data folder learn about deletes
+TOMBSTONE_DAYS = 180
+
+# due badge colors (light / dark)
+DUE_COLORS = {
+    "overdue": ("orange", "dark orange"),
+    "today": ("gold", "goldenrod"),
+}
+
+# card outline for multi-selected tasks (light / dark)
+SELECTED_BORDER = ("#4d20d4", "#a48cf0")
+
+# import/export column layouts
+TASK_CSV_FIELDS = ["id", "text", "done", "due", "created", "course", "url"]
+SESSION_CSV_FIELDS = ["task_id", "task", "course", "start", "end", "seconds"]
+EXPORT_KINDS = {
+    "Tasks (CSV)": ".csv",
+    "Sessions (CSV)": ".csv",
+    "Tasks + sessions (JSON Lines)": ".jsonl",
+    "Due dates (iCalendar)": ".ics",
+    "Weekly report (HTML)": ".html",
+    "Semester report (HTML)": ".html",
+}
+# report kind -> period_bounds() range it covers
+REPORT_KINDS = {"Weekly report (HTML)": "Week", "Semester report (HTML)": "Semester"}
+
 # ctk theme
 ctk.set_appearance_mode("dark")          # "light", "dark", or "system"
 ctk.set_default_color_theme("green")        # "blue", "green", "dark-blue"
 
-@dataclass
+_TZ_BY_MINUTES: Dict[int, timezone] = {}
+
+def _tz_from_minutes(minutes: int) -> timezone:
+    tz = _TZ_BY_MINUTES.get(minutes)
+    if tz is None:
+        tz = _TZ_BY_MINUTES[minutes] = timezone(_dt.timedelta(minutes=minutes))
+    return tz
+
+
+class SessionLog:
+    """
+    One task's sessions packed into a single int64 array, four slots per
+    session (start epoch, end epoch, seconds, UTC offset in minutes), instead
+    of a list of dicts. Behaves like the list of {"start", "end", "seconds"}
+    dicts it replaces; dicts are only built when something iterates or indexes
+    it. A session that doesn't fit the columns (extra keys, naive time)
+    switches the log to a plain list so nothing is ever lost.
+
+    A log read from tasks.json starts out *stored*: only its count and total
+    are in memory and the sessions stay in sessions.jsonl until something
+    needs them (see read_session_lists). Any change drops the stored location,
+    which is how write_session_log knows what to write.
+    """
+    __slots__ = ("_cols", "_raw", "_src")
+
+    def __init__(self, sessions=()):
+        # () until the first session: most tasks never get one, and an empty
+        # array would cost them 80 bytes each
+        self._cols = ()
+        self._raw: Optional[list] = None
+        # (path, task_id, generation, offset, length, count, seconds) of the
+        # sessions.jsonl line holding exactly these sessions, or None if unsaved
+        self._src: Optional[tuple] = None
+        for s in sessions:
+            self._add(s)
+
+    @classmethod
+    def stored(cls, path: str, tid: str, generation: Optional[str], ref: dict) -> "SessionLog":
+        """A log whose sessions are left on disk until first used."""
+        log = cls.__new__(cls)
+        log._cols = log._raw = None
+        log._src = (path, tid, generation, int(ref["at"]), int(ref["len"]),
+                    int(ref.get("n", 0)), int(ref.get("seconds", 0)))
+        return log
+
+    @staticmethod
+    def load_many(logs):
+        """Read the sessions of many stored logs with one open per file."""
+        by_path: Dict[str, list] = defaultdict(list)
+        for log in logs:
+            if not log.loaded:
+                by_path[log._src[0]].append(log)
+        for path, group in by_path.items():
+            lists = read_session_lists(path, [log._src[1:5] for log in group])
+            for log, sessions in zip(group, lists):
+                log._fill(sessions)
+
+    @property
+    def loaded(self) -> bool:
+        return self._cols is not None or self._raw is not None
+
+    def _load(self):
+        if not self.loaded:
+            self._fill(read_session_lists(self._src[0], [self._src[1:5]])[0])
+
+    def _fill(self, sessions: list):
+        self._cols = ()
+        for s in sessions:
+            self._add(s)
+
+    def unload(self):
+        """Drop the in-memory sessions of an unchanged stored log."""
+        if self._src is not None and self.loaded:
+            path, tid, gen, at, length, _n, _secs = self._src
+            self._src = (path, tid, gen, at, length, len(self), self.total_seconds())
+            self._cols = self._raw = None
+
+    def detach(self):
+        """Load and forget the stored location (for a log leaving its task, e.g. into undo)."""
+        self._load()
+        self._src = None
+
+    def needs_write(self, path: str, generation: Optional[str]) -> bool:
+        if not len(self):
+            return False
+        return self._src is None or self._src[0] != path or self._src[2] != generation
+
+    def stored_key(self) -> Optional[tuple]:
+        """(generation, offset, length) of the stored line, None if unsaved or empty."""
+        return self._src[2:5] if self._src is not None else None
+
+    def _stored_at(self, path: str, tid: str, generation: str, at: int, length: int):
+        self._src = (path, tid, generation, at, length, len(self), self.total_seconds())
+
+    def ref(self) -> Optional[dict]:
+        """The "sessions_ref" entry for tasks.json (None for an empty log)."""
+        if self._src is None or not len(self):
+            return None
+        _path, _tid, _gen, at, length, _n, _secs = self._src
+        return {"at": at, "len": length, "n": len(self), "seconds": self.total_seconds()}
+
+    @staticmethod
+    def _pack(s) -> Optional[tuple]:
+        if not isinstance(s, dict) or s.keys() != {"start", "end", "seconds"}:
+            return None
+        try:
+            st = datetime.fromisoformat(s["start"])
+            en = datetime.fromisoformat(s["end"])
+        except (TypeError, ValueError):
+            return None
+        off = st.utcoffset()
+        if off is None or off != en.utcoffset() or off.seconds % 60 \
+                or st.isoformat() != s["start"] or en.isoformat() != s["end"] \
+                or type(s["seconds"]) is not int:
+            return None  # wouldn't round-trip exactly
+        return int(st.timestamp()), int(en.timestamp()), s["seconds"], int(off.total_seconds()) // 60
+
+    def _unpack(self, i: int) -> dict:
+        st, en, secs, tz = self._cols[i * 4:i * 4 + 4]
+        tz = _tz_from_minutes(tz)
+        return {"start": datetime.fromtimestamp(st, tz).isoformat(),
+                "end": datetime.fromtimestamp(en, tz).isoformat(),
+                "seconds": secs}
+
+    def _add(self, s: dict):
+        if self._raw is None:
+            packed = self._pack(s)
+            if packed is not None:
+                if not self._cols:
+                    self._cols = array("q")
+                self._cols.extend(packed)
+                return
+            self._raw = [self._unpack(i) for i in range(len(self._cols) // 4)]
+            self._cols = ()
+        self._raw.append(s)
+
+    def append(self, s: dict):
+        self._load()
+        self._add(s)
+        self._src = None
+
+    def clear(self):
+        del self[:]
+
+    def total_seconds(self) -> int:
+        if not self.loaded:
+            return self._src[6]
+        if self._raw is not None:
+            return sum(s.get("seconds", 0) for s in self._raw)
+        return sum(self._cols[2::4])
+
+    def columns(self, first: int = 0):
+        """Yield (start_epoch, seconds, utc_offset_minutes) from session `first` on, without building dicts."""
+        self._load()
+        if self._raw is None:
+            c = self._cols
+            yield from zip(c[first * 4::4], c[first * 4 + 2::4], c[first * 4 + 3::4])
+            return
+        for s in self._raw[first:]:
+            try:
+                st = datetime.fromisoformat(s["start"])
+                off = (st if st.tzinfo else st.astimezone()).utcoffset()  # naive = local wall clock
+                yield int(st.timestamp()), s.get("seconds", 0), int(off.total_seconds()) // 60
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def __len__(self) -> int:
+        if not self.loaded:
+            return self._src[5]
+        return len(self._raw) if self._raw is not None else len(self._cols) // 4
+
+    def __iter__(self):
+        self._load()
+        if self._raw is not None:
+            return iter(self._raw)
+        return (self._unpack(i) for i in range(len(self)))
+
+    def __getitem__(self, idx):
+        self._load()
+        if self._raw is not None:
+            return self._raw[idx]
+        if isinstance(idx, slice):
+            return [self._unpack(i) for i in range(*idx.indices(len(self)))]
+        return self._unpack(range(len(self))[idx])
+
+    def __delitem__(self, idx):
+        self._load()
+        self._src = None
+        if self._raw is not None:
+            del self._raw[idx]
+            return
+        if isinstance(idx, slice):
+            rows = sorted(range(*idx.indices(len(self))), reverse=True)
+        else:
+            rows = [range(len(self))[idx]]
+        for i in rows:
+            del self._cols[i * 4:i * 4 + 4]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (SessionLog, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SessionLog({len(self)} sessions)"
+
+
+@dataclass(slots=True)
 class Task:
     id: str
     text: str
@@ -42,9 +386,2255 @@ class Task:
     due: Optional[str] = None  # ISO date 'YYYY-MM-DD'
     created: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
     course: Optional[str] = None
-    sessions: List[Dict] = field(default_factory=list)
+    sessions: SessionLog = field(default_factory=SessionLog)
     running_start: Optional[str] = None
     url: Optional[str] = None
+    modified: Optional[str] = None  # last-modified clock, for merging replicas
+    reset_at: Optional[str] = None  # sessions starting before this were reset away
+    extra: Optional[dict] = None  # fields this version doesn't know (newer DYFH); written back as-is
+
+    def __setattr__(self, name, value):
+        # thousands of tasks share a handful of class codes; keep one copy of each
+        if name == "course" and isinstance(value, str):
+            value = sys.intern(value)
+        elif name == "sessions" and not isinstance(value, SessionLog):
+            value = SessionLog(value or ())
+        object.__setattr__(self, name, value)
+
+
+TASK_FIELDS = [f.name for f in fields(Task) if f.name != "extra"]
+
+
+def record_extra(d: dict) -> Optional[dict]:
+    """Keys of a task record that aren't Task fields, or None."""
+    extra = {k: v for k, v in d.items() if k not in TASK_FIELDS and k != "sessions_ref"}
+    return extra or None
+
+
+def task_to_dict(t: Task) -> dict:
+    """Plain-JSON form of a task (sessions materialized as dicts)."""
+    d = {**(t.extra or {}), **{name: getattr(t, name) for name in TASK_FIELDS}}
+    d["sessions"] = list(t.sessions)
+    return d
+
+
+def task_record(t: Task) -> dict:
+    """tasks.json form of a task: sessions are referenced, not inlined (see write_session_log)."""
+    d = {**(t.extra or {}), **{name: getattr(t, name) for name in TASK_FIELDS if name != "sessions"}}
+    ref = t.sessions.ref()
+    if ref is not None:
+        d["sessions_ref"] = ref
+    return d
+
+
+def task_from_record(d: dict, store_path: str, generation: Optional[str]) -> Task:
+    """
+    Task from a tasks.json record. Sessions given inline (older files, merge
+    results) are loaded; a "sessions_ref" leaves them in sessions.jsonl.
+    Unknown keys go to Task.extra, and a record missing id or text (renamed
+    by a newer DYFH, or hand-edited) still loads.
+    """
+    known = {k: v for k, v in d.items() if k in TASK_FIELDS}
+    known["id"] = str(known.get("id") or uuid.uuid4())
+    known.setdefault("text", "")
+    t = Task(**known, extra=record_extra(d))
+    ref = d.get("sessions_ref")
+    if "sessions" not in d and isinstance(ref, dict):
+        t.sessions = SessionLog.stored(sessions_path(store_path), t.id, generation, ref)
+    return t
+
+
+# ---------- Schema versions and migrations ----------
+# Each data file records the schema it was written in ("schema" key; files
+# from before this existed count as 0, or 1 for the tasks.json object
+# layout). MIGRATIONS[n] turns one schema-n record into schema n+1, so an old
+# file is upgraded record by record: tasks.json as it streams in, the small
+# JSON files whole. The current schema is one past the last migration.
+
+def _task_v0_to_v1(rec: dict) -> dict:
+    # schema 0 = the original bare list; sessions were inline and unchecked
+    if not isinstance(rec.get("sessions"), list):
+        rec["sessions"] = []
+    rec["sessions"] = [s for s in rec["sessions"] if isinstance(s, dict) and "start" in s]
+    return rec
+
+
+def _settings_v0_to_v1(rec: dict) -> dict:
+    # same keys; only the "schema" header is new
+    return rec
+
+
+def _zoom_v0_to_v1(rec: dict) -> dict:
+    # schema 0 was the bare {class: url} map, which had no room for a header
+    return {"links": {k: v for k, v in rec.items() if k != "schema"}}
+
+
+TASK_MIGRATIONS = {0: _task_v0_to_v1}
+SETTINGS_MIGRATIONS = {0: _settings_v0_to_v1}
+ZOOM_MIGRATIONS = {0: _zoom_v0_to_v1}
+TASKS_SCHEMA = len(TASK_MIGRATIONS)
+SETTINGS_SCHEMA = len(SETTINGS_MIGRATIONS)
+ZOOM_SCHEMA = len(ZOOM_MIGRATIONS)
+
+
+def upgrade_record(rec: dict, schema: int, migrations: dict) -> dict:
+    """Run rec through every migration from schema up to the current one."""
+    while schema in migrations:
+        rec = migrations[schema](rec)
+        schema += 1
+    return rec
+
+
+def stored_schema(data: dict, default: int = 0) -> int:
+    schema = data.get("schema", default)
+    return schema if isinstance(schema, int) and not isinstance(schema, bool) else default
+
+
+def backup_before_upgrade(path: str, schema: int) -> str:
+    """Copy path to path.schema<N>.bak (first upgrade from N wins); returns the backup path."""
+    backup = f"{path}.schema{schema}.bak"
+    if not os.path.exists(backup):
+        shutil.copy2(path, backup)
+    return backup
+
+
+def bench_memory(n_tasks: int = 2000, sessions_per_task: int = 50) -> str:
+    """
+    Compare the memory of the original representation (dataclass with __dict__,
+    sessions as dicts, course strings duplicated) with Task/SessionLog.
+    """
+    import tracemalloc
+
+    @dataclass
+    class DictTask:  # the layout Task had before SessionLog
+        id: str
+        text: str
+        done: bool = False
+        due: Optional[str] = None
+        created: str = ""
+        course: Optional[str] = None
+        sessions: List[Dict] = field(default_factory=list)
+        running_start: Optional[str] = None
+        url: Optional[str] = None
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    raw = []
+    for k in range(n_tasks):
+        sessions = []
+        for i in range(sessions_per_task):
+            st = datetime.fromtimestamp(base + k * 86400 + i * 3600, timezone.utc)
+            en = st + _dt.timedelta(minutes=25)
+            sessions.append({"start": st.isoformat(), "end": en.isoformat(), "seconds": 1500})
+        # json.loads gives every task its own copy of the course string
+        raw.append(json.dumps({"id": str(uuid.uuid4()), "text": f"Task {k}", "due": "2025-11-01",
+                               "created": "2025-10-01T09:00:00", "course": f"CSE {k % 8}",
+                               "sessions": sessions}))
+
+    def measure(build) -> int:
+        tracemalloc.start()
+        objs = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del objs
+        return size
+
+    before = measure(lambda: [DictTask(**json.loads(r)) for r in raw])
+    after = measure(lambda: [Task(**json.loads(r)) for r in raw])
+    empty_before = measure(lambda: [DictTask(**{**json.loads(r), "sessions": []}) for r in raw])
+    empty_after = measure(lambda: [Task(**{**json.loads(r), "sessions": []}) for r in raw])
+
+    n_sessions = n_tasks * sessions_per_task
+    lines = [f"{n_tasks} tasks, {n_sessions} sessions",
+             f"  bytes/task     before {empty_before / n_tasks:8.0f}   after {empty_after / n_tasks:8.0f}",
+             f"  bytes/session  before {(before - empty_before) / n_sessions:8.0f}   "
+             f"after {(after - empty_after) / n_sessions:8.0f}",
+             f"  total          before {before / 1e6:8.1f} MB after {after / 1e6:8.1f} MB"]
+    return "\n".join(lines)
+
+
+@dataclass
+class UndoEntry:
+    """Inverse delta of one transaction: just enough to put things back."""
+    label: str = ""
+    old_fields: Dict[str, Dict[str, object]] = field(default_factory=dict)  # task_id -> {field: old value}
+    removed_tasks: Dict[str, tuple] = field(default_factory=dict)   # task_id -> (index, Task)
+    added_tasks: List[str] = field(default_factory=list)
+    added_sessions: Dict[str, int] = field(default_factory=dict)    # task_id -> sessions appended
+    popped_sessions: Dict[str, list] = field(default_factory=dict)  # task_id -> sessions cut off the end
+    replaced_sessions: Dict[str, list] = field(default_factory=dict)  # task_id -> previous list
+    size: int = 0
+
+    def estimate_size(self) -> int:
+        """Approximate footprint in bytes (serialized size of the delta)."""
+        payload = [self.old_fields, self.added_tasks, self.added_sessions,
+                   self.popped_sessions, self.replaced_sessions,
+                   [task_to_dict(t) for _i, t in self.removed_tasks.values()]]
+        self.size = len(json.dumps(payload, default=lambda o: list(o) if isinstance(o, SessionLog) else str(o))) \
+            + len(self.label)
+        return self.size
+
+
+class UndoHistory:
+    """Undo/redo stacks bounded by entry count and total delta bytes."""
+    def __init__(self, depth: int = 50, budget_bytes: int = 2_000_000):
+        self.depth = depth
+        self.budget_bytes = budget_bytes
+        self.undo: deque[UndoEntry] = deque()
+        self.redo: deque[UndoEntry] = deque()
+        self.bytes = 0
+
+    def push_undo(self, entry: UndoEntry, clear_redo: bool = True):
+        if clear_redo:
+            self.bytes -= sum(e.size for e in self.redo)
+            self.redo.clear()
+        self.undo.append(entry)
+        self.bytes += entry.estimate_size()
+        self._trim()
+
+    def push_redo(self, entry: UndoEntry):
+        self.redo.append(entry)
+        self.bytes += entry.estimate_size()
+        self._trim()
+
+    def pop(self, stack: "deque[UndoEntry]") -> Optional[UndoEntry]:
+        if not stack:
+            return None
+        entry = stack.pop()
+        self.bytes -= entry.size
+        return entry
+
+    def clear(self):
+        """Forget all steps, e.g. once tasks were replaced by another writer."""
+        self.undo.clear()
+        self.redo.clear()
+        self.bytes = 0
+
+    def _trim(self):
+        # oldest history goes first; the newest undo step is always kept
+        while len(self.undo) > self.depth:
+            self.bytes -= self.undo.popleft().size
+        while self.bytes > self.budget_bytes and self.redo and len(self.redo) > 1:
+            self.bytes -= self.redo.popleft().size
+        while self.bytes > self.budget_bytes and len(self.undo) > 1:
+            self.bytes -= self.undo.popleft().size
+
+
+class TaskTransaction:
+    """
+    Records edits to tasks so a whole batch ends in one save and one UI update,
+    and keeps the inverse delta for undo.
+    Use through ToDoApp._transaction(); mutate tasks only via these methods.
+    """
+    def __init__(self, app: "ToDoApp", label: str = ""):
+        self.app = app
+        self.touched: set[str] = set()   # ids whose card needs repainting
+        self.added: set[str] = set()
+        self.removed: dict[str, int] = {}  # task_id -> index in self.tasks before removal
+        self.kpi_dirty = False
+        self.courses_dirty = False
+        self.undo = UndoEntry(label=label)
+        self._pos: Optional[dict[str, int]] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.touched or self.added or self.removed)
+
+    def set(self, task: Task, field_name: str, value):
+        old = getattr(task, field_name)
+        if old == value:
+            return
+        self.undo.old_fields.setdefault(task.id, {}).setdefault(field_name, old)
+        setattr(task, field_name, value)
+        self.touched.add(task.id)
+        if field_name in ("course", "running_start"):
+            self.kpi_dirty = True
+        if field_name == "course":
+            self.courses_dirty = True
+
+    def add_task(self, task: Task):
+        self.insert_task(task, len(self.app.tasks))
+
+    def insert_task(self, task: Task, index: int):
+        index = min(index, len(self.app.tasks))
+        self.app.tasks.insert(index, task)
+        self.app._tasks_by_id[task.id] = task
+        self.added.add(task.id)
+        self.undo.added_tasks.append(task.id)
+        self._pos = None
+        self.kpi_dirty = self.kpi_dirty or bool(task.sessions or task.running_start)
+        self.courses_dirty = self.courses_dirty or bool(task.course)
+
+    def remove_task(self, task: Task):
+        if task.id in self.removed:
+            return
+        if self._pos is None:
+            # self.tasks is only filtered at commit, so positions stay valid
+            self._pos = {t.id: i for i, t in enumerate(self.app.tasks)}
+        self.removed[task.id] = self._pos[task.id]
+        task.sessions.detach()  # undo must not depend on a sessions.jsonl line that may be compacted away
+        self.undo.removed_tasks[task.id] = (self._pos[task.id], task)
+        self.kpi_dirty = True
+        self.courses_dirty = True
+
+    def add_session(self, task: Task, session: dict):
+        task.sessions.append(session)
+        if task.id not in self.undo.replaced_sessions:
+            self.undo.added_sessions[task.id] = self.undo.added_sessions.get(task.id, 0) + 1
+        self.touched.add(task.id)
+        self.kpi_dirty = True
+
+    def pop_sessions(self, task: Task, n: int):
+        if n <= 0:
+            return
+        popped = task.sessions[-n:]
+        del task.sessions[-n:]
+        if task.id not in self.undo.replaced_sessions:
+            self.undo.popped_sessions[task.id] = popped + self.undo.popped_sessions.get(task.id, [])
+        self.touched.add(task.id)
+        self.kpi_dirty = True
+
+    def replace_sessions(self, task: Task, sessions: list):
+        if task.id not in self.undo.replaced_sessions:
+            old = task.sessions
+            n_added = self.undo.added_sessions.pop(task.id, 0)
+            popped = self.undo.popped_sessions.pop(task.id, [])
+            if n_added or popped:
+                # fold earlier appends/pops into the list we restore
+                old = old[:len(old) - n_added] + popped
+            else:
+                old.detach()
+            self.undo.replaced_sessions[task.id] = old
+        task.sessions = sessions
+        self.touched.add(task.id)
+        self.kpi_dirty = True
+
+    def clear_sessions(self, task: Task):
+        if task.sessions:
+            self.replace_sessions(task, [])
+            # merges drop sessions from other copies that predate the reset
+            self.set(task, "reset_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+@lru_cache(maxsize=4096)
+def _parse_due(s: Optional[str]) -> Optional[_dt.date]:
+    """Parse a 'YYYY-MM-DD' due date once; None if empty or malformed."""
+    try:
+        return _dt.date.fromisoformat(s) if s else None
+    except ValueError:
+        return None
+
+
+class DueIndex:
+    """
+    Tasks with a valid due date, kept sorted on (due, created, id).
+    Gives ordered views without touching self.tasks, plus bisect range
+    queries over ISO date strings (which sort chronologically).
+    """
+    def __init__(self):
+        self.keys: list[tuple[str, str, str]] = []
+        self.key_by_id: dict[str, tuple[str, str, str]] = {}
+
+    @staticmethod
+    def _key(task: Task) -> Optional[tuple[str, str, str]]:
+        d = _parse_due(task.due)
+        return (d.isoformat(), task.created or "", task.id) if d else None
+
+    def rebuild(self, tasks: List[Task]):
+        self.key_by_id = {t.id: k for t in tasks if (k := self._key(t))}
+        self.keys = sorted(self.key_by_id.values())
+
+    def remove(self, task_id: str):
+        key = self.key_by_id.pop(task_id, None)
+        if key is not None:
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+
+    def update(self, task: Task):
+        key = self._key(task)
+        if key == self.key_by_id.get(task.id):
+            return
+        self.remove(task.id)
+        if key is not None:
+            bisect.insort(self.keys, key)
+            self.key_by_id[task.id] = key
+
+    def ids(self, lo: Optional[str] = None, hi: Optional[str] = None) -> list[str]:
+        """Task ids with lo <= due < hi (either bound optional), ascending."""
+        i = bisect.bisect_left(self.keys, (lo,)) if lo else 0
+        j = bisect.bisect_left(self.keys, (hi,)) if hi else len(self.keys)
+        return [k[2] for k in self.keys[i:j]]
+
+
+class DueScheduler:
+    """
+    Keeps a heap of upcoming due-date transitions (not due yet -> due today ->
+    overdue) and arms a single after() timer for the earliest one, so cards
+    restyle right at local midnight without polling.
+    Entries are (when, task_id, version, kind); editing a task bumps its version
+    and stale entries are skipped when they surface.
+    """
+    MAX_SLEEP_MS = 3600 * 1000  # re-arm at least hourly in case the clock jumps (sleep, DST)
+
+    def __init__(self, app: "ToDoApp"):
+        self.app = app
+        self.heap: list[tuple[float, str, int, str]] = []
+        self.version: dict[str, int] = {}
+        self._after_id = None
+
+    @staticmethod
+    def _midnight(d: _dt.date) -> float:
+        return datetime.combine(d, _dt.time()).timestamp()
+
+    def _entries(self, task: Task, today: _dt.date):
+        d = _parse_due(task.due)
+        if d is None or task.done:
+            return
+        v = self.version.get(task.id, 0)
+        if d > today:
+            yield (self._midnight(d), task.id, v, "today")
+        if d >= today:
+            yield (self._midnight(d + _dt.timedelta(days=1)), task.id, v, "overdue")
+
+    def rebuild(self, tasks: List[Task]):
+        today = _dt.date.today()
+        self.version.clear()
+        self.heap = [e for t in tasks for e in self._entries(t, today)]
+        # day rollover keeps the app's cached "today" honest even with no due dates
+        self.heap.append((self._midnight(today + _dt.timedelta(days=1)), "", 0, "midnight"))
+        heapq.heapify(self.heap)
+        self.arm()
+
+    def schedule(self, task: Task, arm: bool = True):
+        """(Re)schedule one task after its due date or done flag changed.
+        Batches pass arm=False and call arm() once at the end."""
+        self.version[task.id] = self.version.get(task.id, 0) + 1
+        today = _dt.date.today()
+        for e in self._entries(task, today):
+            heapq.heappush(self.heap, e)
+        if arm:
+            self.arm()
+
+    def unschedule(self, task_id: str):
+        self.version[task_id] = self.version.get(task_id, 0) + 1
+
+    def _is_stale(self, entry) -> bool:
+        _when, tid, v, kind = entry
+        return kind != "midnight" and self.version.get(tid, 0) != v
+
+    def arm(self):
+        while self.heap and self._is_stale(self.heap[0]):
+            heapq.heappop(self.heap)
+        if self._after_id is not None:
+            self.app.after_cancel(self._after_id)
+            self._after_id = None
+        if not self.heap:
+            return
+        delay = int((self.heap[0][0] - time.time()) * 1000) + 500  # land just after midnight
+        self._after_id = self.app.after(min(max(delay, 0), self.MAX_SLEEP_MS), self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        now = time.time()
+        due: list[tuple[str, str]] = []
+        rolled = False
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            if self._is_stale(entry):
+                continue
+            _when, tid, _v, kind = entry
+            if kind == "midnight":
+                rolled = True
+            else:
+                due.append((tid, kind))
+        if rolled:
+            tomorrow = _dt.date.today() + _dt.timedelta(days=1)
+            heapq.heappush(self.heap, (self._midnight(tomorrow), "", 0, "midnight"))
+        if rolled or due:
+            self.app._on_due_transitions(due)
+        self.arm()
+
+
+class RedrawScheduler:
+    """
+    Coalesces UI refresh requests. request(name) only marks a job pending;
+    a single after() timer later runs each due job once, in the order the
+    jobs were added, and never more than once per frame. Jobs with a delay
+    are debounced (every request pushes them back), and jobs with an
+    inputs() function are skipped when their inputs match the last render.
+    """
+    FRAME_MS = 16
+
+    def __init__(self, app: "ToDoApp"):
+        self.app = app
+        self.jobs: dict[str, tuple] = {}  # name -> (render, inputs, delay_ms)
+        self.due: dict[str, float] = {}  # pending job -> monotonic time it may run
+        self.last_inputs: dict[str, object] = {}
+        self._after_id = None
+        self._armed_at = 0.0
+        self._last_flush = 0.0
+
+    def add(self, name: str, render, inputs=None, delay_ms: int = 0):
+        self.jobs[name] = (render, inputs, delay_ms)
+
+    def request(self, name: str, force: bool = False):
+        """Ask for a render of name; force renders even if its inputs look unchanged."""
+        if force:
+            self.last_inputs.pop(name, None)
+        self.due[name] = time.monotonic() + self.jobs[name][2] / 1000
+        self.arm()
+
+    def arm(self):
+        if not self.due:
+            return
+        at = max(min(self.due.values()), self._last_flush + self.FRAME_MS / 1000)
+        if self._after_id is not None:
+            if self._armed_at <= at:
+                return
+            self.app.after_cancel(self._after_id)
+        self._armed_at = at
+        self._after_id = self.app.after(max(int((at - time.monotonic()) * 1000), 0), self.flush)
+
+    def flush(self):
+        self._after_id = None
+        self._last_flush = time.monotonic()
+        for name, (render, inputs, _delay) in self.jobs.items():
+            # a job requested by an earlier one in this pass (list -> kpi) still runs now
+            if self.due.get(name, float("inf")) > time.monotonic() + 0.002:
+                continue
+            del self.due[name]
+            if inputs is not None:
+                key = inputs()
+                if name in self.last_inputs and self.last_inputs[name] == key:
+                    continue
+                self.last_inputs[name] = key
+            render()
+        self.arm()
+
+
+# ---------- Idle detection ----------
+
+IDLE_POLL_MS = 5000  # one idle check every few seconds, only while a timer runs
+IDLE_MINUTE_CHOICES = ["Off", "5", "10", "15", "30", "60"]
+IDLE_ACTIONS = {"Split the timer": "split", "Stop the timer": "stop"}
+
+
+class X11IdleBackend:
+    """Milliseconds since the last keyboard/mouse input anywhere on the X display (XScreenSaver)."""
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        class Info(ctypes.Structure):
+            _fields_ = [("window", ctypes.c_ulong), ("state", ctypes.c_int), ("kind", ctypes.c_int),
+                        ("til_or_since", ctypes.c_ulong), ("idle", ctypes.c_ulong),
+                        ("event_mask", ctypes.c_ulong)]
+
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xss = ctypes.CDLL(ctypes.util.find_library("Xss") or "libXss.so.1")
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(Info)
+        xss.XScreenSaverQueryInfo.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(Info)]
+        self._display = x11.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("no X display")
+        self._root = x11.XDefaultRootWindow(self._display)
+        self._info = xss.XScreenSaverAllocInfo()
+        self._query = xss.XScreenSaverQueryInfo
+
+    def idle_seconds(self) -> Optional[float]:
+        if not self._query(self._display, self._root, self._info):
+            return None
+        return self._info.contents.idle / 1000.0
+
+
+class WindowsIdleBackend:
+    """Time since the last input event in the user's session (GetLastInputInfo)."""
+    def __init__(self):
+        import ctypes
+
+        class LastInputInfo(ctypes.Structure):
+            _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+        self._info = LastInputInfo(ctypes.sizeof(LastInputInfo), 0)
+        self._ref = ctypes.byref(self._info)
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+
+    def idle_seconds(self) -> Optional[float]:
+        if not self._user32.GetLastInputInfo(self._ref):
+            return None
+        # both tick counts wrap every ~49.7 days
+        return ((self._kernel32.GetTickCount() - self._info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+
+class FakeIdleBackend:
+    """Idle time set by hand (tests, or trying the feature without a real backend)."""
+    def __init__(self, idle: Optional[float] = 0.0):
+        self.idle = idle
+
+    def idle_seconds(self) -> Optional[float]:
+        return self.idle
+
+
+def default_idle_backend():
+    """The OS idle backend for this machine, or None (then only sleep/suspend is noticed)."""
+    try:
+        if sys.platform == "win32":
+            return WindowsIdleBackend()
+        if os.environ.get("DISPLAY"):
+            return X11IdleBackend()
+    except (OSError, AttributeError):
+        pass  # e.g. libXss not installed
+    return None
+
+
+class IdleDetector:
+    """
+    Notices away-from-keyboard stretches inside running timers and hands
+    each one, once the user is back, to app._apply_idle_gap. Idle time is
+    the smaller of the OS backend's figure and the time since the last Tk
+    input event in our own windows. A poll that arrives far later than
+    scheduled means the machine was asleep, which counts as idle even
+    without a backend. Polls run only while a timer runs.
+    """
+
+    def __init__(self, app: "ToDoApp", backend=None):
+        self.app = app
+        self.backend = backend
+        self.last_input = time.monotonic()
+        self.idle_since: Optional[float] = None  # epoch the current away stretch began
+        self._last_poll: Optional[float] = None  # epoch of the previous poll
+        self._after_id = None
+
+    def note_input(self, _event=None):
+        self.last_input = time.monotonic()
+
+    def idle_seconds(self) -> Optional[float]:
+        idle = self.backend.idle_seconds() if self.backend is not None else None
+        if idle is None:
+            return None
+        return min(idle, time.monotonic() - self.last_input)
+
+    def arm(self):
+        """Start polling if idle handling is on and a timer runs; otherwise go quiet."""
+        if not self.app.idle_minutes or not self.app._running_ids:
+            self.idle_since = self._last_poll = None
+            return
+        if self._after_id is None:
+            if self._last_poll is None:
+                self._last_poll = time.time()
+            self._after_id = self.app.after(IDLE_POLL_MS, self.poll)
+
+    def poll(self):
+        self._after_id = None
+        now = time.time()
+        threshold = self.app.idle_minutes * 60
+        idle = self.idle_seconds()
+        away = [self.idle_since] if self.idle_since is not None else []
+        if self._last_poll is not None and now - self._last_poll > IDLE_POLL_MS / 1000 + threshold:
+            away.append(self._last_poll)  # suspended: nothing ran in between
+        still_away = idle is not None and idle >= threshold
+        if still_away:
+            away.append(now - idle)
+            self.idle_since = min(away)
+        elif away:
+            self.idle_since = None
+            self.app._apply_idle_gap(min(away), now - (idle or 0))
+        self._last_poll = now
+        self.arm()
+
+    def settle(self):
+        """The user just acted (e.g. clicked Stop): close an idle stretch still open."""
+        if self.idle_since is not None:
+            since, self.idle_since = self.idle_since, None
+            self.app._apply_idle_gap(since, time.time())
+
+# ---------- Shared task store (safe across processes) ----------
+
+def diff_tasks(ours: List[Task], store: dict, store_path: str) -> tuple[list, dict, set]:
+    """
+    Compare in-memory tasks with a store read from store_path.
+    Returns (added Tasks, {task_id: {field: new value}} for changed tasks,
+    removed task ids). Unknown keys in raw are ignored. Stored sessions are
+    compared by location only, so nothing is read from sessions.jsonl.
+    """
+    gen = store["generation"]
+    path = sessions_path(store_path)
+    disk = {str(d.get("id")): d for d in store["tasks"] if isinstance(d, dict) and d.get("id")}
+    changed: dict[str, dict] = {}
+    removed: set[str] = set()
+    for t in ours:
+        d = disk.pop(t.id, None)
+        if d is None:
+            removed.add(t.id)
+            continue
+        delta = {name: d[name] for name in TASK_FIELDS
+                 if name in d and name != "id" and getattr(t, name) != d[name]}
+        if record_extra(d) != t.extra:
+            delta["extra"] = record_extra(d)
+        if "sessions" not in d:
+            ref = d.get("sessions_ref") if isinstance(d.get("sessions_ref"), dict) else None
+            key = (gen, ref.get("at"), ref.get("len")) if ref else None
+            if key != t.sessions.stored_key() and (ref or len(t.sessions)):
+                delta["sessions"] = SessionLog.stored(path, t.id, gen, ref) if ref else SessionLog()
+        if delta:
+            changed[t.id] = delta
+    added = [task_from_record(d, store_path, gen) for d in disk.values()]
+    return added, changed, removed
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 5.0):
+    """
+    Advisory exclusive lock on path + '.lock' (flock on POSIX, msvcrt on Windows).
+    Only held around the read/compare/replace step of a save, never while idle.
+    """
+    lock_path = path + ".lock"
+    fh = open(lock_path, "a+b")
+    try:
+        deadline = time.monotonic() + timeout
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"{lock_path} is held by another DYFH instance")
+                    time.sleep(0.005)
+            try:
+                yield
+            finally:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            while True:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"{lock_path} is held by another DYFH instance")
+                    time.sleep(0.005)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    finally:
+        fh.close()
+
+
+def file_signature(path: str) -> Optional[tuple[int, int]]:
+    """(mtime_ns, size) — a cheap 'has anyone rewritten this?' check."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def read_task_store(path: str) -> dict:
+    """
+    Return {"schema", "version", "deleted", "generation", "tasks"} with raw
+    task dicts upgraded to TASKS_SCHEMA. Accepts the current object layout
+    and the original bare list of tasks (whose sessions are inline).
+    """
+    with open_data_file(path) as f:
+        raw = json.load(f)
+    if isinstance(raw, list):
+        raw = {"schema": 0, "tasks": raw}
+    schema = stored_schema(raw, default=1)
+    return {"schema": schema,
+            "version": int(raw.get("version", 0)),
+            "deleted": dict(raw.get("deleted") or {}),
+            "generation": raw.get("sessions_generation"),
+            "tasks": [upgrade_record(d, schema, TASK_MIGRATIONS)
+                      for d in raw.get("tasks", []) if isinstance(d, dict)]}
+
+
+class TaskStoreDamaged(ValueError):
+    """tasks.json stopped parsing partway; `loaded` tasks came before character `offset`."""
+    def __init__(self, loaded: int, offset: int):
+        super().__init__(f"unreadable task after {loaded} good one(s), at character {offset}")
+        self.loaded = loaded
+        self.offset = offset
+
+
+def iter_task_store(path: str, chunk_size: int = 1 << 16):
+    """
+    Stream tasks.json instead of json.load-ing it whole: yields the header
+    {"schema", "version", "deleted", "generation"} (the keys written before
+    "tasks") first, then one raw task dict at a time, already upgraded to
+    TASKS_SCHEMA, reading the file in chunks.
+    A task that doesn't parse (e.g. a save cut short) ends the stream with
+    TaskStoreDamaged; everything before it has already been yielded.
+    The header has to be known before the first task, so a file whose header
+    keys don't all come first (hand-edited, or dumped with sorted keys) is
+    read whole with read_task_store instead.
+    """
+    dec = json.JSONDecoder()
+    with open_data_file(path) as f:
+        buf, pos, base = "", 0, 0  # base = file characters dropped from the front of buf
+
+        def more() -> bool:
+            nonlocal buf, pos, base
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            base += pos
+            buf, pos = buf[pos:] + chunk, 0
+            return True
+
+        def peek() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or not more():
+                    return buf[pos:pos + 1]
+
+        def value():
+            nonlocal pos
+            while True:
+                try:
+                    v, end = dec.raw_decode(buf, pos)
+                except ValueError:
+                    if more():
+                        continue  # element runs past this chunk
+                    raise
+                if end == len(buf) and more():
+                    continue  # a bare number may go on in the next chunk
+                pos = end
+                return v
+
+        def tasks():
+            nonlocal pos
+            n = 0
+            while True:
+                if peek() == "]":
+                    return
+                start = base + pos
+                try:
+                    item = value()
+                except ValueError:
+                    raise TaskStoreDamaged(n, start) from None
+                n += 1
+                if isinstance(item, dict):
+                    yield upgrade_record(item, header["schema"], TASK_MIGRATIONS)
+                c = peek()
+                if c == ",":
+                    pos += 1
+                elif c != "]":
+                    raise TaskStoreDamaged(n, base + pos)
+
+        header = {"schema": 1, "version": 0, "deleted": {}, "generation": None}
+        c = peek()
+        if c == "[":  # the original bare list of tasks
+            pos += 1
+            header["schema"] = 0
+            yield header
+            yield from tasks()
+            return
+        if c != "{":
+            raise ValueError(f"{path} is not a DYFH task file")
+        pos += 1
+        seen = set()
+        while peek() not in ("}", ""):
+            key = value()
+            if peek() != ":":
+                raise ValueError(f"{path}: expected ':' after {key!r}")
+            pos += 1
+            if key == "tasks":
+                if peek() != "[":
+                    raise ValueError(f"{path}: \"tasks\" is not a list")
+                pos += 1
+                if not seen >= {"version", "deleted", "sessions_generation"}:
+                    # they may follow the list; write_task_store puts them first
+                    try:
+                        store = read_task_store(path)
+                    except ValueError:
+                        pass  # damaged: stream what parses, under the header seen so far
+                    else:
+                        yield {k: v for k, v in store.items() if k != "tasks"}
+                        yield from store["tasks"]
+                        return
+                yield header
+                yield from tasks()
+                return
+            seen.add(key)
+            peek()
+            v = value()
+            if key == "schema":
+                header["schema"] = stored_schema({"schema": v}, default=1)
+            elif key == "version":
+                header["version"] = int(v)
+            elif key == "deleted":
+                header["deleted"] = dict(v or {})
+            elif key == "sessions_generation":
+                header["generation"] = v
+            if peek() == ",":
+                pos += 1
+        yield header  # no "tasks" key at all
+
+
+def hydrate_task_store(path: str, store: dict) -> dict:
+    """Inline every record's sessions from sessions.jsonl (for merging whole stores)."""
+    recs = [d for d in store["tasks"] if "sessions" not in d and isinstance(d.get("sessions_ref"), dict)]
+    lists = read_session_lists(sessions_path(path), [
+        (d["id"], store["generation"], d["sessions_ref"].get("at"), d["sessions_ref"].get("len"))
+        for d in recs])
+    for d, sessions in zip(recs, lists):
+        d["sessions"] = sessions
+    return store
+
+
+def write_task_store(path: str, header: dict, records, compression: Optional[str] = None) -> str:
+    """
+    Stream a tasks.json body to a per-process temp file next to path, one
+    task record at a time, and return the temp path (rename it into place).
+    header holds "version", "deleted" and "sessions_generation"; sessions
+    must already be in that sessions.jsonl generation (write_session_log).
+    "tasks" is written last on purpose. With compression ("gzip"/"lzma")
+    the JSON is compact; a plain file keeps one readable record per line.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    head = {"schema": TASKS_SCHEMA, **header}
+    with open(tmp, "wb") as raw:
+        if compression == "gzip":
+            z = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0)
+        elif compression == "lzma":
+            z = lzma.LZMAFile(raw, "wb", preset=3)
+        else:
+            z = None
+        out = io.TextIOWrapper(z or raw, encoding="utf-8")
+        if z is None:
+            dumps = json.dumps
+            out.write(json.dumps(head, indent=2)[:-2] + ',\n  "tasks": [')
+            lead, tail = "\n    ", "\n  ]\n}\n"
+        else:
+            def dumps(obj):
+                return json.dumps(obj, separators=(",", ":"))
+            out.write(dumps(head)[:-1] + ',"tasks":[')
+            lead, tail = "", "]}"
+        for i, rec in enumerate(records):
+            out.write(("," if i else "") + lead + dumps(rec))
+        out.write(tail)
+        out.flush()
+        out.detach()
+        if z is not None:
+            z.close()  # writes the trailer; raw stays open
+        raw.flush()
+        os.fsync(raw.fileno())
+    return tmp
+
+
+def migrate_task_store(path: str) -> Optional[str]:
+    """
+    Rewrite a tasks.json older than TASKS_SCHEMA in the current schema, one
+    task record at a time (nothing but the record being written is held in
+    memory), and return the backup's path; None when already current.
+    The upgrade lands by rename, so a crash leaves the old file or the new
+    one. A damaged file raises TaskStoreDamaged and is left untouched.
+    """
+    with file_lock(path):
+        stream = iter_task_store(path)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            header = next(stream)
+            if header["schema"] >= TASKS_SCHEMA:
+                return None
+            backup = backup_before_upgrade(path, header["schema"])
+            tmp = write_task_store(path, {"version": header["version"] + 1, "deleted": header["deleted"],
+                                          "sessions_generation": header["generation"]},
+                                   stream, detect_compression(path))
+            os.replace(tmp, path)
+            return backup
+        finally:
+            stream.close()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def write_json_atomic(path: str, data):
+    """Small JSON files (settings, Zoom links): temp file + rename, never half-written."""
+    os.replace(write_atomic(path, json.dumps(data, indent=2).encode("utf-8")), path)
+
+
+def write_atomic(path: str, data: bytes) -> str:
+    """Write data to a per-process temp file next to path; returns the temp path."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp
+
+
+# ---------- Compression and backups ----------
+# tasks.json may be stored gzip- or xz-compressed (Settings); readers tell by
+# the first bytes, so the file name never changes. sessions.jsonl stays
+# plain: tasks.json points into it by byte offset, and lines are appended.
+
+COMPRESSION_CHOICES = ["none", "gzip", "lzma"]
+COMPRESSION_MAGIC = ((b"\x1f\x8b", "gzip"), (b"\xfd7zXZ\x00", "lzma"))
+BACKUP_DIR = "backups"
+BACKUP_EVERY_S = 24 * 3600  # at most one automatic backup a day
+BACKUP_CHECK_MS = 3 * 3600 * 1000  # how often an open window checks whether one is due
+BACKUP_KEEP_CHOICES = ["Off", "5", "10", "30"]
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """"gzip", "lzma" or None (plain), from the file's magic bytes."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, kind in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def open_data_file(path: str):
+    """Text stream over a data file, decompressed on the fly if it is gzip/xz."""
+    kind = detect_compression(path)
+    if kind == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if kind == "lzma":
+        return lzma.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def backup_data_folder(data_dir: str, keep: int, compression: Optional[str] = None) -> Optional[str]:
+    """
+    Snapshot tasks.json and sessions.jsonl into
+    backups/DYFH-<timestamp>.tar.gz (.tar.xz for lzma) and delete all but
+    the newest `keep`. The store lock is only held for the plain file
+    copies; compressing happens afterwards. Returns the archive path.
+    """
+    store = os.path.join(data_dir, "tasks.json")
+    if keep <= 0 or not os.path.exists(store):
+        return None
+    folder = os.path.join(data_dir, BACKUP_DIR)
+    os.makedirs(folder, exist_ok=True)
+    staged = []
+    try:
+        with file_lock(store):
+            for name in ("tasks.json", "sessions.jsonl"):
+                src = os.path.join(data_dir, name)
+                if os.path.exists(src):
+                    dst = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+                    shutil.copy2(src, dst)
+                    staged.append((name, dst))
+        mode, ext = ("w:xz", ".tar.xz") if compression == "lzma" else ("w:gz", ".tar.gz")
+        target = os.path.join(folder, f"DYFH-{datetime.now().strftime('%Y%m%d-%H%M%S')}{ext}")
+        with tarfile.open(target + ".tmp", mode) as tar:
+            for name, dst in staged:
+                tar.add(dst, arcname=name)
+        os.replace(target + ".tmp", target)
+    finally:
+        for _name, dst in staged:
+            if os.path.exists(dst):
+                os.remove(dst)
+    # names sort by timestamp
+    old = sorted(f for f in os.listdir(folder) if f.startswith("DYFH-") and f.endswith((".tar.gz", ".tar.xz")))
+    for name in old[:-keep]:
+        os.remove(os.path.join(folder, name))
+    return target
+
+
+def newest_backup_age(data_dir: str) -> Optional[float]:
+    """Seconds since the newest backup archive was written, or None if there is none."""
+    folder = os.path.join(data_dir, BACKUP_DIR)
+    try:
+        stamps = [os.path.getmtime(os.path.join(folder, f)) for f in os.listdir(folder)
+                  if f.startswith("DYFH-") and f.endswith((".tar.gz", ".tar.xz"))]
+    except OSError:
+        return None
+    return time.time() - max(stamps) if stamps else None
+
+
+# ---------- Session log (sessions.jsonl) ----------
+# tasks.json only says where each task's sessions are:
+#   "sessions_ref": {"at": byte offset, "len": line length, "n": count, "seconds": total}
+# sessions.jsonl starts with {"generation": ...} and then has one line per
+# write of a task's whole session list. Lines are only ever appended; older
+# lines for the same task are dead weight until the file is compacted, which
+# starts a new generation. Offsets are only trusted within their generation,
+# otherwise the newest line for the task is looked up instead.
+
+SESSION_LOG_SLACK = 256 * 1024  # dead bytes tolerated before compacting
+
+_SESSION_INDEX: Dict[str, tuple] = {}  # path -> (file signature, {task_id: (offset, length)})
+
+
+@lru_cache(maxsize=8)
+def sessions_path(store_path: str) -> str:
+    return os.path.join(os.path.dirname(store_path), "sessions.jsonl")
+
+
+def _session_line(tid: str, sessions) -> bytes:
+    return json.dumps({"id": tid, "sessions": list(sessions)},
+                      separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _session_line_prefix(tid: str) -> bytes:
+    return b'{"id":' + json.dumps(tid).encode("utf-8") + b","
+
+
+def _read_generation(f) -> Optional[str]:
+    f.seek(0)
+    try:
+        head = json.loads(f.readline() or b"null")
+    except ValueError:
+        return None
+    return head.get("generation") if isinstance(head, dict) else None
+
+
+def session_file_index(path: str) -> Dict[str, tuple]:
+    """{task_id: (offset, length)} of the newest complete line per task; cached per file signature."""
+    sig = file_signature(path)
+    cached = _SESSION_INDEX.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    index: Dict[str, tuple] = {}
+    if sig is not None:
+        at = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if line.startswith(b'{"id":') and line.endswith(b"\n"):
+                    try:
+                        index[json.loads(line[6:line.index(b',"sessions":')])] = (at, len(line))
+                    except ValueError:
+                        pass
+                at += len(line)
+    _SESSION_INDEX[path] = (sig, index)
+    return index
+
+
+def _read_session_lines(f, path: str, refs: list) -> List[Optional[bytes]]:
+    current = _read_generation(f)
+    lines: List[Optional[bytes]] = []
+    for tid, gen, at, length in refs:
+        line = None
+        if current is not None and gen == current and isinstance(at, int) and isinstance(length, int):
+            f.seek(at)
+            line = f.read(length)
+            if not (line.startswith(_session_line_prefix(tid)) and line.endswith(b"\n")):
+                line = None
+        if line is None:
+            loc = session_file_index(path).get(tid)
+            if loc is not None:
+                f.seek(loc[0])
+                line = f.read(loc[1])
+        lines.append(line)
+    return lines
+
+
+def read_session_lists(path: str, refs: list) -> List[list]:
+    """
+    Session lists for [(task_id, generation, offset, length), ...] from one
+    sessions.jsonl: a seek per task while the file is still the generation the
+    offsets were taken in, else the newest line for that task. Missing -> [].
+    """
+    try:
+        with open(path, "rb") as f:
+            lines = _read_session_lines(f, path, refs)
+    except OSError:
+        return [[] for _ in refs]
+    out = []
+    for line in lines:
+        try:
+            out.append(json.loads(line)["sessions"] if line else [])
+        except (ValueError, KeyError, TypeError):
+            out.append([])
+    return out
+
+
+def write_session_log(store_path: str, tasks: List[Task], deleted: Dict[str, str]) -> str:
+    """
+    Append a line for every task whose sessions changed since they were last
+    written, or compact the file when it would be mostly dead lines. Returns
+    the generation the tasks now point into. Hold the tasks.json lock and
+    write tasks.json right after.
+    """
+    path = sessions_path(store_path)
+    try:
+        with open(path, "rb") as f:
+            gen = _read_generation(f)
+    except OSError:
+        gen = None
+    if gen is not None:
+        fresh = [(t, _session_line(t.id, t.sessions)) for t in tasks if t.sessions.needs_write(path, gen)]
+        new_bytes = sum(len(line) for _t, line in fresh)
+        live = new_bytes + sum(t.sessions.ref()["len"] for t in tasks
+                               if len(t.sessions) and not t.sessions.needs_write(path, gen))
+        if os.path.getsize(path) + new_bytes <= 2 * live + SESSION_LOG_SLACK:
+            if fresh:
+                cached = _SESSION_INDEX.get(path)
+                fresh_index = cached is not None and cached[0] == file_signature(path)
+                with open(path, "r+b") as f:
+                    at = f.seek(0, os.SEEK_END)
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":  # a write cut short by a crash; start on a fresh line
+                        f.write(b"\n")
+                        at += 1
+                    for t, line in fresh:
+                        f.write(line)
+                        t.sessions._stored_at(path, t.id, gen, at, len(line))
+                        if fresh_index:
+                            cached[1][t.id] = (at, len(line))
+                        at += len(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if fresh_index:
+                    _SESSION_INDEX[path] = (file_signature(path), cached[1])
+            return gen
+    return compact_session_log(store_path, tasks, deleted)
+
+
+def compact_session_log(store_path: str, tasks: List[Task], deleted: Dict[str, str]) -> str:
+    """
+    Rewrite sessions.jsonl with one line per task (plus recently deleted tasks,
+    which another window may still bring back) under a new generation.
+    """
+    path = sessions_path(store_path)
+    gen = secrets.token_hex(8)
+    keep = [t for t in tasks if len(t.sessions)]
+    stored = [t for t in keep if not t.sessions.loaded]
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        src = open(path, "rb")
+    except OSError:
+        src = None
+    try:
+        copied: Dict[str, Optional[bytes]] = {}
+        if src is not None:
+            lines = _read_session_lines(src, path, [t.sessions._src[1:5] for t in stored])
+            copied = {t.id: line for t, line in zip(stored, lines)}
+            index = session_file_index(path)
+            gone = [tid for tid in deleted if tid in index]
+            for tid, line in zip(gone, _read_session_lines(src, path, [(tid, None, 0, 0) for tid in gone])):
+                copied.setdefault(tid, line)
+        placed = []
+        with open(tmp, "wb") as out:
+            out.write(json.dumps({"generation": gen}).encode("utf-8") + b"\n")
+            for t in keep:
+                line = copied.pop(t.id, None) or _session_line(t.id, t.sessions)
+                placed.append((t, out.tell(), len(line)))
+                out.write(line)
+            for line in copied.values():
+                if line:
+                    out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+    finally:
+        if src is not None:
+            src.close()
+    os.replace(tmp, path)
+    _SESSION_INDEX.pop(path, None)
+    for t, at, length in placed:
+        t.sessions._stored_at(path, t.id, gen, at, length)
+    return gen
+
+
+def session_record_lines(records: List[dict]) -> List[tuple]:
+    """[(task_id, line, count, seconds), ...] for task records with inline "sessions" (as merge_stores returns them)."""
+    return [(d["id"], _session_line(d["id"], d["sessions"]), len(d["sessions"]),
+             sum(s.get("seconds", 0) for s in d["sessions"]))
+            for d in records if d.get("sessions")]
+
+
+def write_session_records(store_path: str, lines: List[tuple], deleted: Dict[str, str]) -> tuple:
+    """
+    compact_session_log for session_record_lines output, without building
+    Task objects. Returns (generation, {task_id: sessions_ref}).
+    """
+    path = sessions_path(store_path)
+    gen = secrets.token_hex(8)
+    refs: Dict[str, dict] = {}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    kept: List[bytes] = []
+    if deleted:
+        try:
+            with open(path, "rb") as src:
+                index = session_file_index(path)
+                gone = [tid for tid in deleted if tid in index]
+                kept = [line for line in _read_session_lines(src, path, [(tid, None, 0, 0) for tid in gone])
+                        if line]
+        except OSError:
+            pass
+    with open(tmp, "wb") as out:
+        out.write(json.dumps({"generation": gen}).encode("utf-8") + b"\n")
+        at = out.tell()
+        for tid, line, n, seconds in lines:
+            out.write(line)
+            refs[tid] = {"at": at, "len": len(line), "n": n, "seconds": seconds}
+            at += len(line)
+        for line in kept:
+            out.write(line)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path)
+    _SESSION_INDEX.pop(path, None)
+    return gen, refs
+
+
+# ---------- Binary session cache (sessions.bin) ----------
+
+class SessionBinLog:
+    """
+    Derived copy of every session as fixed-width records (task index, start
+    epoch, seconds, UTC offset minutes) for analytics, read through mmap +
+    np.frombuffer without parsing or copying, and appended in O(1) as
+    sessions are logged. tasks.json/sessions.jsonl stay the source of truth:
+    sync() rewrites any task whose count or total here has drifted.
+
+    sessions.bin  = 16-byte header (magic, epoch token) + records
+    sessions.bin.ids = epoch token, then one task id per line (line n = index n)
+    A token mismatch (e.g. a crash mid-compaction) just means "rebuild".
+    """
+    MAGIC = b"DYFHSBN1"
+    HEADER = 16
+    REC = struct.Struct("<iqii")
+    DTYPE = np.dtype([("task", "<i4"), ("start", "<i8"), ("seconds", "<i4"), ("tz", "<i4")])
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids_path = path + ".ids"
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._token: Optional[bytes] = None
+        self._ids_read = 0  # bytes of the ids file already in self.ids
+        self._map: Optional[mmap.mmap] = None
+        self._map_size = -1
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    # ----- reading -----
+    def _refresh(self):
+        """Pick up ids appended (or a rebuild done) by another instance."""
+        try:
+            with open(self.path, "rb") as f:
+                head = f.read(self.HEADER)
+        except OSError:
+            head = b""
+        if len(head) < self.HEADER or head[:8] != self.MAGIC:
+            self._reset()
+            return
+        if head[8:] != self._token:
+            self._token, self.ids, self.index, self._ids_read = head[8:], [], {}, 0
+        try:
+            with open(self.ids_path, "rb") as f:
+                f.seek(self._ids_read)
+                chunk = f.read()
+        except OSError:
+            chunk = b""
+        if self._ids_read == 0:
+            first, _, chunk = chunk.partition(b"\n")
+            if first != self._token.hex().encode("ascii"):
+                self._reset()
+                return
+            self._ids_read = len(first) + 1
+        chunk = chunk[:chunk.rfind(b"\n") + 1]  # ignore a half-written last line
+        for line in chunk.splitlines():
+            self.index[line.decode("utf-8")] = len(self.ids)
+            self.ids.append(line.decode("utf-8"))
+        self._ids_read += len(chunk)
+
+    def records(self) -> np.ndarray:
+        """
+        Every record as a read-only structured array over the mapped file.
+        Invalidated records have task == -1; use live_mask() to skip them.
+        """
+        self._refresh()
+        size = os.path.getsize(self.path)
+        n = (size - self.HEADER) // self.REC.size
+        if n <= 0:
+            return np.zeros(0, dtype=self.DTYPE)
+        if self._map is None or self._map_size != size:
+            with open(self.path, "rb") as f:
+                # the old map is released once no array refers to it any more
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = size
+        return np.frombuffer(self._map, dtype=self.DTYPE, count=n, offset=self.HEADER)
+
+    def live_mask(self, recs: np.ndarray) -> np.ndarray:
+        # skips invalidated records and any whose id line was lost in a crash
+        return (recs["task"] >= 0) & (recs["task"] < len(self.ids))
+
+    # ----- writing (under the file lock, so instances don't hand out the same index) -----
+    def _reset(self):
+        self._token = secrets.token_bytes(8)
+        with open(self.ids_path, "wb") as f:
+            f.write(self._token.hex().encode("ascii") + b"\n")
+        with open(self.path, "wb") as f:
+            f.write(self.MAGIC + self._token)
+        self.ids, self.index = [], {}
+        self._ids_read = len(self._token.hex()) + 1
+        self._map, self._map_size = None, -1
+
+    def _task_index(self, tid: str) -> int:
+        i = self.index.get(tid)
+        if i is None:
+            # the id goes in before any record points at it
+            with open(self.ids_path, "ab") as f:
+                line = tid.encode("utf-8") + b"\n"
+                f.write(line)
+            self._ids_read += len(line)
+            i = self.index[tid] = len(self.ids)
+            self.ids.append(tid)
+        return i
+
+    def _append(self, f, tid: str, columns):
+        i = self._task_index(tid)
+        f.write(b"".join(self.REC.pack(i, start, secs, tz) for start, secs, tz in columns))
+
+    def _open_for_append(self):
+        f = open(self.path, "r+b")
+        end = f.seek(0, os.SEEK_END)
+        whole = self.HEADER + (end - self.HEADER) // self.REC.size * self.REC.size
+        if whole != end:  # torn record from a crash
+            f.truncate(whole)
+            f.seek(whole)
+        return f
+
+    def append(self, tid: str, columns):
+        """Add sessions [(start_epoch, seconds, tz_minutes), ...] of one task."""
+        with file_lock(self.path):
+            self._refresh()
+            with self._open_for_append() as f:
+                self._append(f, tid, columns)
+
+    def _invalidate(self, f, recs: np.ndarray, tids):
+        wanted = [self.index[tid] for tid in tids if tid in self.index]
+        if not wanted:
+            return
+        for pos in np.flatnonzero(np.isin(recs["task"], wanted)).tolist():
+            f.seek(self.HEADER + pos * self.REC.size)
+            f.write(struct.pack("<i", -1))
+        f.seek(0, os.SEEK_END)
+
+    def update(self, added: Dict[str, object] = None, replaced: List[Task] = (), removed=()):
+        """
+        Mirror one change: added = {task_id: columns appended}, replaced =
+        tasks whose whole session list changed, removed = deleted task ids.
+        """
+        with file_lock(self.path):
+            self._refresh()
+            with self._open_for_append() as f:
+                if replaced or removed:
+                    self._invalidate(f, self.records(), [t.id for t in replaced] + list(removed))
+                for tid, columns in (added or {}).items():
+                    self._append(f, tid, columns)
+                for t in replaced:
+                    self._append(f, t.id, t.sessions.columns())
+
+    def sync(self, tasks: List[Task]) -> int:
+        """
+        Make the cache agree with tasks (count and total seconds per task);
+        returns how many tasks had to be rewritten. Compacts when more than
+        half the file is invalidated records.
+        """
+        with file_lock(self.path):
+            self._refresh()
+            with self._open_for_append() as f:
+                raw = self.records()  # the mapped file; writes through f show up in it
+                live = self.live_mask(raw)
+                task = raw["task"][live]
+                counts = np.bincount(task, minlength=len(self.ids))
+                secs = np.bincount(task, weights=raw["seconds"][live], minlength=len(self.ids))
+                stale: List[Task] = []
+                keep = set()
+                for t in tasks:
+                    i = self.index.get(t.id)
+                    if i is not None:
+                        keep.add(i)
+                    n = len(t.sessions)
+                    if (counts[i] if i is not None else 0) != n \
+                            or (secs[i] if i is not None else 0) != t.sessions.total_seconds():
+                        stale.append(t)
+                gone = [self.ids[i] for i in np.flatnonzero(counts).tolist() if i not in keep]
+                dead = len(raw) - int(live.sum())
+                if stale or gone:
+                    redo = [t.id for t in stale] + gone
+                    dead += int(sum(counts[self.index[tid]] for tid in redo if tid in self.index))
+                    self._invalidate(f, raw, redo)
+                    for k in range(0, len(stale), 256):
+                        chunk = stale[k:k + 256]
+                        lazy = [t.sessions for t in chunk if not t.sessions.loaded]
+                        SessionLog.load_many(lazy)
+                        for t in chunk:
+                            self._append(f, t.id, t.sessions.columns())
+                        for log in lazy:
+                            log.unload()
+            if dead > max(len(raw) // 2, 4096):
+                self._compact()
+        return len(stale)
+
+    def _compact(self):
+        raw = self.records()
+        keep = raw[self.live_mask(raw)].copy()
+        used = np.unique(keep["task"])
+        keep["task"] = np.searchsorted(used, keep["task"])
+        token = secrets.token_bytes(8)
+        ids = [self.ids[i] for i in used.tolist()]
+        # records first: until the ids file carries the new token the pair reads as "rebuild"
+        os.replace(write_atomic(self.path, self.MAGIC + token + keep.tobytes()), self.path)
+        os.replace(write_atomic(self.ids_path, token.hex().encode("ascii") + b"\n"
+                                + b"".join(tid.encode("utf-8") + b"\n" for tid in ids)), self.ids_path)
+        self._token, self._ids_read = None, 0
+        self._map, self._map_size = None, -1
+        self._refresh()
+
+
+# ---------- Timer heartbeats (crash recovery) ----------
+
+HEARTBEAT_MS = 30_000  # how often a running timer proves the app is still alive
+
+
+def pid_alive(pid: int) -> bool:
+    """True while a process with this pid exists (os.kill(pid, 0) would end it on Windows)."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return bool(ok) and code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True  # someone else's process
+    except OSError:
+        return False
+    return True
+
+
+class TimerHeartbeat:
+    """
+    Side file of "still alive at <epoch>, pid <owner>" lines, appended (and
+    fsynced) while any timer runs; a clean shutdown drops its own lines. If
+    beats are still there at startup, the last complete line says when
+    running timers were last really running, and by which process (another
+    window may still be running them). Appending rather than overwriting
+    means a crash mid-write can only tear the newest line, never lose the
+    previous one.
+    """
+    MAX_BYTES = 4096  # then rewritten down to the newest line of each owner
+
+    def __init__(self, path: str, owner: Optional[int] = None):
+        self.path = path
+        self.owner = os.getpid() if owner is None else owner
+
+    def _beats(self) -> List[tuple[int, int]]:
+        """Every complete (epoch, owner) line; beats from before owners were recorded get owner 0."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return []
+        beats = []
+        for line in data.split(b"\n")[:-1]:  # [-1] is "" or a torn write
+            try:
+                epoch, _sep, owner = line.partition(b" ")
+                beats.append((int(epoch), int(owner or 0)))
+            except ValueError:
+                continue
+        return beats
+
+    def _rewrite(self, beats: List[tuple[int, int]]):
+        if not beats:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(b"%d %d\n" % b for b in beats))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def beat(self, now: Optional[float] = None):
+        line = b"%d %d\n" % (int(time.time() if now is None else now), self.owner)
+        try:
+            if os.path.getsize(self.path) >= self.MAX_BYTES:
+                newest = {owner: epoch for epoch, owner in self._beats() if owner != self.owner}
+                self._rewrite(sorted((epoch, owner) for owner, epoch in newest.items()))
+        except OSError:
+            pass  # no file yet
+        try:
+            with open(self.path, "ab") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            pass  # recovery then leaves the timer running, as before
+
+    def last(self) -> Optional[tuple[int, int]]:
+        """(epoch, owner pid) of the newest complete heartbeat, or None (no file: clean exit)."""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(max(0, os.path.getsize(self.path) - 64))
+                tail = f.read()
+        except OSError:
+            return None
+        for line in reversed(tail.split(b"\n")[:-1]):  # [-1] is "" or a torn write
+            try:
+                epoch, _sep, owner = line.partition(b" ")
+                return int(epoch), int(owner or 0)
+            except ValueError:
+                continue
+        return None
+
+    def clear(self, everyone: bool = False):
+        """Drop this process's beats (another window may still be beating), or all of them."""
+        try:
+            self._rewrite([] if everyone else [b for b in self._beats() if b[1] != self.owner])
+        except OSError:
+            pass
+
+
+# ---------- Local-time bucketing ----------
+
+def _zone_key() -> tuple:
+    # changes when the machine's zone does (time.tzset() after a TZ change)
+    return time.tzname, time.timezone, time.altzone
+
+
+@lru_cache(maxsize=8)
+def _offset_table(first_day: int, last_day: int, zone: tuple) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (instants, offsets): from instants[i] on, local time is UTC +
+    offsets[i] seconds, for UTC days first_day..last_day in this machine's
+    zone. One localtime() call per day plus a bisect per DST change.
+    """
+    def offset(ts: int) -> int:
+        return time.localtime(ts).tm_gmtoff
+
+    instants, offsets = [first_day * 86400], [offset(first_day * 86400)]
+    for day in range(first_day + 1, last_day + 2):
+        ts = day * 86400
+        off = offset(ts)
+        if off != offsets[-1]:
+            lo, hi = ts - 86400, ts
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                lo, hi = (mid, hi) if offset(mid) == offsets[-1] else (lo, mid)
+            instants.append(hi)
+            offsets.append(off)
+    return np.array(instants, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+def local_starts(starts: np.ndarray) -> np.ndarray:
+    """
+    UTC epoch seconds -> the same instants as local wall-clock epoch seconds
+    in this machine's zone, DST included, without building a datetime per
+    session. The offset table covers whole 512-day blocks so it stays
+    cached as new sessions come in.
+    """
+    if not len(starts):
+        return starts.astype(np.int64)
+    first = int(starts.min()) // 86400 // 512 * 512
+    last = (int(starts.max()) // 86400 // 512 + 1) * 512
+    instants, offsets = _offset_table(first, last, _zone_key())
+    return starts + offsets[np.searchsorted(instants, starts, "right") - 1]
+
+
+def _utc_of_local(local: np.ndarray) -> np.ndarray:
+    """Inverse of local_starts() for wall-clock times away from a DST jump (e.g. midnights)."""
+    guess = local - (local_starts(local) - local)
+    return local - (local_starts(guess) - guess)
+
+
+def local_day_seconds(starts: np.ndarray, seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (local day numbers, seconds) for every day with time logged, with
+    sessions (UTC epoch starts) split at local midnight: the start day
+    gets the time up to midnight, the end day the rest, and days in
+    between their full length. Cuts are made at the real instants of
+    midnight, so 23- and 25-hour DST days add up.
+    """
+    if not len(starts):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    start = starts.astype(np.int64)
+    secs = seconds.astype(np.int64)
+    end = start + secs
+    d0 = local_starts(start) // 86400
+    d1 = local_starts(end - 1) // 86400  # day holding the last second
+    base = int(d0.min())
+    size = int(d1.max()) - base + 2
+
+    one = d0 == d1
+    many = ~one
+    per = np.zeros(size)
+    per += np.bincount(d0[one] - base, weights=secs[one], minlength=size)
+    if many.any():
+        d0, d1, start, end = d0[many], d1[many], start[many], end[many]
+        per += np.bincount(d0 - base, weights=_utc_of_local((d0 + 1) * 86400) - start, minlength=size)
+        per += np.bincount(d1 - base, weights=end - _utc_of_local(d1 * 86400), minlength=size)
+        # whole days in between: count the sessions covering each day with a
+        # difference array, times that day's length (23h/25h on DST changes)
+        inner = d1 - d0 > 1
+        step = np.bincount(np.concatenate([d0[inner] + 1 - base, d1[inner] - base]),
+                           weights=np.concatenate([np.ones(int(inner.sum())), -np.ones(int(inner.sum()))]),
+                           minlength=size)
+        midnights = _utc_of_local((np.arange(size + 1) + base) * 86400)
+        per += np.cumsum(step) * np.diff(midnights)
+    days = np.flatnonzero(per)
+    return days + base, per[days]
+
+
+def weekday_seconds(days: np.ndarray, per_day: np.ndarray) -> np.ndarray:
+    """Seconds per weekday Mon..Sun from local_day_seconds() output."""
+    # 1970-01-01 was a Thursday; 0=Mon
+    return np.bincount((days + 3) % 7, weights=per_day, minlength=7)
+
+
+# ---------- Parallel analytics (sharded sessions.bin) ----------
+
+PARALLEL_MIN_RECORDS = 2_000_000  # below this one numpy pass beats worker start-up and IPC
+SHARD_RECORDS = 1 << 20
+
+
+def select_records(recs: np.ndarray, wanted: np.ndarray) -> np.ndarray:
+    """
+    Live records with time logged whose task index is set in wanted. Ids
+    another instance added after wanted was built are past its end.
+    """
+    task = recs["task"]
+    keep = (task >= 0) & (task < len(wanted)) & (recs["seconds"] > 0)
+    keep[keep] = wanted[task[keep]]
+    return recs[keep]
+
+
+def aggregate_sessions(recs: np.ndarray, wanted: np.ndarray) -> tuple:
+    """
+    Partial sums over SessionBinLog records whose task index is set in
+    wanted: (local days, seconds per day, seconds per weekday Mon..Sun).
+    """
+    recs = select_records(recs, wanted)
+    days, per_day = local_day_seconds(recs["start"], recs["seconds"])
+    return days, per_day, weekday_seconds(days, per_day)
+
+
+def merge_session_aggregates(parts: list) -> tuple:
+    """Combine aggregate_sessions() results of disjoint shards."""
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(7)
+    days, inverse = np.unique(np.concatenate([p[0] for p in parts]), return_inverse=True)
+    per_day = np.bincount(inverse, weights=np.concatenate([p[1] for p in parts]), minlength=len(days))
+    return days, per_day, np.sum([p[2] for p in parts], axis=0)
+
+
+def _aggregate_bin_shard(path: str, token: bytes, lo: int, hi: int, wanted: np.ndarray) -> tuple:
+    """Worker: map sessions.bin itself and aggregate records [lo, hi)."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        if m[8:SessionBinLog.HEADER] != token:
+            raise RuntimeError("sessions.bin was rebuilt while aggregating")
+        recs = np.frombuffer(m, dtype=SessionBinLog.DTYPE, count=hi - lo,
+                             offset=SessionBinLog.HEADER + lo * SessionBinLog.REC.size)
+        try:
+            return aggregate_sessions(recs, wanted)
+        finally:
+            del recs  # the map can't close while an array still points into it
+
+
+# ---------- Date-range analytics ----------
+
+ANALYTICS_RANGES = ["All time", "7 days", "30 days", "Week", "Month", "Semester"]
+_EPOCH_DAY = _dt.date(1970, 1, 1)
+
+
+def period_bounds(kind: str, day: _dt.date) -> tuple[_dt.date, _dt.date]:
+    """
+    First and last date of the ANALYTICS_RANGES period containing day
+    ("7 days"/"30 days" end on day). Semesters: Jan-May, Jun-Jul, Aug-Dec.
+    """
+    if kind == "7 days":
+        return day - _dt.timedelta(days=6), day
+    if kind == "30 days":
+        return day - _dt.timedelta(days=29), day
+    if kind == "Week":
+        first = day - _dt.timedelta(days=day.weekday())
+        return first, first + _dt.timedelta(days=6)
+    if kind == "Month":
+        first = day.replace(day=1)
+        nxt = (first + _dt.timedelta(days=32)).replace(day=1)
+        return first, nxt - _dt.timedelta(days=1)
+    if kind == "Semester":
+        start_month, end_month = (1, 5) if day.month <= 5 else (6, 7) if day.month <= 7 else (8, 12)
+        last = period_bounds("Month", _dt.date(day.year, end_month, 1))[1]
+        return _dt.date(day.year, start_month, 1), last
+    raise ValueError(f"unknown range {kind!r}")
+
+
+def step_period(kind: str, day: _dt.date, direction: int) -> _dt.date:
+    """Anchor day of the previous (-1) or next (+1) window; rolling ranges move one day."""
+    if kind in ("7 days", "30 days"):
+        return day + _dt.timedelta(days=direction)
+    first, last = period_bounds(kind, day)
+    return first - _dt.timedelta(days=1) if direction < 0 else last + _dt.timedelta(days=1)
+
+
+class SessionWindow:
+    """
+    One course selection's sessions sorted by local day, so a date window
+    is located with bisects (np.searchsorted) instead of a scan. Per-day
+    totals (split at local midnight) are grouped once and sliced. Weekday
+    sums (over those days) and per-task sums (over sessions starting in
+    the window) are kept for the current window; move() only adds what
+    entered and subtracts what left, so stepping a rolling window or
+    widening Week -> Month costs O(change).
+    """
+
+    def __init__(self, recs: np.ndarray, n_tasks: int):
+        local_start = local_starts(recs["start"])
+        days = local_start // 86400
+        order = np.argsort(days, kind="stable")
+        self.local_start = local_start[order]
+        self.days = days[order]
+        self.seconds = recs["seconds"][order].astype(np.float64)
+        self.task = recs["task"][order]
+        self.day_keys, self.day_seconds = local_day_seconds(recs["start"], recs["seconds"])
+        self.day_weekday = (self.day_keys + 3) % 7  # 1970-01-01 was a Thursday; 0=Mon
+        self.n_tasks = n_tasks
+        self.lo = self.hi = 0  # sessions in the window
+        self.day_lo = self.day_hi = 0  # day_keys in the window
+        self.per_weekday = np.zeros(7)
+        self.per_task = np.zeros(n_tasks)
+
+    @staticmethod
+    def day_number(d: _dt.date) -> int:
+        return (d - _EPOCH_DAY).days
+
+    @staticmethod
+    def _slide(old: tuple[int, int], new: tuple[int, int], add, reset):
+        """Call add(lo, hi, +1/-1) for the index ranges that entered/left."""
+        (old_lo, old_hi), (lo, hi) = old, new
+        if lo >= old_hi or hi <= old_lo:  # no overlap: nothing to reuse
+            reset()
+            add(lo, hi, 1)
+            return
+        if lo > old_lo:
+            add(old_lo, lo, -1)
+        else:
+            add(lo, old_lo, 1)
+        if hi < old_hi:
+            add(hi, old_hi, -1)
+        else:
+            add(old_hi, hi, 1)
+
+    # seconds are whole numbers, so float sums stay exact through add/subtract
+    def _add_days(self, lo: int, hi: int, sign: int):
+        if hi > lo:
+            self.per_weekday += sign * np.bincount(self.day_weekday[lo:hi], weights=self.day_seconds[lo:hi],
+                                                   minlength=7)
+
+    def _add_sessions(self, lo: int, hi: int, sign: int):
+        if hi > lo:
+            self.per_task += sign * np.bincount(self.task[lo:hi], weights=self.seconds[lo:hi],
+                                                minlength=self.n_tasks)
+
+    def _day_range(self, first: _dt.date, last: _dt.date) -> tuple[int, int]:
+        return (int(np.searchsorted(self.day_keys, self.day_number(first), "left")),
+                int(np.searchsorted(self.day_keys, self.day_number(last), "right")))
+
+    def move(self, first: _dt.date, last: _dt.date):
+        """Make [first, last] (inclusive, local dates) the current window."""
+        span = (int(np.searchsorted(self.days, self.day_number(first), "left")),
+                int(np.searchsorted(self.days, self.day_number(last), "right")))
+        self._slide((self.lo, self.hi), span, self._add_sessions, lambda: self.per_task.fill(0))
+        self.lo, self.hi = span
+        span = self._day_range(first, last)
+        self._slide((self.day_lo, self.day_hi), span, self._add_days, lambda: self.per_weekday.fill(0))
+        self.day_lo, self.day_hi = span
+
+    def by_day(self, first: _dt.date, last: _dt.date) -> tuple[np.ndarray, np.ndarray]:
+        """(day numbers, seconds) of days with time logged in [first, last]."""
+        i, j = self._day_range(first, last)
+        return self.day_keys[i:j], self.day_seconds[i:j]
+
+
+# ---------- Chart downsampling ----------
+
+def downsample_cumulative(x: np.ndarray, width: int) -> np.ndarray:
+    """
+    Indices of the points worth drawing from non-decreasing series over
+    sorted x when the plot is width pixels wide: the first and last point
+    of each pixel column. For running totals those are each column's
+    min and max, so the drawn shape matches the full series while draw
+    time depends on the canvas width, not on how many days there are.
+    """
+    n = len(x)
+    if n <= 2 * width:
+        return np.arange(n)
+    column = (x - x[0]) * width // (x[-1] - x[0] + 1)
+    first = np.flatnonzero(np.r_[True, column[1:] != column[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+    return np.union1d(first, last)
+
+
+# ---------- Weekly goals ----------
+
+GOAL_TICK_MS = 30_000  # how often running timers move the class totals and goal bars
+
+
+class WeekTotals:
+    """
+    Seconds logged per task in the current local week (Monday 00:00 on).
+    Built once from sessions.bin, then kept current from each committed
+    session change (a check-in adds one session's overlap), so drawing
+    goal progress never rescans history. Running timers are not in here;
+    add running_overlap() when drawing.
+    """
+
+    def __init__(self):
+        self.week_start: Optional[_dt.date] = None  # None = needs rebuild()
+        self.start_ts = 0
+        self.end_ts = 0
+        self.by_task: dict[str, int] = {}
+
+    def current(self, today: _dt.date) -> bool:
+        return self.week_start == today - _dt.timedelta(days=today.weekday())
+
+    def invalidate(self):
+        self.week_start = None
+
+    def rebuild(self, recs: np.ndarray, ids: List[str], today: _dt.date):
+        """Scan live sessions.bin records once for the week containing today."""
+        monday = today - _dt.timedelta(days=today.weekday())
+        self.start_ts = int(datetime.combine(monday, _dt.time()).timestamp())
+        self.end_ts = int(datetime.combine(monday + _dt.timedelta(days=7), _dt.time()).timestamp())
+        task = recs["task"]
+        start = recs["start"]
+        overlap = (np.minimum(start + recs["seconds"], self.end_ts) - np.maximum(start, self.start_ts))
+        hit = (task >= 0) & (task < len(ids)) & (overlap > 0)
+        per_task = np.bincount(task[hit], weights=overlap[hit], minlength=len(ids))
+        self.by_task = {ids[i]: int(per_task[i]) for i in np.flatnonzero(per_task).tolist()}
+        self.week_start = monday
+
+    def _overlap(self, columns) -> int:
+        return sum(max(0, min(start + secs, self.end_ts) - max(start, self.start_ts))
+                   for start, secs, _tz in columns)
+
+    def add(self, task_id: str, columns):
+        """New sessions [(start_epoch, seconds, tz_minutes), ...] of one task."""
+        secs = self._overlap(columns)
+        if secs:
+            self.by_task[task_id] = self.by_task.get(task_id, 0) + secs
+
+    def recount(self, task: Task):
+        """The task's whole session list changed (reset, undo, import)."""
+        secs = self._overlap(task.sessions.columns())
+        if secs:
+            self.by_task[task.id] = secs
+        else:
+            self.by_task.pop(task.id, None)
+
+    def remove(self, task_id: str):
+        self.by_task.pop(task_id, None)
+
+    def running_overlap(self, running_start: str, now: float) -> int:
+        try:
+            start = datetime.fromisoformat(running_start).timestamp()
+        except ValueError:
+            return 0
+        return max(0, int(min(now, self.end_ts) - max(start, self.start_ts)))
+
+
+# ---------- Charts and reports (shared with report worker processes) ----------
+
+CHART_BG = "#1e1e1e"
+CHART_FG = "#f5f5f5"
+
+
+def style_dark_axes(fig: Figure, ax):
+    """The analytics dark theme; re-applied after every ax.clear()."""
+    fig.patch.set_facecolor(CHART_BG)
+    ax.set_facecolor(CHART_BG)
+    ax.tick_params(colors=CHART_FG)
+    for spine in ax.spines.values():
+        spine.set_color(CHART_FG)
+    ax.yaxis.label.set_color(CHART_FG)
+    ax.xaxis.label.set_color(CHART_FG)
+    ax.title.set_color(CHART_FG)
+
+
+def plot_top_tasks(ax, data: list, span_text: str = ""):
+    if not data:
+        ax.text(0.5, 0.5, "No data", ha="center", va="center")
+        return
+    labels = [t for t, _m in data]
+    minutes = [m for _t, m in data]
+    y_pos = range(len(labels))
+    ax.barh(y_pos, minutes)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(labels)
+    ax.invert_yaxis()
+    ax.set_title("Top tasks by time" + span_text)
+    ax.set_xlabel("Minutes")
+
+
+def plot_weekday(ax, data: list, span_text: str = ""):
+    labels = [lbl for lbl, _h in data]
+    hours = [h for _lbl, h in data]
+    x_pos = range(len(labels))
+    ax.bar(x_pos, hours)
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(labels)
+    ax.set_title("Time by weekday" + span_text)
+    ax.set_ylabel("Hours")
+
+
+def render_report_charts(section: dict, fmt: str = "png") -> Dict[str, bytes]:
+    """
+    Worker: draw one course's three charts with the Agg backend and return
+    {"cumulative"|"tasks"|"weekday": image bytes} in fmt ("png" or "svg").
+    """
+    images = {}
+    for name in ("cumulative", "tasks", "weekday"):
+        fig = Figure(figsize=(7, 3.6), dpi=110)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        style_dark_axes(fig, ax)
+        if name == "cumulative":
+            data = section["by_day"]
+            if not data:
+                ax.text(0.5, 0.5, "No data", ha="center", va="center")
+            else:
+                dates = [d for d, _h in data]
+                hours = [h for _d, h in data]
+                ax.fill_between(dates, hours, alpha=0.85, step="post")
+                fig.autofmt_xdate()
+                ax.set_title("Cumulative time by day")
+                ax.set_ylabel("Hours")
+        elif name == "tasks":
+            plot_top_tasks(ax, section["top"])
+        else:
+            plot_weekday(ax, section["weekday"])
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, facecolor=CHART_BG)
+        images[name] = buf.getvalue()
+    return images
+
+
+def report_html(title: str, sections: List[dict], images: List[Dict[str, bytes]]) -> str:
+    """A single offline HTML page: KPI table plus each course's PNG charts embedded inline."""
+    def embed(data: bytes) -> str:
+        return f'<img src="data:image/png;base64,{base64.b64encode(data).decode("ascii")}" alt="">'
+
+    rows = "".join(
+        f"<tr><td>{html.escape(s['course'])}</td><td>{s['period_hours']:.1f}</td>"
+        f"<td>{s['total_hours']:.1f}</td></tr>" for s in sections)
+    parts = [
+        "<!doctype html><html><head><meta charset='utf-8'>",
+        f"<title>{html.escape(title)}</title><style>",
+        f"body{{background:{CHART_BG};color:{CHART_FG};font-family:sans-serif;margin:2em}}",
+        "table{border-collapse:collapse}td,th{padding:4px 14px;border-bottom:1px solid #444;text-align:left}",
+        ".charts{display:flex;flex-wrap:wrap;gap:12px}.charts img{max-width:100%;height:auto}",
+        "</style></head><body>",
+        f"<h1>{html.escape(title)}</h1>",
+        f"<table><tr><th>Class</th><th>Hours this period</th><th>Hours all time</th></tr>{rows}</table>",
+    ]
+    for s, imgs in zip(sections, images):
+        parts.append(f"<h2>{html.escape(s['course'])}</h2><div class='charts'>")
+        parts.extend(embed(imgs[name]) for name in ("cumulative", "tasks", "weekday"))
+        parts.append("</div>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+# ---------- Study heatmap ----------
+
+WEEK_HOURS = 7 * 24
+
+
+def hour_of_week_seconds(local_start: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    """
+    Seconds studied per (weekday Mon..Sun, hour 0..23) as a 7x24 array,
+    with each session split across the hours it actually covers. Fully
+    vectorised: every session contributes its first partial hour, its last
+    partial hour, and its whole hours in between as a (cyclic) range on a
+    difference array, so a 10-hour session costs the same as a 10-minute one.
+    """
+    start = local_start.astype(np.int64)
+    secs = seconds.astype(np.int64)
+    end = start + secs
+    h0 = start // 3600
+    h1 = (end - 1) // 3600  # hour holding the last second
+    # hour index since the epoch -> slot in a Mon 00:00-based week (1970-01-01 was a Thursday)
+    slot0 = (h0 + 72) % WEEK_HOURS
+    slot1 = (h1 + 72) % WEEK_HOURS
+
+    one = h0 == h1
+    grid = np.zeros(WEEK_HOURS)
+    grid += np.bincount(slot0[one], weights=secs[one], minlength=WEEK_HOURS)
+    many = ~one
+    grid += np.bincount(slot0[many], weights=((h0 + 1) * 3600 - start)[many], minlength=WEEK_HOURS)
+    grid += np.bincount(slot1[many], weights=(end - h1 * 3600)[many], minlength=WEEK_HOURS)
+
+    full = (h1 - h0 - 1)[many]
+    grid += (full // WEEK_HOURS).sum() * 3600.0  # whole weeks cover every slot
+    rest = full % WEEK_HOURS
+    first = (slot0[many] + 1) % WEEK_HOURS
+    stop = first + rest
+    has = rest > 0
+    wraps = has & (stop > WEEK_HOURS)
+    # +3600 from first up to stop (exclusive); a range running past Sunday 23:00 continues at Monday 00:00
+    idx = np.concatenate([first[has], np.minimum(stop, WEEK_HOURS)[has], np.zeros(int(wraps.sum()), np.int64),
+                          (stop - WEEK_HOURS)[wraps]])
+    weight = np.concatenate([np.full(int(has.sum()), 3600.0), np.full(int(has.sum()), -3600.0),
+                             np.full(int(wraps.sum()), 3600.0), np.full(int(wraps.sum()), -3600.0)])
+    grid += np.cumsum(np.bincount(idx, weights=weight, minlength=WEEK_HOURS + 1))[:WEEK_HOURS]
+    return grid.reshape(7, 24)
+
+
+# ---------- Replica merge engine ----------
+
+def utc_clock() -> str:
+    """Last-modified clock for tasks and tombstones (UTC, millisecond resolution)."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _lww_key(rec: dict) -> tuple:
+    # newer clock wins; identical clocks fall back to content so the pick never depends on argument order
+    return (rec.get("modified") or "",
+            json.dumps({k: v for k, v in rec.items() if k not in ("sessions", "sessions_ref")},
+                       sort_keys=True, default=str))
+
+
+def merge_session_lists(a: list, b: list, reset_at: str = "") -> list:
+    """
+    Union of two session lists keyed by start time, in start order.
+    Lists are normally already sorted (sessions are appended as they end), so
+    this is one merge pass; sessions older than reset_at are dropped.
+    """
+    def start(s):
+        return s.get("start") or ""
+
+    def in_order(lst: list) -> tuple:
+        keys = [start(s) for s in lst]
+        if any(map(operator.gt, keys, keys[1:])):
+            lst = sorted(lst, key=start)
+            keys.sort()
+        return lst, keys
+
+    a, ka = in_order(a)
+    b, kb = in_order(b)
+    if a == b and all(map(operator.lt, ka, ka[1:])):
+        # the common case when syncing: both replicas hold the same sessions
+        return [s for s, k in zip(a, ka) if k >= reset_at] if reset_at else list(a)
+
+    out: list = []
+    last = None
+    i = j = 0
+    while i < len(a) or j < len(b):
+        if j >= len(b) or (i < len(a) and ka[i] < kb[j]):
+            s, k = a[i], ka[i]; i += 1
+        elif i >= len(a) or kb[j] < ka[i]:
+            s, k = b[j], kb[j]; j += 1
+        else:
+            # same session on both sides; keep the longer (then later-ending) copy
+            s = max(a[i], b[j], key=lambda x: (x.get("seconds", 0), x.get("end") or ""))
+            k = ka[i]
+            i += 1; j += 1
+        if k == last:
+            continue  # duplicate within one side
+        last = k
+        if not reset_at or k >= reset_at:
+            out.append(s)
+    return out
+
+
+def merge_task_records(x: dict, y: dict) -> dict:
+    """Fields are last-writer-wins on "modified"; sessions are a union."""
+    winner = max(x, y, key=_lww_key)
+    reset_at = max(x.get("reset_at") or "", y.get("reset_at") or "")
+    merged = dict(winner)
+    merged["sessions"] = merge_session_lists(x.get("sessions") or [], y.get("sessions") or [], reset_at)
+    merged["reset_at"] = reset_at or None
+    return merged
+
+
+def merge_stores(a: dict, b: dict) -> dict:
+    """
+    Deterministically merge two task stores (as read by read_task_store).
+    One pass over each replica: a is indexed, b is streamed against it.
+    Tasks keep a's order, with b-only tasks appended in b's order. A tombstone
+    deletes a task unless the task was modified after it.
+    """
+    deleted = dict(a.get("deleted") or {})
+    for tid, clock in (b.get("deleted") or {}).items():
+        if clock > deleted.get(tid, ""):
+            deleted[tid] = clock
+
+    records = {d["id"]: d for d in a["tasks"]}
+    for d in b["tasks"]:
+        mine = records.get(d["id"])
+        records[d["id"]] = d if mine is None else merge_task_records(mine, d)
+
+    tasks = []
+    for tid, rec in records.items():
+        tomb = deleted.get(tid)
+        if tomb and tomb >= (rec.get("modified") or ""):
+            continue
+        if tomb:
+            del deleted[tid]  # edited after the delete: it lives
+        tasks.append(rec)
+
+    # forget tombstones once every replica has long since seen them
+    horizon = (datetime.now(timezone.utc) - _dt.timedelta(days=TOMBSTONE_DAYS)).isoformat()
+    deleted = {tid: c for tid, c in deleted.items() if c >= horizon}
+    return {"version": max(a.get("version", 0), b.get("version", 0)) + 1,
+            "deleted": deleted, "tasks": tasks}
+
+
+def sync_folders(dir_a: str, dir_b: str) -> str:
+    """
+    Merge the tasks.json of two data folders (e.g. this app's folder and a USB
+    stick or Syncthing copy) and write the same result to both.
+    """
+    paths = sorted(os.path.join(d, "tasks.json") for d in (dir_a, dir_b))
+    if paths[0] == paths[1]:
+        return "Both folders are the same."
+    empty = {"version": 0, "deleted": {}, "generation": None, "tasks": []}
+    t0 = time.perf_counter()
+    # always lock in path order so two syncs can't deadlock
+    with file_lock(paths[0]), file_lock(paths[1]):
+        stores = [hydrate_task_store(p, read_task_store(p)) if os.path.exists(p) else empty for p in paths]
+        merged = merge_stores(stores[0], stores[1])
+        # written straight from the merged dicts: packing every session into
+        # a SessionLog only to unpack it again for the line would dominate
+        lines = session_record_lines(merged["tasks"])
+        for p in paths:
+            gen, refs = write_session_records(p, lines, merged["deleted"])
+            records = ({**{k: v for k, v in d.items() if k not in ("sessions", "sessions_ref")},
+                        **({"sessions_ref": refs[d["id"]]} if d["id"] in refs else {})}
+                       for d in merged["tasks"])
+            # each copy keeps its own on-disk compression
+            tmp = write_task_store(p, {"version": merged["version"], "deleted": merged["deleted"],
+                                       "sessions_generation": gen},
+                                   records, detect_compression(p) if os.path.exists(p) else None)
+            os.replace(tmp, p)
+    n_sessions = sum(len(t.get("sessions") or []) for t in merged["tasks"])
+    return (f"Synced {len(merged['tasks'])} task(s), {n_sessions} session(s) "
+            f"in {(time.perf_counter() - t0) * 1000:.0f} ms.")
+
 
 class ToDoApp(ctk.CTk):
     def __init__(self):
@@ -55,10 +2645,20 @@ class ToDoApp(ctk.CTk):
         self.safe_mode: bool = False
         self.hidden_courses: set[str] = set()
         self.show_archived = ctk.BooleanVar(value=False)  # UI toggle
+        self.undo_depth: int = 50          # undo steps kept
+        self.undo_budget_kb: int = 2048    # memory cap for undo/redo deltas
+        self.due_notifications: bool = False  # desktop notice when a task becomes due/overdue
+        self.due_window_days: int = 7  # horizon of the "Next N days" filter
+        self.weekly_goals: Dict[str, float] = {}  # course -> target hours per week
+        self.idle_minutes: int = 0  # away this long splits/stops running timers (0 = off)
+        self.idle_action: str = "split"  # "split" or "stop", see _apply_idle_gap
+        self.compression: str = "none"  # tasks.json on disk: "none", "gzip" or "lzma"
+        self.backup_keep: int = 10  # daily backups kept in backups/ (0 = none)
 
         # zoom links + settings (may update safe_mode / hidden_courses)
         self.class_zoom_urls: Dict[str, str] = self._load_zoom_links()
         self._load_settings()
+        self.history = UndoHistory(self.undo_depth, self.undo_budget_kb * 1024)
 
         # ---- fonts ----
         base_size = ctk.CTkFont().cget("size")  # keeps platform default
@@ -75,7 +2675,8 @@ class ToDoApp(ctk.CTk):
         self.tasks: List[Task] = []
         self.filter_mode = ctk.StringVar(value="Active")
         self.editing_task_id: Optional[str] = None
-        self.sort_asc = True  # <-- added toggle flag
+        self.sort_asc = True  # direction the next "Sort by Due" click applies
+        self.sort_mode: Optional[str] = None  # None (saved order), "asc" or "desc" by due date
         self.class_var = ctk.StringVar()
         self.group_by_class = ctk.BooleanVar(value=False)
         self.url_var = ctk.StringVar()
@@ -83,12 +2684,64 @@ class ToDoApp(ctk.CTk):
         # quick filter
         self.course_filter: Optional[str] = None
 
+        # multi-select (shift/ctrl-click on cards)
+        self.selected_ids: set[str] = set()
+        self._select_anchor: Optional[str] = None
+
+        # open transaction, if any (see _transaction)
+        self._tx: Optional[TaskTransaction] = None
+
+        # shared-store bookkeeping: what we last read/wrote, and our unsaved edits
+        self._store_version = 0
+        self._store_sig: Optional[tuple[int, int]] = None
+        self._tombstones: Dict[str, str] = {}  # deleted task_id -> clock, for merges
+        self._session_bin = SessionBinLog(os.path.join(os.path.dirname(SAVE_FILE), "sessions.bin"))
+        # bumped when tasks change other than through a mirrored transaction;
+        # sessions.bin is only re-checked against self.tasks when it moved
+        self._tasks_generation = 0
+        self._session_bin_synced: Optional[tuple] = None  # (generation, bin token) of the last sync
+        self._analytics_pool: Optional[ProcessPoolExecutor] = None  # see _process_pool()
+        # user ("chart" or "report") -> (data key, SessionWindow), so a report doesn't evict the dialog's
+        self._session_windows: Dict[str, tuple] = {}
+        self._heatmap_cache: Optional[tuple] = None  # ((data key, span), 7x24 hours)
+        self._course_series_cache: Optional[tuple] = None  # ((data key, span), stacked cumulative series)
+        self._week_totals = WeekTotals()  # this week's seconds per task, for goal progress
+        self._running_ids: set[str] = set()  # tasks whose timer runs, so nothing scans self.tasks for them
+        self._kpi_logged: tuple = ({}, {})  # _kpi_inputs' (course, week) totals, reused by the _draw_kpi right after
+        self._heartbeats = TimerHeartbeat(os.path.join(os.path.dirname(SAVE_FILE), "timers.heartbeat"))
+        self._heartbeat_job = None  # after() id while timers run
+        self._backup_running = False
+        self._backup_outcome: Optional[tuple] = None  # (archive path, error), set by _backup_finished
+        self._idle = IdleDetector(self, default_idle_backend())
+        self._task_stream = None  # rest of tasks.json while it is still being read in
+        self._stream_generation: Optional[str] = None
+        self._load_refresh_pending = False
+
+        # lookups: id -> task, and tasks ordered by due date
+        self._tasks_by_id: dict[str, Task] = {}
+        self._due_index = DueIndex()
+
+        # due-date highlighting: "today" is cached and advanced by the scheduler
+        self._today = _dt.date.today()
+        self._due_badge_by_id: dict[str, ctk.CTkLabel] = {}
+        self._due_scheduler = DueScheduler(self)
+        # every card/KPI/chart refresh goes through here; bursts become one render per frame
+        self._redraw = RedrawScheduler(self)
+        self._redraw.add("list", self._draw_list)
+        self._redraw.add("kpi", self._draw_kpi, self._kpi_inputs)
+        self._redraw.add("analytics", self._draw_analytics_chart, self._analytics_inputs, delay_ms=120)
+
         # tooltip state
         self._tooltip_window = None
 
         self._build_ui()
         self._load_tasks()
+        self._due_scheduler.rebuild(self.tasks)
         self._refresh_list()
+        self._start_file_watcher()
+        self.after(GOAL_TICK_MS, self._goal_tick)
+        self.after(300, self._recover_timers)
+        self.after(5000, self._backup_tick)
 
 
         # ---------- UI ----------
@@ -168,16 +2821,39 @@ class ToDoApp(ctk.CTk):
         # Filter menu
         ctk.CTkOptionMenu(controls,
                           variable=self.filter_mode,
-                          values=["All", "Active", "Completed"],
+                          values=self._filter_modes(),
                           command=lambda _: self._refresh_list()) \
             .pack(side="right", padx=(0, 8))
         ctk.CTkLabel(controls, text="Filter: ").pack(side="right", padx=(0,4))
 
+        # --- Batch actions (shown while cards are multi-selected) ---
+        self.batch_bar = ctk.CTkFrame(mid, fg_color="transparent")
+        self.batch_label = ctk.CTkLabel(self.batch_bar, text="")
+        self.batch_label.pack(side="left", padx=(8, 8))
+
+        for text, cmd in (("Done", lambda: self._batch_set_done(True)),
+                          ("Undone", lambda: self._batch_set_done(False)),
+                          ("Start", self._batch_start_timers),
+                          ("Class…", self._batch_set_course),
+                          ("Due…", self._batch_set_due)):
+            ctk.CTkButton(self.batch_bar, text=text, width=72, command=cmd) \
+                .pack(side="left", padx=(0, 6))
+
+        ctk.CTkButton(self.batch_bar, text="🗑", width=36,
+                      fg_color="#cf6523", hover_color="#bf1704", text_color="white",
+                      command=self._batch_delete).pack(side="left", padx=(0, 6))
+        ctk.CTkButton(self.batch_bar, text="Clear selection", width=110,
+                      fg_color="#2e2929", hover_color="#3d3838",
+                      command=self._clear_selection).pack(side="right", padx=(0, 8))
+
         # --- List (card-style) ---
         self.cards = ctk.CTkScrollableFrame(mid, corner_radius=12)
         self.cards.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
         self._card_rows = []
+        self._card_by_id: dict[str, ctk.CTkFrame] = {}
+        self._card_group: dict[str, str] = {}   # task_id -> group header it sits under
+        self._card_order: list[str] = []        # task ids in display order
 
         # --- Status bar at bottom with settings gear ---
         self.status = getattr(self, "status", ctk.StringVar(value="Ready"))
@@ -201,6 +2877,26 @@ class ToDoApp(ctk.CTk):
         )
         self.settings_btn.pack(side="right")
 
+        # Undo / redo
+        self.redo_btn = ctk.CTkButton(status_bar, text="↷", width=32, height=32,
+                                      font=icon_font, command=self._redo)
+        self.redo_btn.pack(side="right", padx=(0, 6))
+        self.undo_btn = ctk.CTkButton(status_bar, text="↶", width=32, height=32,
+                                      font=icon_font, command=self._undo)
+        self.undo_btn.pack(side="right", padx=(0, 6))
+        for btn, tip in ((self.undo_btn, "Undo (Ctrl+Z)"), (self.redo_btn, "Redo (Ctrl+Y)")):
+            btn.bind("<Enter>", lambda e, b=btn, t=tip: self._show_tooltip(b, t))
+            btn.bind("<Leave>", lambda e: self._hide_tooltip())
+
+        self.bind("<Control-z>", self._undo)
+        self.bind("<Control-y>", self._redo)
+        self.bind("<Control-Z>", self._redo)  # Ctrl+Shift+Z
+        # any input in our windows means "not idle" (see IdleDetector); not
+        # <Motion>, which would run Python per pointer event, and the OS idle
+        # backends count pointer movement anyway
+        for seq in ("<KeyPress>", "<ButtonPress>", "<MouseWheel>"):
+            self.bind_all(seq, self._idle.note_input, add="+")
+
         self.settings_btn.bind(
             "<Enter>",
             lambda e: self._show_tooltip(self.settings_btn, "Open app settings")
@@ -213,27 +2909,405 @@ class ToDoApp(ctk.CTk):
 
     # ---------- Persistence ----------
     def _load_tasks(self):
+        """
+        Start streaming tasks.json: parse just enough for the first screen of
+        active tasks here, and leave the rest to _load_more_tasks once the
+        window is up.
+        """
+        self.tasks = []
+        self._reindex_tasks()
+        upgraded = None
         if os.path.exists(SAVE_FILE):
             try:
-                with open(SAVE_FILE, "r", encoding="utf-8") as f:
-                    raw = json.load(f)
-                self.tasks = [Task(**t) for t in raw]
-                self._set_status(f"Loaded {len(self.tasks)} task(s).")
+                upgraded = migrate_task_store(SAVE_FILE)
+            except (OSError, ValueError):
+                pass  # records are upgraded as they load; the next save writes the new schema
+            try:
+                sig = file_signature(SAVE_FILE)
+                stream = iter_task_store(SAVE_FILE)
+                store = next(stream)
+                if store["schema"] > TASKS_SCHEMA:
+                    self._set_status(f"{SAVE_FILE} is from a newer DYFH; fields this version "
+                                     f"doesn't know are kept as they are.")
+                self._tombstones = store["deleted"]
+                self._store_version, self._store_sig = store["version"], sig
+                self._task_stream, self._stream_generation = stream, store["generation"]
             except Exception as e:
+                self._keep_damaged_store()
                 messagebox.showwarning("Load error", f"Could not read {SAVE_FILE}.\n{e}")
-                self.tasks = []
+            while self._task_stream is not None \
+                    and sum(1 for t in self.tasks if not t.done) < FIRST_SCREEN_TASKS:
+                self._load_task_batch(FIRST_SCREEN_TASKS)
+        if self._task_stream is not None:
+            self._set_status(f"Loading tasks… {len(self.tasks)}")
+            self.after(1, self._load_more_tasks)
+        if upgraded:
+            self._set_status(f"Upgraded {SAVE_FILE} to the current format; the old copy is {upgraded}.")
+        self._update_course_values()
 
+    def _load_task_batch(self, limit: int) -> list:
+        """Parse up to limit more tasks into self.tasks and the indexes; returns them."""
+        batch: List[Task] = []
+        try:
+            for d in self._task_stream:
+                # sessions stay in sessions.jsonl; only counts and totals are read here
+                batch.append(task_from_record(d, SAVE_FILE, self._stream_generation))
+                if len(batch) >= limit:
+                    break
+            else:
+                self._task_stream = None
+        except Exception as e:
+            self._task_stream = None
+            self._keep_damaged_store()
+            loaded = len(self.tasks) + len(batch)
+            messagebox.showwarning("Load error", f"Could not read all of {SAVE_FILE}; kept the first "
+                                   f"{loaded} task(s).\n{e}\n\nThe original file was copied to "
+                                   f"{SAVE_FILE}.damaged.")
+        for t in batch:
+            self.tasks.append(t)
+            self._tasks_by_id[t.id] = t
+            self._due_index.update(t)
+            if t.running_start:
+                self._running_ids.add(t.id)
+        if batch:
+            self._tasks_generation += 1
+        return batch
+
+    def _load_more_tasks(self):
+        """Feed the rest of tasks.json to the window a batch per event-loop turn."""
+        if self._task_stream is None:
+            return
+        batch = self._load_task_batch(LOAD_BATCH_TASKS)
+        for t in batch:
+            self._due_scheduler.schedule(t, arm=False)
+        if batch:
+            self._due_scheduler.arm()
+        self._append_loaded_cards(batch)
+        if self._task_stream is not None:
+            self._set_status(f"Loading tasks… {len(self.tasks)}")
+            self.after(1, self._load_more_tasks)
         else:
-            self.tasks = []
+            self._loaded_all_tasks()
+
+    def _finish_loading(self):
+        """Parse whatever is left of tasks.json right now (before saving, searching, exporting…)."""
+        if self._task_stream is None:
+            return
+        while self._task_stream is not None:
+            for t in self._load_task_batch(LOAD_BATCH_TASKS):
+                self._due_scheduler.schedule(t, arm=False)
+        self._due_scheduler.arm()
+        self._load_refresh_pending = True
+        self._loaded_all_tasks()
+
+    def _append_loaded_cards(self, batch: List[Task]):
+        # in saved order and ungrouped, later tasks simply go below the ones shown;
+        # any other view is rebuilt once at the end
+        if self.group_by_class.get() or self.sort_mode or self._due_range(self.filter_mode.get()):
+            self._load_refresh_pending = True
+            return
+        mode = self.filter_mode.get()
+        if mode == "Active":
+            batch = [t for t in batch if not t.done]
+        elif mode == "Completed":
+            batch = [t for t in batch if t.done]
+        for t in self._narrow_view(batch):
+            self._add_card(t)
 
+    def _loaded_all_tasks(self):
+        self._week_totals.invalidate()
         self._update_course_values()
+        if self._load_refresh_pending:
+            self._load_refresh_pending = False
+            self._refresh_list()
+        else:
+            self._update_kpi()
+            self._set_status(f"Loaded {len(self.tasks)} task(s).")
+
+    def _keep_damaged_store(self):
+        """Copy an unreadable tasks.json aside before the next save replaces it."""
+        try:
+            shutil.copy2(SAVE_FILE, SAVE_FILE + ".damaged")
+        except OSError:
+            pass
+
+    def _reindex_tasks(self):
+        """Rebuild lookups after self.tasks was replaced wholesale (load, import)."""
+        self._tasks_by_id = {t.id: t for t in self.tasks}
+        self._running_ids = {t.id for t in self.tasks if t.running_start}
+        self._due_index.rebuild(self.tasks)
+        self._week_totals.invalidate()
+        self._tasks_generation += 1
 
     def _save_tasks(self):
+        """
+        Write tasks.json without clobbering another running instance.
+        Under the lock we compare the on-disk signature/version with what we
+        last saw; if someone else saved in between, their copy is merged into
+        ours first (see merge_stores). Changed session lists are then appended
+        to sessions.jsonl, and tasks.json (metadata only, so cheap to encode)
+        is written to a temp file and renamed over the old one.
+        """
+        self._finish_loading()  # never save a half-read task list
+        tmp = None
         try:
-            with open(SAVE_FILE, "w", encoding="utf-8") as f:
-                json.dump([asdict(t) for t in self.tasks], f, indent=2)
+            merged = False
+            with file_lock(SAVE_FILE):
+                sig = file_signature(SAVE_FILE)
+                if sig is not None and sig != self._store_sig:
+                    disk = read_task_store(SAVE_FILE)
+                    if disk["version"] != self._store_version:
+                        self._merge_store(disk)
+                        merged = True
+                gen = write_session_log(SAVE_FILE, self.tasks, self._tombstones)
+                tmp = write_task_store(SAVE_FILE, {"version": self._store_version + 1,
+                                                   "deleted": self._tombstones,
+                                                   "sessions_generation": gen},
+                                       (task_record(t) for t in self.tasks),
+                                       self.compression if self.compression != "none" else None)
+                os.replace(tmp, SAVE_FILE)
+                tmp = None
+                self._store_version += 1
+                self._store_sig = file_signature(SAVE_FILE)
+            if merged:
+                # another instance's edits are now in self.tasks; older undo
+                # steps were recorded against tasks that no longer exist
+                self.history.clear()
+                self._reindex_tasks()
+                self.after_idle(self._on_store_merged)
         except Exception as e:
             messagebox.showerror("Save error", f"Could not save to {SAVE_FILE}.\n{e}")
+        finally:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _merge_store(self, disk: dict):
+        """Fold a store saved by another instance into self.tasks (called under the lock)."""
+        hydrate_task_store(SAVE_FILE, disk)
+        SessionLog.load_many(t.sessions for t in self.tasks)
+        ours = {"version": self._store_version, "deleted": self._tombstones,
+                "tasks": [task_to_dict(t) for t in self.tasks]}
+        store = merge_stores(ours, disk)
+        on_disk = {d["id"]: d for d in disk["tasks"]}
+        self.tasks = []
+        for rec in store["tasks"]:
+            d = on_disk.get(rec["id"])
+            if d is not None and "sessions_ref" in d and rec["sessions"] == d["sessions"]:
+                # unchanged from the file: leave the sessions where they are
+                rec = {k: v for k, v in rec.items() if k != "sessions"}
+                rec["sessions_ref"] = d["sessions_ref"]
+            self.tasks.append(task_from_record(rec, SAVE_FILE, disk["generation"]))
+        self._tombstones = store["deleted"]
+        self._store_version = store["version"] - 1
+
+    def _on_store_merged(self):
+        self._due_scheduler.rebuild(self.tasks)
+        self._week_totals.invalidate()
+        self._update_course_values()
+        self._refresh_list()
+        self._set_status("Merged changes saved by another DYFH window.")
+
+    @contextmanager
+    def _transaction(self, label: str = "", kind: str = "do"):
+        """
+        Group task mutations into one unit: a single _save_tasks and a single
+        incremental card/KPI update when the block exits. Nested calls join
+        the outer transaction. kind is "do" for user edits, or "undo"/"redo"
+        when replaying history (decides which stack receives the inverse).
+        If the block raises, its edits are rolled back unsaved and the error
+        propagates.
+        """
+        if self._tx is not None:
+            yield self._tx
+            return
+        self._finish_loading()
+        tx = TaskTransaction(self, label)
+        self._tx = tx
+        try:
+            yield tx
+        except BaseException:
+            self._tx = None
+            self._rollback(tx)
+            raise
+        self._tx = None
+        self._commit(tx, kind)
+
+    def _track_running(self, ids):
+        """Bring _running_ids in step with running_start of these tasks (gone ones drop out)."""
+        for tid in ids:
+            t = self._tasks_by_id.get(tid)
+            if t is not None and t.running_start:
+                self._running_ids.add(tid)
+            else:
+                self._running_ids.discard(tid)
+
+    def _rollback(self, tx: TaskTransaction):
+        """Revert an aborted transaction in memory from its inverse delta; nothing was saved or drawn."""
+        u = tx.undo
+        if u.added_tasks:
+            added = set(u.added_tasks)
+            self.tasks = [t for t in self.tasks if t.id not in added]
+            for tid in added:
+                self._tasks_by_id.pop(tid, None)
+        for tid, old in u.old_fields.items():
+            t = self._tasks_by_id.get(tid)
+            if t is not None:
+                for name, value in old.items():
+                    setattr(t, name, value)
+        for tid, sessions in u.replaced_sessions.items():
+            t = self._tasks_by_id.get(tid)
+            if t is not None:
+                t.sessions = sessions
+        for tid, n in u.added_sessions.items():
+            t = self._tasks_by_id.get(tid)
+            if t is not None and n:
+                del t.sessions[-n:]
+        for tid, popped in u.popped_sessions.items():
+            t = self._tasks_by_id.get(tid)
+            if t is not None:
+                for s in popped:
+                    t.sessions.append(s)
+
+    def _commit(self, tx: TaskTransaction, kind: str = "do"):
+        if not tx.changed:
+            return
+        if kind == "undo":
+            self.history.push_redo(tx.undo)
+        else:
+            self.history.push_undo(tx.undo, clear_redo=(kind == "do"))
+        clock = utc_clock()
+        for tid in (tx.touched | tx.added) - tx.removed.keys():
+            self._tasks_by_id[tid].modified = clock
+            self._tombstones.pop(tid, None)
+        for tid in tx.removed:
+            self._tombstones[tid] = clock
+        if tx.removed:
+            gone = tx.removed.keys()
+            self.tasks = [t for t in self.tasks if t.id not in gone]
+            for tid in gone:
+                self._tasks_by_id.pop(tid, None)
+                self._due_index.remove(tid)
+            self.selected_ids.difference_update(gone)
+            if self.editing_task_id in gone:
+                self.editing_task_id = None
+                self.add_btn.configure(text="Add")
+                self.entry.delete(0, "end")
+                self.due_var.set("")
+        self._save_tasks()
+        self._mirror_sessions(tx)
+        self._track_week(tx)
+        self._track_running(tx.touched | tx.added | set(tx.removed))
+        if any("running_start" in f for f in tx.undo.old_fields.values()):
+            self._sync_heartbeat()
+            self._idle.arm()
+        for tid in tx.removed:
+            self._due_scheduler.unschedule(tid)
+        resched = {tid for tid, f in tx.undo.old_fields.items() if "due" in f or "done" in f}
+        for tid in (resched | tx.added) - tx.removed.keys():
+            t = self._task_by_id(tid)
+            if t is not None:
+                self._due_index.update(t)
+                self._due_scheduler.schedule(t, arm=False)
+        if resched or tx.added:
+            self._due_scheduler.arm()
+        self._update_cards(tx.touched | tx.added | set(tx.removed),
+                           due_changed=any("due" in f for f in tx.undo.old_fields.values()))
+        if tx.kpi_dirty:
+            self._update_kpi()
+        if tx.courses_dirty:
+            self._update_course_values()
+        self._update_batch_bar()
+
+    def _mirror_sessions(self, tx: TaskTransaction):
+        """Copy this transaction's session changes into sessions.bin (a check-in is one record)."""
+        if not self._session_bin.exists:
+            return  # nothing to keep current until analytics first builds it
+        u = tx.undo
+        rewritten = (set(u.replaced_sessions) | set(u.popped_sessions)) - tx.removed.keys()
+        added = {}
+        for tid, n in u.added_sessions.items():
+            t = self._task_by_id(tid)
+            if t is not None and tid not in rewritten and tid not in tx.added:
+                added[tid] = t.sessions.columns(len(t.sessions) - n)
+        for tid in tx.added - tx.removed.keys():
+            t = self._task_by_id(tid)
+            if t is not None and len(t.sessions):
+                added[tid] = t.sessions.columns()
+        replaced = [t for t in map(self._task_by_id, rewritten) if t is not None]
+        if added or replaced or tx.removed:
+            try:
+                self._session_bin.update(added, replaced, list(tx.removed))
+            except OSError:
+                self._tasks_generation += 1  # only a cache; the next analytics sync repairs it
+
+    def _track_week(self, tx: TaskTransaction):
+        """Same bookkeeping as _mirror_sessions, for this week's goal totals."""
+        week = self._week_totals
+        if week.week_start is None:
+            return  # rebuilt on the next KPI draw that needs it
+        u = tx.undo
+        for tid in tx.removed:
+            week.remove(tid)
+        rewritten = (set(u.replaced_sessions) | set(u.popped_sessions)) - tx.removed.keys()
+        for tid in rewritten | (tx.added - tx.removed.keys()):
+            t = self._task_by_id(tid)
+            if t is not None:
+                week.recount(t)
+        for tid, n in u.added_sessions.items():
+            t = self._task_by_id(tid)
+            if t is not None and tid not in rewritten and tid not in tx.added:
+                week.add(tid, t.sessions.columns(len(t.sessions) - n))
+
+    def _undo(self, event=None):
+        return self._replay(self.history.undo, "undo", event)
+
+    def _redo(self, event=None):
+        return self._replay(self.history.redo, "redo", event)
+
+    def _replay(self, stack: "deque[UndoEntry]", kind: str, event=None):
+        # leave Ctrl+Z alone while typing in an entry
+        if event is not None and _event_in_entry(self):
+            return None
+        entry = self.history.pop(stack)
+        if entry is None:
+            self._set_status(f"Nothing to {kind}.")
+            return "break"
+        self._apply_undo_entry(entry, kind)
+        self._set_status(f"{'Undid' if kind == 'undo' else 'Redid'}: {entry.label or 'change'}")
+        return "break"
+
+    def _apply_undo_entry(self, entry: UndoEntry, kind: str):
+        """
+        Put back what entry describes. The replay runs as a transaction of its
+        own, so its inverse lands on the opposite stack.
+        """
+        ids = set(entry.old_fields) | set(entry.added_tasks) | set(entry.added_sessions) \
+            | set(entry.popped_sessions) | set(entry.replaced_sessions)
+        by_id = {tid: self._tasks_by_id[tid] for tid in ids if tid in self._tasks_by_id}
+
+        with self._transaction(entry.label, kind=kind) as tx:
+            # removed tasks go back first, at their old positions
+            for tid, (idx, task) in sorted(entry.removed_tasks.items(), key=lambda kv: kv[1][0]):
+                tx.insert_task(task, idx)
+                by_id[tid] = task
+            for tid, old in entry.old_fields.items():
+                t = by_id.get(tid)
+                if t is not None:
+                    for name, value in old.items():
+                        tx.set(t, name, value)
+            for tid, old in entry.replaced_sessions.items():
+                if tid in by_id:
+                    tx.replace_sessions(by_id[tid], old)
+            for tid, n in entry.added_sessions.items():
+                if tid in by_id:
+                    tx.pop_sessions(by_id[tid], n)
+            for tid, popped in entry.popped_sessions.items():
+                if tid in by_id:
+                    for sess in popped:
+                        tx.add_session(by_id[tid], sess)
+            for tid in entry.added_tasks:
+                if tid in by_id:
+                    tx.remove_task(by_id[tid])
 
     def _update_course_values(self):
         """Scan tasks for distinct non-empty course tags and load them into the combobox."""
@@ -261,9 +3335,15 @@ class ToDoApp(ctk.CTk):
         try:
             with open(ZOOM_LINKS_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
-            # ensure it's a simple str→str dict
             if isinstance(data, dict):
-                return {str(k): str(v) for k, v in data.items()}
+                schema = stored_schema(data)
+                data = upgrade_record(data, schema, ZOOM_MIGRATIONS)
+                # ensure it's a simple str→str dict
+                links = {str(k): str(v) for k, v in (data.get("links") or {}).items()}
+                if schema < ZOOM_SCHEMA:
+                    backup_before_upgrade(ZOOM_LINKS_FILE, schema)
+                    write_json_atomic(ZOOM_LINKS_FILE, {"schema": ZOOM_SCHEMA, "links": links})
+                return links
         except Exception as e:
             messagebox.showwarning("Zoom links",
                                    f"Could not read {ZOOM_LINKS_FILE}.\n{e}")
@@ -272,8 +3352,8 @@ class ToDoApp(ctk.CTk):
     def _save_zoom_links(self):
         """Save per-class Zoom URLs to zoom_links.json."""
         try:
-            with open(ZOOM_LINKS_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.class_zoom_urls, f, indent=2)
+            write_json_atomic(ZOOM_LINKS_FILE, {"schema": ZOOM_SCHEMA, "links": self.class_zoom_urls})
+            self._zoom_sig = file_signature(ZOOM_LINKS_FILE)
         except Exception as e:
             messagebox.showerror("Zoom links",
                                  f"Could not save to {ZOOM_LINKS_FILE}.\n{e}")
@@ -286,33 +3366,413 @@ class ToDoApp(ctk.CTk):
         try:
             with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
                 data = json.load(f)
+            schema = stored_schema(data)
+            data = upgrade_record(data, schema, SETTINGS_MIGRATIONS)
             hidden = data.get("hidden_courses", [])
             self.safe_mode = data.get("safe_mode", False)
             if isinstance(hidden, list):
                 self.hidden_courses = {str(c) for c in hidden}
+            self.due_notifications = bool(data.get("due_notifications", False))
+            self.due_window_days = max(1, int(data.get("due_window_days", self.due_window_days)))
+            self.undo_depth = max(1, int(data.get("undo_depth", self.undo_depth)))
+            self.undo_budget_kb = max(1, int(data.get("undo_budget_kb", self.undo_budget_kb)))
+            self.idle_minutes = max(0, int(data.get("idle_minutes", self.idle_minutes)))
+            if data.get("idle_action") in IDLE_ACTIONS.values():
+                self.idle_action = data["idle_action"]
+            if data.get("compression") in COMPRESSION_CHOICES:
+                self.compression = data["compression"]
+            self.backup_keep = max(0, int(data.get("backup_keep", self.backup_keep)))
+            goals = data.get("weekly_goals", {})
+            if isinstance(goals, dict):
+                self.weekly_goals = {}
+                for c, h in goals.items():
+                    try:
+                        hours = float(h)
+                    except (TypeError, ValueError):
+                        continue  # a hand-edited goal that isn't a number; keep the others
+                    if 0 < hours < float("inf"):
+                        self.weekly_goals[str(c)] = hours
+            if schema < SETTINGS_SCHEMA:
+                backup_before_upgrade(SETTINGS_FILE, schema)
+                self._save_settings()
         except Exception as e:
             messagebox.showwarning("Settings",
                                    f"Could not read {SETTINGS_FILE}.\n{e}")
 
-    def _save_settings(self):
-        data = {
-            "hidden_courses": sorted(self.hidden_courses),
-            "safe_mode": self.safe_mode,
-        }
+    def _save_settings(self):
+        data = {
+            "schema": SETTINGS_SCHEMA,
+            "hidden_courses": sorted(self.hidden_courses),
+            "safe_mode": self.safe_mode,
+            "due_notifications": self.due_notifications,
+            "due_window_days": self.due_window_days,
+            "undo_depth": self.undo_depth,
+            "undo_budget_kb": self.undo_budget_kb,
+            "weekly_goals": self.weekly_goals,
+            "idle_minutes": self.idle_minutes,
+            "idle_action": self.idle_action,
+            "compression": self.compression,
+            "backup_keep": self.backup_keep,
+        }
+        try:
+            write_json_atomic(SETTINGS_FILE, data)
+            self._settings_sig = file_signature(SETTINGS_FILE)
+        except Exception as e:
+            messagebox.showerror("Settings",
+                                 f"Could not save to {SETTINGS_FILE}.\n{e}")
+
+    # ---------- Import / export ----------
+
+    def _with_sessions(self, tasks, batch: int = 256):
+        """
+        Yield tasks with their sessions in memory, reading sessions.jsonl a
+        batch at a time; sessions read only for this pass are dropped again.
+        """
+        tasks = list(tasks)
+        for i in range(0, len(tasks), batch):
+            chunk = tasks[i:i + batch]
+            lazy = [t.sessions for t in chunk if not t.sessions.loaded]
+            SessionLog.load_many(lazy)
+            yield from chunk
+            for log in lazy:
+                log.unload()
+
+    def _iter_session_rows(self):
+        """Yield one sessions-CSV row per logged session, task by task."""
+        for t in self._with_sessions(self.tasks):
+            for s in t.sessions:
+                yield [t.id, t.text, t.course or "", s.get("start", ""),
+                       s.get("end", ""), s.get("seconds", 0)]
+
+    def _export_tasks_csv(self, path: str) -> int:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(TASK_CSV_FIELDS)
+            n = 0
+            for t in self.tasks:
+                w.writerow([t.id, t.text, int(t.done), t.due or "", t.created,
+                            t.course or "", t.url or ""])
+                n += 1
+        return n
+
+    def _export_sessions_csv(self, path: str) -> int:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(SESSION_CSV_FIELDS)
+            n = 0
+            for row in self._iter_session_rows():
+                w.writerow(row)
+                n += 1
+        return n
+
+    def _export_jsonl(self, path: str) -> int:
+        """One task per line, sessions included."""
+        with open(path, "w", encoding="utf-8") as f:
+            n = 0
+            for t in self._with_sessions(self.tasks):
+                f.write(json.dumps(task_to_dict(t), ensure_ascii=False))
+                f.write("\n")
+                n += 1
+        return n
+
+    def _export_ics(self, path: str) -> int:
+        """Write every task with a due date as an all-day VEVENT."""
+        def esc(v: str) -> str:
+            return (v.replace("\\", "\\\\").replace(";", "\\;")
+                     .replace(",", "\\,").replace("\n", "\\n"))
+
+        def fold(line: str) -> str:
+            # RFC 5545: lines longer than 75 octets continue with a leading space
+            raw = line.encode("utf-8")
+            if len(raw) <= 75:
+                return line + "\r\n"
+            parts, cur = [], b""
+            for ch in line:
+                b = ch.encode("utf-8")
+                if len(cur) + len(b) > (75 if not parts else 74):
+                    parts.append(cur.decode("utf-8"))
+                    cur = b""
+                cur += b
+            parts.append(cur.decode("utf-8"))
+            return "\r\n ".join(parts) + "\r\n"
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//DYFH//Do Your Homework//EN\r\n")
+            n = 0
+            for t in self.tasks:
+                due = self._validate_due(t.due or "", warn=False)
+                if not due or due == "INVALID":
+                    continue
+                d = _dt.date.fromisoformat(due)
+                f.write("BEGIN:VEVENT\r\n")
+                f.write(fold(f"UID:{t.id}@dyfh"))
+                f.write(f"DTSTAMP:{stamp}\r\n")
+                f.write(f"DTSTART;VALUE=DATE:{d.strftime('%Y%m%d')}\r\n")
+                f.write(f"DTEND;VALUE=DATE:{(d + _dt.timedelta(days=1)).strftime('%Y%m%d')}\r\n")
+                f.write(fold(f"SUMMARY:{esc(t.text or '(no title)')}"))
+                if t.course:
+                    f.write(fold(f"CATEGORIES:{esc(t.course)}"))
+                if t.url:
+                    f.write(fold(f"URL:{t.url}"))
+                if t.done:
+                    f.write("STATUS:COMPLETED\r\n")
+                f.write("END:VEVENT\r\n")
+                n += 1
+            f.write("END:VCALENDAR\r\n")
+        return n
+
+    def _export_data(self, kind: str):
+        ext = EXPORT_KINDS.get(kind, ".csv")
+        filetypes = [(kind, f"*{ext}"), ("All files", "*.*")]
+        if kind in REPORT_KINDS:
+            # saving as .png/.svg writes the charts as separate image files instead
+            filetypes[1:1] = [("Chart images (PNG)", "*.png"), ("Chart images (SVG)", "*.svg")]
+        path = filedialog.asksaveasfilename(
+            title=f"Export {kind}",
+            defaultextension=ext,
+            filetypes=filetypes
+        )
+        if not path:
+            return
+        self._finish_loading()
+        if kind in REPORT_KINDS:
+            self._start_report(kind, path)
+            return
+        writers = {
+            "Tasks (CSV)": self._export_tasks_csv,
+            "Sessions (CSV)": self._export_sessions_csv,
+            "Tasks + sessions (JSON Lines)": self._export_jsonl,
+            "Due dates (iCalendar)": self._export_ics,
+        }
+        t0 = time.perf_counter()
+        try:
+            n = writers[kind](path)
+        except Exception as e:
+            messagebox.showerror("Export", f"Could not write {path}.\n{e}")
+            return
+        self._set_status(f"Exported {n} row(s) to {os.path.basename(path)} — "
+                         f"{self._fmt_rate(n, time.perf_counter() - t0)}")
+
+    # ----- Reports (charts rendered in worker processes) -----
+    def _start_report(self, kind: str, path: str):
+        """
+        Build a weekly/semester report for every visible class. Each class is
+        aggregated here one after() step at a time (the UI keeps running),
+        and its charts are rendered in the process pool in parallel.
+        """
+        span = period_bounds(REPORT_KINDS[kind], _dt.date.today())
+        courses = self._sort_course_keys(list({(t.course or "Unassigned").strip() or "Unassigned"
+                                               for t in self.tasks} - self.hidden_courses))
+        fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        job = {
+            "title": f"{kind.split(' (')[0]} — {span[0]:%b %d} – {span[1]:%b %d, %Y}",
+            "span": span, "path": path, "fmt": fmt if fmt in ("png", "svg") else "png",
+            "html": fmt not in ("png", "svg"), "pending": courses, "sections": [], "futures": [],
+            "started": time.perf_counter(),
+        }
+        self._set_status(f"Building {kind.lower()} for {len(courses)} class(es)…")
+        self.after(1, lambda: self._report_step(job))
+
+    def _report_section(self, course: str, span: tuple[_dt.date, _dt.date]) -> dict:
+        """Plain data for one class's report charts (picklable for the worker)."""
+        courses = {course}
+        by_day = self._analytics_time_by_day(courses, span=span, user="report")
+        return {
+            "course": course,
+            "period_hours": by_day[-1][1] if by_day else 0.0,
+            "total_hours": self._course_totals(include_archived=True).get(course, 0) / 3600.0,
+            "by_day": by_day,
+            "top": self._analytics_top_tasks(courses, span=span, user="report"),
+            "weekday": self._analytics_time_by_weekday(courses, span=span, user="report"),
+        }
+
+    def _report_step(self, job: dict):
+        try:
+            if job["pending"]:
+                section = self._report_section(job["pending"].pop(0), job["span"])
+                if section["period_hours"] > 0:
+                    job["sections"].append(section)
+                    job["futures"].append(self._process_pool().submit(render_report_charts, section, job["fmt"]))
+                self.after(1, lambda: self._report_step(job))
+                return
+            self._session_windows.pop("report", None)  # all classes aggregated
+            if not all(f.done() for f in job["futures"]):
+                self.after(100, lambda: self._report_step(job))
+                return
+            n = self._write_report(job, [f.result() for f in job["futures"]])
+        except Exception as e:
+            self._drop_process_pool()
+            messagebox.showerror("Report", f"Could not build the report.\n{e}")
+            return
+        self._set_status(f"Report written: {n} class(es) to {os.path.basename(job['path'])} "
+                         f"in {time.perf_counter() - job['started']:.1f}s")
+
+    def _write_report(self, job: dict, images: List[Dict[str, bytes]]) -> int:
+        if not job["sections"]:
+            raise ValueError("No time was tracked in this period.")
+        if job["html"]:
+            page = report_html(job["title"], job["sections"], images)
+            with open(job["path"], "w", encoding="utf-8") as f:
+                f.write(page)
+            return len(job["sections"])
+        stem = os.path.splitext(job["path"])[0]
+        for section, imgs in zip(job["sections"], images):
+            safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in section["course"])
+            for name, data in imgs.items():
+                with open(f"{stem}-{safe}-{name}.{job['fmt']}", "wb") as f:
+                    f.write(data)
+        return len(job["sections"])
+
+    def _sync_with_folder(self, folder: Optional[str] = None):
+        """Merge with a copy of the data folder (USB stick, Syncthing, …), both ways."""
+        if folder is None:
+            folder = filedialog.askdirectory(title="Folder with another copy of tasks.json")
+        if not folder:
+            return
+        try:
+            msg = sync_folders(os.path.dirname(SAVE_FILE), folder)
+        except Exception as e:
+            messagebox.showerror("Sync", f"Could not sync with {folder}.\n{e}")
+            return
+        self._reload_tasks_from_disk()
+        self._set_status(msg)
+
+    def _fmt_rate(self, rows: int, elapsed: float) -> str:
+        return f"{rows / max(elapsed, 1e-6):,.0f} rows/s"
+
+    def _task_from_row(self, row: dict) -> Optional[Task]:
+        """Build a Task from an imported CSV/JSONL row; None if the row is unusable."""
+        text = str(row.get("text") or "").strip()
+        if not text:
+            return None
+        due = self._validate_due(str(row.get("due") or ""), warn=False)
+        if due == "INVALID":
+            return None
+        url = self._normalize_url_or_path(str(row.get("url") or "")) or None
+        course = str(row.get("course") or "").strip() or None
+        done = row.get("done", False)
+        if isinstance(done, str):
+            done = done.strip().lower() in {"1", "true", "yes", "y", "x", "done"}
+        task = Task(id=str(row.get("id") or "").strip() or str(uuid.uuid4()),
+                    text=text, done=bool(done), due=due, course=course, url=url)
+        if row.get("created"):
+            task.created = str(row["created"])
+        sessions = row.get("sessions")
+        if isinstance(sessions, list):
+            task.sessions = [s for s in sessions if isinstance(s, dict) and "start" in s]
+        return task
+
+    def _session_from_row(self, row: dict) -> Optional[dict]:
+        try:
+            start = datetime.fromisoformat(str(row["start"]))
+            end = datetime.fromisoformat(str(row["end"])) if row.get("end") else None
+            secs = int(float(row.get("seconds") or 0))
+            if not secs and end is not None:
+                secs = int((end - start).total_seconds())
+        except (KeyError, ValueError, TypeError):
+            return None
+        if secs <= 0:
+            return None
+        return {"start": start.isoformat(timespec="seconds"),
+                "end": (end or start + _dt.timedelta(seconds=secs)).isoformat(timespec="seconds"),
+                "seconds": secs}
+
+    def _iter_import_rows(self, path: str):
+        """Stream dict rows out of a .csv or .jsonl file without reading it whole."""
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            if path.lower().endswith((".jsonl", ".ndjson")):
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        yield None
+                        continue
+                    yield row if isinstance(row, dict) else None
+            else:
+                yield from csv.DictReader(f)
+
+    def _import_data(self, path: Optional[str] = None):
+        """
+        Import tasks (CSV/JSONL) or sessions (CSV with start/seconds columns).
+        Rows are validated one at a time inside one transaction: the file is
+        saved and the list refreshed once at the end, the whole import is a
+        single undo step, and a file that fails to read imports nothing.
+        """
+        if path is None:
+            path = filedialog.askopenfilename(
+                title="Import tasks or sessions",
+                filetypes=[("CSV / JSON Lines", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")]
+            )
+        if not path:
+            return
+        self._finish_loading()
+
+        by_id = {t.id: t for t in self.tasks}
+        seen_starts: dict[str, set] = {}  # task_id -> session starts, built on first use
+        added = sessions_added = skipped = rows = 0
+        t0 = time.perf_counter()
         try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+            with self._transaction("Import") as tx:
+                for row in self._iter_import_rows(path):
+                    rows += 1
+                    if row is None:
+                        skipped += 1
+                        continue
+                    # sessions rows attach to an existing task
+                    if "task_id" in row and "start" in row:
+                        t = by_id.get(str(row.get("task_id") or "").strip())
+                        s = self._session_from_row(row) if t else None
+                        if s is not None and t.id not in seen_starts:
+                            seen_starts[t.id] = {x.get("start") for x in t.sessions}
+                        if s is None or s["start"] in seen_starts[t.id]:
+                            skipped += 1
+                            continue
+                        tx.add_session(t, s)
+                        seen_starts[t.id].add(s["start"])
+                        sessions_added += 1
+                        continue
+
+                    task = self._task_from_row(row)
+                    if task is None or task.id in by_id:
+                        skipped += 1
+                        continue
+                    tx.add_task(task)
+                    by_id[task.id] = task
+                    added += 1
         except Exception as e:
-            messagebox.showerror("Settings",
-                                 f"Could not save to {SETTINGS_FILE}.\n{e}")
+            messagebox.showerror("Import", f"Could not read {path}; nothing was imported.\n{e}")
+            return
+        elapsed = time.perf_counter() - t0
+
+        self._set_status(f"Imported {added} task(s), {sessions_added} session(s), "
+                         f"skipped {skipped} — {self._fmt_rate(rows, elapsed)}")
 
     # ---------- Helpers ----------
 
-    def _iter_sessions(self, selected_courses: set[str], include_archived: bool = False):
+    def _sync_session_bin(self):
+        """
+        SessionBinLog.sync, skipped while neither the tasks (outside mirrored
+        transactions) nor the file's epoch changed since the last one; a full
+        sync reads every record.
+        """
+        log = self._session_bin
+        log._refresh()  # a rebuild or compaction elsewhere shows up as a new token
+        if self._session_bin_synced != (self._tasks_generation, log._token):
+            log.sync(self.tasks)
+            self._session_bin_synced = (self._tasks_generation, log._token)
+
+    def _wanted_task_mask(self, selected_courses: set[str], include_archived: bool = False) -> np.ndarray:
         """
-        Yield (task, course_key, start_datetime, seconds) for sessions
-        matching selected courses and archive visibility.
+        Bool per sessions.bin task index: does that task match selected
+        courses and archive visibility? Brings the cache up to date first.
         """
+        log = self._session_bin
+        self._sync_session_bin()
+        wanted = np.zeros(len(log.ids), dtype=bool)
         for t in self.tasks:
             course = (t.course or "Unassigned").strip() or "Unassigned"
 
@@ -324,15 +3784,100 @@ class ToDoApp(ctk.CTk):
             if selected_courses and course not in selected_courses:
                 continue
 
-            for s in t.sessions:
-                secs = s.get("seconds", 0)
-                if secs <= 0:
-                    continue
-                try:
-                    start = datetime.fromisoformat(s["start"])
-                except Exception:
-                    continue
-                yield t, course, start, secs
+            i = log.index.get(t.id)
+            if i is not None:
+                wanted[i] = True
+        return wanted
+
+    def _session_records(self, selected_courses: set[str], include_archived: bool = False) -> np.ndarray:
+        """
+        Sessions (seconds > 0) of tasks matching selected courses and archive
+        visibility, as SessionBinLog records straight off the mapped
+        sessions.bin.
+        """
+        wanted = self._wanted_task_mask(selected_courses, include_archived)
+        return select_records(self._session_bin.records(), wanted)
+
+    def _session_aggregates(self, selected_courses: set[str], include_archived: bool = True) -> tuple:
+        """
+        (local days, seconds per day, seconds per weekday) for matching
+        sessions. Large histories are split into SHARD_RECORDS-sized ranges
+        of sessions.bin and summed in worker processes; small ones (or a
+        single-core machine) take one pass here.
+        """
+        wanted = self._wanted_task_mask(selected_courses, include_archived)
+        log = self._session_bin
+        recs = log.records()
+        workers = min(os.cpu_count() or 1, 8)
+        if len(recs) < PARALLEL_MIN_RECORDS or workers < 2:
+            return aggregate_sessions(recs, wanted)
+
+        bounds = [(lo, min(lo + SHARD_RECORDS, len(recs))) for lo in range(0, len(recs), SHARD_RECORDS)]
+        try:
+            pool = self._process_pool()
+            futures = [pool.submit(_aggregate_bin_shard, log.path, log._token, lo, hi, wanted)
+                       for lo, hi in bounds]
+            return merge_session_aggregates([fut.result() for fut in futures])
+        except Exception:
+            # broken pool, or another instance compacted the file under us
+            self._drop_process_pool()
+            return aggregate_sessions(log.records(), wanted)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        """Worker processes for big aggregations and report rendering, started on first use."""
+        if self._analytics_pool is None:
+            self._analytics_pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 8))
+        return self._analytics_pool
+
+    def _drop_process_pool(self):
+        if self._analytics_pool is not None:
+            self._analytics_pool.shutdown(wait=False, cancel_futures=True)
+            self._analytics_pool = None
+
+    def _backup_tick(self):
+        # a window left open for days still gets its daily backup
+        try:
+            self._backup_if_due()
+        finally:
+            self.after(BACKUP_CHECK_MS, self._backup_tick)
+
+    def _backup_if_due(self, force: bool = False):
+        """Daily snapshot of the data folder, written by a worker process so the UI never waits."""
+        data_dir = os.path.dirname(SAVE_FILE)
+        if self._backup_running:
+            return
+        age = newest_backup_age(data_dir)
+        if self.backup_keep <= 0 or not (force or age is None or age >= BACKUP_EVERY_S):
+            return
+        try:
+            future = self._process_pool().submit(backup_data_folder, data_dir, self.backup_keep,
+                                                 self.compression if self.compression != "none" else None)
+        except Exception:
+            return  # broken pool; the next _backup_tick tries again
+        self._backup_running = True
+        future.add_done_callback(self._backup_finished)
+        self.after(200, lambda: self._report_backup(force))
+        if force:
+            self._set_status(f"Writing a backup to {os.path.join(data_dir, BACKUP_DIR)}…")
+
+    def _backup_finished(self, future):
+        # runs on the pool's thread, which must not touch Tk: only note the outcome
+        try:
+            self._backup_outcome = (future.result(), None)
+        except BaseException as e:
+            self._backup_outcome = (None, e)
+
+    def _report_backup(self, force: bool):
+        """Poll for _backup_finished's outcome and show it (errors always, success when asked for)."""
+        if self._backup_outcome is None:
+            self.after(200, lambda: self._report_backup(force))
+            return
+        (archive, error), self._backup_outcome = self._backup_outcome, None
+        self._backup_running = False
+        if error is not None:
+            self._set_status(f"Backup failed: {error}")
+        elif force and archive:
+            self._set_status(f"Backup written to {archive}.")
 
     def _quick_filter_class(self, course: str):
         """
@@ -375,16 +3920,54 @@ class ToDoApp(ctk.CTk):
             "border_width": 0
         }
 
+    def _filter_modes(self) -> list[str]:
+        return ["All", "Active", "Completed", "Overdue", "Due this week",
+                f"Next {self.due_window_days} days"]
+
+    def _due_range(self, mode: str) -> Optional[tuple[Optional[str], Optional[str]]]:
+        """[lo, hi) ISO bounds for the due-date filter modes, None for the others."""
+        today = self._today
+        if mode == "Overdue":
+            return None, today.isoformat()
+        if mode == "Due this week":
+            monday = today - _dt.timedelta(days=today.weekday())
+            return monday.isoformat(), (monday + _dt.timedelta(days=7)).isoformat()
+        if mode == f"Next {self.due_window_days} days":
+            return today.isoformat(), (today + _dt.timedelta(days=self.due_window_days + 1)).isoformat()
+        return None
+
+    def _ordered_tasks(self) -> List[Task]:
+        """self.tasks in display order: saved order, or by due date when sorted."""
+        if self.sort_mode is None:
+            return self.tasks
+        dated = [self._tasks_by_id[tid] for tid in self._due_index.ids()]
+        undated = [t for t in self.tasks if t.id not in self._due_index.key_by_id]
+        ordered = dated + undated
+        if self.sort_mode == "desc":
+            ordered.reverse()
+        return ordered
+
     def _filtered_tasks(self):
         mode = self.filter_mode.get()
-        show_arch = self.show_archived.get()
-
-        if mode == "Active":
-            base = [t for t in self.tasks if not t.done]
+        due_range = self._due_range(mode)
+
+        if due_range is not None:
+            # range modes are answered by the due index (open tasks only)
+            base = [self._tasks_by_id[tid] for tid in self._due_index.ids(*due_range)]
+            base = [t for t in base if not t.done]
+            if self.sort_mode == "desc":
+                base.reverse()
+        elif mode == "Active":
+            base = [t for t in self._ordered_tasks() if not t.done]
         elif mode == "Completed":
-            base = [t for t in self.tasks if t.done]
+            base = [t for t in self._ordered_tasks() if t.done]
         else:
-            base = list(self.tasks)
+            base = list(self._ordered_tasks())
+        return self._narrow_view(base)
+
+    def _narrow_view(self, base: List[Task]) -> List[Task]:
+        """Archive visibility and the quick class filter, on top of the filter mode."""
+        show_arch = self.show_archived.get()
 
         # hide archived classes unless user explicitly shows them
         if not show_arch:
@@ -405,18 +3988,26 @@ class ToDoApp(ctk.CTk):
 
 
     def _refresh_list(self):
-        self._refresh_cards()
-        self._update_kpi()
+        self._redraw.request("list")
+        # status now, so a caller's own message set right after still wins
         todo = sum(1 for t in self.tasks if not t.done)
         self._set_status(f"{len(self.tasks)} total — {todo} to do — "
                          f"Filter: {self.filter_mode.get()} — "
                          f"{'Grouped' if self.group_by_class.get() else 'Flat'}")
 
+    def _draw_list(self):
+        self._refresh_cards()
+        self._update_kpi()
+
     def _refresh_cards(self):
         # blow away old rows
         for row in self._card_rows:
             row.destroy()
         self._card_rows.clear()
+        self._due_badge_by_id.clear()
+        self._card_by_id.clear()
+        self._card_group.clear()
+        self._card_order.clear()
         current = self._filtered_tasks()
 
         if self.group_by_class.get():
@@ -436,21 +4027,71 @@ class ToDoApp(ctk.CTk):
                 self._card_rows.append(header)
 
                 for t in buckets[cls]:
-                    card = self._make_task_card(self.cards, t)
-                    card.pack(fill="x", padx=10, pady=6)
-                    self._card_rows.append(card)
+                    self._add_card(t, group=cls)
         else:
             for t in current:
-                card = self._make_task_card(self.cards, t)
-                card.pack(fill="x", padx=10, pady=6)
-                self._card_rows.append(card)
+                self._add_card(t)
+
+        # selection only spans what is on screen
+        if self.selected_ids:
+            self.selected_ids.intersection_update(self._card_by_id)
+            self._update_batch_bar()
+
+    def _add_card(self, t: Task, group: str = ""):
+        card = self._make_task_card(self.cards, t)
+        card.pack(fill="x", padx=10, pady=6)
+        self._card_rows.append(card)
+        self._card_by_id[t.id] = card
+        self._card_group[t.id] = group
+        self._card_order.append(t.id)
+
+    def _update_cards(self, task_ids, due_changed: bool = False):
+        """
+        Repaint only the cards for task_ids: rebuild them in place, drop the ones
+        that left the current view, and fall back to a full rebuild only when a
+        card has to appear somewhere new (new task, moved between groups, or a
+        due date changed while the list is sorted by due).
+        """
+        if not task_ids:
+            return
+        if due_changed and self.sort_mode:
+            return self._refresh_cards()
+        grouped = self.group_by_class.get()
+        visible = {t.id: t for t in self._filtered_tasks()}
+
+        for tid in task_ids:
+            old = self._card_by_id.get(tid)
+            t = visible.get(tid)
+            if t is None:
+                if old is None:
+                    continue
+                if grouped:
+                    # the group header may now be empty
+                    return self._refresh_cards()
+                old.destroy()
+                self._card_rows.remove(old)
+                del self._card_by_id[tid]
+                self._card_group.pop(tid, None)
+                self._card_order.remove(tid)
+                continue
+
+            if old is None:
+                return self._refresh_cards()
+            if grouped and self._card_group.get(tid) != (f"{t.course}" or "Unassigned").strip():
+                return self._refresh_cards()
+
+            card = self._make_task_card(self.cards, t)
+            card.pack(fill="x", padx=10, pady=6, before=old)
+            self._card_rows[self._card_rows.index(old)] = card
+            self._card_by_id[tid] = card
+            old.destroy()
 
     def _now_iso(self) -> str:
         # use UTC to avoid DST weirdness in durations
         return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
     def _task_total_seconds(self, t: Task) -> int:
-        total = sum(s.get("seconds", 0) for s in t.sessions)
+        total = t.sessions.total_seconds()
         # include running session if any
         if t.running_start:
             try:
@@ -468,15 +4109,15 @@ class ToDoApp(ctk.CTk):
         if m: return f"{m}m {s}s"
         return f"{s}s"
 
-    def _course_totals(self, include_archived: bool = False) -> dict[str, int]:
-        """Aggregate total seconds by course, including running sessions."""
+    def _course_totals(self, include_archived: bool = False, running: bool = True) -> dict[str, int]:
+        """Aggregate total seconds by course, including running sessions unless running=False."""
         totals: dict[str, int] = {}
         for t in self.tasks:
             key = (t.course or "Unassigned").strip() or "Unassigned"
             # skip archived unless explicitly included
             if not include_archived and key in self.hidden_courses:
                 continue
-            secs = self._task_total_seconds(t)
+            secs = self._task_total_seconds(t) if running else t.sessions.total_seconds()
             totals[key] = totals.get(key, 0) + secs
         return totals
 
@@ -489,12 +4130,76 @@ class ToDoApp(ctk.CTk):
         return sorted(keys, key=key_fn)
 
     def _update_kpi(self):
+        self._redraw.request("kpi")
+
+    def _week_seconds_by_course(self, running: bool = True) -> dict[str, int]:
+        """
+        Seconds per course since Monday 00:00, running timers included unless
+        running=False, for courses that have a weekly goal. Logged time comes from the
+        WeekTotals accumulator, so this only walks tasks touched this week.
+        """
+        if not self.weekly_goals or self._task_stream is not None:
+            return {}
+        week = self._week_totals
+        today = _dt.date.today()
+        if not week.current(today):
+            try:
+                self._sync_session_bin()
+                week.rebuild(self._session_bin.records(), self._session_bin.ids, today)
+            except OSError:
+                return {}
+        progress: dict[str, int] = {}
+        for tid, secs in week.by_task.items():
+            t = self._tasks_by_id.get(tid)
+            if t is not None:
+                key = (t.course or "Unassigned").strip() or "Unassigned"
+                progress[key] = progress.get(key, 0) + secs
+        if running:
+            now = time.time()
+            for t in self._running_tasks():
+                key = (t.course or "Unassigned").strip() or "Unassigned"
+                progress[key] = progress.get(key, 0) + week.running_overlap(t.running_start, now)
+        return {c: progress.get(c, 0) for c in self.weekly_goals}
+
+    def _running_tasks(self) -> List[Task]:
+        tasks = (self._tasks_by_id.get(tid) for tid in self._running_ids)
+        return [t for t in tasks if t is not None and t.running_start]
+
+    def _goal_tick(self):
+        # running timers move the class totals and goal bars; without one,
+        # the scheduler drops the render unless the week rolled over
+        try:
+            if self._running_ids:
+                self._redraw.request("kpi", force=True)
+            elif self.weekly_goals:
+                self._update_kpi()
+        finally:
+            self.after(GOAL_TICK_MS, self._goal_tick)
+
+    def _kpi_inputs(self) -> tuple:
+        # logged time plus which timers run since when, but not their elapsed
+        # time: that changes every call, and _goal_tick repaints it anyway
+        totals = self._course_totals(include_archived=self.show_archived.get(), running=False)
+        week = self._week_seconds_by_course(running=False)
+        self._kpi_logged = (totals, week)
+        running = sorted((t.id, t.running_start, t.course or "") for t in self._running_tasks())
+        return (tuple(totals.items()), tuple(running), tuple(sorted(self.class_zoom_urls)),
+                tuple(sorted(self.weekly_goals.items())), tuple(sorted(week.items())))
+
+    def _draw_kpi(self):
         # clear old badges
         for w in self._kpi_rows:
             w.destroy()
         self._kpi_rows.clear()
 
-        totals = self._course_totals(include_archived=self.show_archived.get())
+        totals, week = (dict(d) for d in self._kpi_logged)
+        now = time.time()
+        for t in self._running_tasks():
+            key = (t.course or "Unassigned").strip() or "Unassigned"
+            if key in totals:  # not an archived class that is hidden
+                totals[key] += self._task_total_seconds(t) - t.sessions.total_seconds()
+            if key in week:
+                week[key] += self._week_totals.running_overlap(t.running_start, now)
         if not totals:
             lbl = ctk.CTkLabel(self._kpi_container, text="No time tracked yet")
             lbl.pack(side="left", padx=(0, 8))
@@ -522,6 +4227,16 @@ class ToDoApp(ctk.CTk):
             )
             badge.pack(side="top", pady=(0, 2))
 
+            goal_text = ""
+            if course in self.weekly_goals:
+                goal = self.weekly_goals[course]
+                done_h = week.get(course, 0) / 3600.0
+                bar = ctk.CTkProgressBar(course_box, height=6, width=80,
+                                         progress_color="#2fa572" if done_h >= goal else "#4d20d4")
+                bar.set(min(1.0, done_h / goal))
+                bar.pack(side="top", fill="x", padx=12)
+                goal_text = f"\nThis week: {done_h:.1f} / {goal:g} h"
+
             has_zoom = (course != "Unassigned" and course in self.class_zoom_urls)
 
             # click = Zoom if link exists, else filter
@@ -531,9 +4246,9 @@ class ToDoApp(ctk.CTk):
             )
 
             # hover: hand cursor + tooltip
-            def on_enter(e, lbl=badge, c=course, hz=has_zoom):
+            def on_enter(e, lbl=badge, c=course, hz=has_zoom, gt=goal_text):
                 lbl.configure(cursor="hand2")
-                tip_text = "Join Zoom" if hz else "Filter tasks"
+                tip_text = ("Join Zoom" if hz else "Filter tasks") + gt
                 self._show_tooltip(lbl, tip_text)
 
             def on_leave(e, lbl=badge):
@@ -652,7 +4367,7 @@ class ToDoApp(ctk.CTk):
         """Dialog to mark classes as active/archived (hidden)."""
         win = ctk.CTkToplevel(self)
         win.title("Manage classes")
-        win.geometry("400x420")  # a bit taller so buttons don't get cut off
+        win.geometry("420x460")  # a bit taller so buttons don't get cut off
         win.resizable(False, True)
         win.grab_set()
 
@@ -664,7 +4379,9 @@ class ToDoApp(ctk.CTk):
             main,
             text="Uncheck a class to archive it.\n\n"
                  "Archived classes are hidden from the task list and KPIs\n"
-                 "unless 'Show archived classes' is enabled.",
+                 "unless 'Show archived classes' is enabled.\n\n"
+                 "Weekly goal: target hours per week (blank = none),\n"
+                 "shown as a progress bar under the class's KPI badge.",
             justify="left"
         )
         info.pack(anchor="w", padx=16, pady=(10, 8))
@@ -684,18 +4401,44 @@ class ToDoApp(ctk.CTk):
         course_values = sorted(courses, key=lambda s: (not s.isdigit(), s))
 
         check_vars: Dict[str, ctk.BooleanVar] = {}
+        goal_vars: Dict[str, ctk.StringVar] = {}
 
         for c in course_values:
+            row = ctk.CTkFrame(list_frame, fg_color="transparent")
+            row.pack(fill="x", pady=2, padx=8)
             var = ctk.BooleanVar(value=(c not in self.hidden_courses))
-            chk = ctk.CTkCheckBox(list_frame, text=f"{c}", variable=var)
-            chk.pack(anchor="w", pady=2, padx=8)
+            chk = ctk.CTkCheckBox(row, text=f"{c}", variable=var)
+            chk.pack(side="left")
             check_vars[c] = var
+            goal = self.weekly_goals.get(c)
+            goal_vars[c] = ctk.StringVar(value=f"{goal:g}" if goal else "")
+            ctk.CTkLabel(row, text="h/week").pack(side="right", padx=(4, 0))
+            ctk.CTkEntry(row, width=60, textvariable=goal_vars[c]).pack(side="right")
 
         # ---- Buttons ----
         btn_row = ctk.CTkFrame(main, fg_color="transparent")
         btn_row.pack(fill="x", padx=12, pady=(10, 10))
 
         def save_and_close():
+            goals: Dict[str, float] = {}
+            for c, gvar in goal_vars.items():
+                raw = gvar.get().strip()
+                if not raw:
+                    continue
+                try:
+                    hours = float(raw)
+                except ValueError:
+                    hours = -1.0
+                if hours < 0 or hours > 168:
+                    messagebox.showwarning("Weekly goal",
+                                           f"Goal for {c} must be a number of hours between 0 and 168.")
+                    return
+                if hours > 0:
+                    goals[c] = hours
+            # keep goals of classes that no longer have tasks
+            self.weekly_goals = {c: h for c, h in self.weekly_goals.items() if c not in goal_vars}
+            self.weekly_goals.update(goals)
+
             # visible = checked; hidden = unchecked
             self.hidden_courses.clear()
             for c, var in check_vars.items():
@@ -726,10 +4469,10 @@ class ToDoApp(ctk.CTk):
 
     # open settings dialog
     def _open_settings_dialog(self):
-        """Main app settings: zoom links, class archiving, delete completed."""
+        """Main app settings: zoom links, class archiving, import/export, delete completed."""
         win = ctk.CTkToplevel(self)
         win.title("Settings")
-        win.geometry("520x520")
+        win.geometry("520x840")
         win.resizable(False, False)
         win.grab_set()
 
@@ -768,14 +4511,14 @@ class ToDoApp(ctk.CTk):
 
         ctk.CTkLabel(
             arch_frame,
-            text="Archive old classes to hide them from the task list and KPIs.\n"
-                 "Use the 'Show archived classes' checkbox in the main view to peek at them.",
+            text="Archive old classes to hide them from the task list and KPIs, or set\n"
+                 "weekly hour goals. Use 'Show archived classes' in the main view to peek.",
             justify="left"
         ).pack(anchor="w", padx=12, pady=(0, 8))
 
         ctk.CTkButton(
             arch_frame,
-            text="Manage archived classes…",
+            text="Manage classes & weekly goals…",
             command=self._open_class_archive_dialog
         ).pack(anchor="w", padx=12, pady=(0, 10))
 
@@ -799,6 +4542,130 @@ class ToDoApp(ctk.CTk):
             command=lambda: self._toggle_safe_mode(safe_var.get())
         ).pack(anchor="w", padx=12, pady=(0, 8))
 
+        # ----- Reminders section -----
+        notify_var = ctk.BooleanVar(value=self.due_notifications)
+
+        remind_frame = ctk.CTkFrame(win, corner_radius=10)
+        remind_frame.pack(fill="x", padx=16, pady=(8, 8))
+
+        ctk.CTkLabel(
+            remind_frame,
+            text="Reminders",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(anchor="w", padx=12, pady=(8, 2))
+
+        ctk.CTkCheckBox(
+            remind_frame,
+            text="Desktop notification when a task is due today or overdue",
+            variable=notify_var,
+            command=lambda: self._toggle_due_notifications(notify_var.get())
+        ).pack(anchor="w", padx=12, pady=(0, 8))
+
+        # ----- Idle timers section -----
+        idle_frame = ctk.CTkFrame(win, corner_radius=10)
+        idle_frame.pack(fill="x", padx=16, pady=(8, 8))
+
+        ctk.CTkLabel(
+            idle_frame,
+            text="Idle timers",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(anchor="w", padx=12, pady=(8, 2))
+
+        idle_row = ctk.CTkFrame(idle_frame, fg_color="transparent")
+        idle_row.pack(fill="x", padx=12, pady=(0, 10))
+
+        idle_min_var = ctk.StringVar(value=str(self.idle_minutes) if self.idle_minutes else "Off")
+        idle_action_var = ctk.StringVar(
+            value=next(k for k, v in IDLE_ACTIONS.items() if v == self.idle_action))
+
+        def save_idle(_choice=None):
+            self._set_idle_handling(idle_min_var.get(), idle_action_var.get())
+
+        ctk.CTkLabel(idle_row, text="Away for (min)").pack(side="left")
+        ctk.CTkOptionMenu(
+            idle_row,
+            variable=idle_min_var,
+            values=IDLE_MINUTE_CHOICES,
+            width=70,
+            command=save_idle
+        ).pack(side="left", padx=(8, 8))
+        ctk.CTkOptionMenu(
+            idle_row,
+            variable=idle_action_var,
+            values=list(IDLE_ACTIONS),
+            command=save_idle
+        ).pack(side="left")
+
+        # ----- Import / export section -----
+        data_frame = ctk.CTkFrame(win, corner_radius=10)
+        data_frame.pack(fill="x", padx=16, pady=(8, 8))
+
+        ctk.CTkLabel(
+            data_frame,
+            text="Import & export",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).pack(anchor="w", padx=12, pady=(8, 2))
+
+        data_row = ctk.CTkFrame(data_frame, fg_color="transparent")
+        data_row.pack(fill="x", padx=12, pady=(0, 10))
+
+        ctk.CTkButton(
+            data_row,
+            text="Import…",
+            width=90,
+            command=self._import_data
+        ).pack(side="left")
+
+        ctk.CTkButton(
+            data_row,
+            text="Sync folder…",
+            width=100,
+            command=self._sync_with_folder
+        ).pack(side="left", padx=(8, 0))
+
+        export_kind = ctk.StringVar(value=next(iter(EXPORT_KINDS)))
+        ctk.CTkButton(
+            data_row,
+            text="Export",
+            width=90,
+            command=lambda: self._export_data(export_kind.get())
+        ).pack(side="right")
+
+        ctk.CTkOptionMenu(
+            data_row,
+            variable=export_kind,
+            values=list(EXPORT_KINDS)
+        ).pack(side="right", padx=(0, 8))
+
+        store_row = ctk.CTkFrame(data_frame, fg_color="transparent")
+        store_row.pack(fill="x", padx=12, pady=(0, 10))
+
+        compression_var = ctk.StringVar(value=self.compression)
+        keep_var = ctk.StringVar(value=str(self.backup_keep) if self.backup_keep else "Off")
+
+        ctk.CTkLabel(store_row, text="Compress").pack(side="left")
+        ctk.CTkOptionMenu(
+            store_row,
+            variable=compression_var,
+            values=COMPRESSION_CHOICES,
+            width=80,
+            command=self._set_compression
+        ).pack(side="left", padx=(8, 12))
+        ctk.CTkLabel(store_row, text="Backups kept").pack(side="left")
+        ctk.CTkOptionMenu(
+            store_row,
+            variable=keep_var,
+            values=BACKUP_KEEP_CHOICES,
+            width=70,
+            command=self._set_backup_keep
+        ).pack(side="left", padx=(8, 0))
+        ctk.CTkButton(
+            store_row,
+            text="Back up now",
+            width=100,
+            command=lambda: self._backup_if_due(force=True)
+        ).pack(side="right")
+
         # ----- Danger zone -----
         danger = ctk.CTkFrame(win, corner_radius=10)
         danger.pack(fill="x", padx=16, pady=(8, 16))
@@ -811,7 +4678,7 @@ class ToDoApp(ctk.CTk):
 
         ctk.CTkLabel(
             danger,
-            text="Delete all completed tasks. This cannot be undone.",
+            text="Delete all completed tasks. Undo with Ctrl+Z if you change your mind.",
             justify="left"
         ).pack(anchor="w", padx=12, pady=(0, 8))
 
@@ -824,6 +4691,26 @@ class ToDoApp(ctk.CTk):
             command=self._clear_completed
         ).pack(anchor="w", padx=12, pady=(0, 10))
 
+    def _set_idle_handling(self, minutes: str, action: str):
+        self.idle_minutes = 0 if minutes == "Off" else int(minutes)
+        self.idle_action = IDLE_ACTIONS[action]
+        self._save_settings()
+        self._idle.arm()
+
+    def _set_compression(self, kind: str):
+        self.compression = kind
+        self._save_settings()
+        self._save_tasks()  # rewrite tasks.json in the new format right away
+        self._set_status("tasks.json is now stored " + ("uncompressed." if kind == "none" else f"{kind}-compressed."))
+
+    def _set_backup_keep(self, choice: str):
+        self.backup_keep = 0 if choice == "Off" else int(choice)
+        self._save_settings()
+
+    def _toggle_due_notifications(self, val: bool):
+        self.due_notifications = val
+        self._save_settings()
+
     def _toggle_safe_mode(self, val: bool):
         self.safe_mode = val
         self._save_settings()
@@ -876,31 +4763,120 @@ class ToDoApp(ctk.CTk):
                 self._set_status(f"Clicked: {course}")
 
     # Analytics aggregations
-    def _analytics_time_by_day(self, selected_courses: set[str]) -> list[tuple[_dt.date, float]]:
+    # span=(first, last) limits a chart to those local dates; None = all time
+    def _analytics_snapshot(self, selected_courses: set[str]) -> tuple:
+        """
+        (data key, task mask, all records) for analytics caches. The key
+        changes with the course selection or any task's session count or
+        total, which sync() keeps sessions.bin in step with.
+        """
+        wanted = self._wanted_task_mask(selected_courses, include_archived=True)
+        log = self._session_bin
+        recs = log.records()
+        key = (wanted.tobytes(), log._token, len(recs),
+               tuple((len(t.sessions), t.sessions.total_seconds()) for t in self.tasks))
+        return key, wanted, recs
+
+    def _analytics_window(self, selected_courses: set[str], span: tuple[_dt.date, _dt.date],
+                          user: str = "chart") -> SessionWindow:
+        """
+        The SessionWindow of selected_courses moved to span. It is reused
+        while the selection and the sessions stay the same, so consecutive
+        windows only pay for the sessions that differ. Each user (the
+        analytics dialog, a report) keeps its own.
+        """
+        key, wanted, recs = self._analytics_snapshot(selected_courses)
+        cached = self._session_windows.get(user)
+        if cached is None or cached[0] != key:
+            cached = self._session_windows[user] = (key, SessionWindow(select_records(recs, wanted), len(wanted)))
+        window = cached[1]
+        window.move(*span)
+        return window
+
+    def _analytics_course_series(self, selected_courses: set[str],
+                                 span: Optional[tuple[_dt.date, _dt.date]] = None) -> tuple:
+        """
+        (day numbers, course names, cumulative hours per course and day) on
+        one shared day axis, for the stacked cumulative chart. Cached per
+        data version and span; only downsampling depends on the canvas.
+        """
+        key, wanted, recs = self._analytics_snapshot(selected_courses)
+        key = (key, span)
+        if self._course_series_cache is None or self._course_series_cache[0] != key:
+            recs = select_records(recs, wanted)
+            names = sorted({(t.course or "Unassigned").strip() or "Unassigned" for t in self.tasks},
+                           key=lambda c: (not c.isdigit(), c))
+            slot = {name: c for c, name in enumerate(names)}
+            course_of = np.zeros(len(wanted), dtype=np.int32)
+            for t in self.tasks:
+                i = self._session_bin.index.get(t.id)
+                if i is not None and i < len(course_of):
+                    course_of[i] = slot[(t.course or "Unassigned").strip() or "Unassigned"]
+            course = course_of[recs["task"]]
+            per_course = []
+            for c, name in enumerate(names):
+                mine = course == c
+                if mine.any():
+                    per_course.append((name, *local_day_seconds(recs["start"][mine], recs["seconds"][mine])))
+            days = np.unique(np.concatenate([d for _n, d, _s in per_course])) if per_course \
+                else np.zeros(0, dtype=np.int64)
+            if span is not None:
+                days = days[(days >= SessionWindow.day_number(span[0])) & (days <= SessionWindow.day_number(span[1]))]
+            series = np.zeros((len(per_course), len(days)))
+            for row, (_name, d, secs) in enumerate(per_course):
+                at = np.searchsorted(days, d)
+                inside = (at < len(days)) & (days[np.minimum(at, len(days) - 1)] == d)
+                series[row, at[inside]] = secs[inside]
+            keep = series.any(axis=1)
+            series = np.cumsum(series[keep], axis=1) / 3600.0
+            courses = [name for (name, _d, _s), k in zip(per_course, keep.tolist()) if k]
+            self._course_series_cache = (key, (days, courses, series))
+        return self._course_series_cache[1]
+
+    def _analytics_heatmap(self, selected_courses: set[str],
+                           span: Optional[tuple[_dt.date, _dt.date]] = None) -> np.ndarray:
+        """Hours studied per weekday (rows Mon..Sun) and hour of day (columns 0..23)."""
+        key, wanted, recs = self._analytics_snapshot(selected_courses)
+        key = (key, span)
+        if self._heatmap_cache is None or self._heatmap_cache[0] != key:
+            if span is None:
+                recs = select_records(recs, wanted)
+                grid = hour_of_week_seconds(local_starts(recs["start"]), recs["seconds"])
+            else:
+                w = self._analytics_window(selected_courses, span)
+                grid = hour_of_week_seconds(w.local_start[w.lo:w.hi], w.seconds[w.lo:w.hi])
+            self._heatmap_cache = (key, grid / 3600.0)
+        return self._heatmap_cache[1]
+
+    def _analytics_time_by_day(self, selected_courses: set[str],
+                               span: Optional[tuple[_dt.date, _dt.date]] = None,
+                               user: str = "chart") -> list[tuple[_dt.date, float]]:
         """Return list of (date, cumulative_hours) sorted by date."""
-        per_day = defaultdict(int)  # date -> seconds
-
-        for _t, _course, start, secs in self._iter_sessions(selected_courses, include_archived=True):
-            d = start.date()
-            per_day[d] += secs
-
-        if not per_day:
-            return []
-
-        days = sorted(per_day.keys())
-        data = []
-        cum_secs = 0
-        for d in days:
-            cum_secs += per_day[d]
-            data.append((d, cum_secs / 3600.0))  # hours
-
-        return data
+        if span is None:
+            days, per_day, _per_wd = self._session_aggregates(selected_courses, include_archived=True)
+        else:
+            days, per_day = self._analytics_window(selected_courses, span, user).by_day(*span)
+        cum_hours = np.cumsum(per_day) / 3600.0
+        return [(_EPOCH_DAY + _dt.timedelta(days=d), h) for d, h in zip(days.tolist(), cum_hours.tolist())]
 
-    def _analytics_top_tasks(self, selected_courses: set[str], limit: int = 10) -> list[tuple[str, float]]:
+    def _analytics_top_tasks(self, selected_courses: set[str], limit: int = 10,
+                             span: Optional[tuple[_dt.date, _dt.date]] = None,
+                             user: str = "chart") -> list[tuple[str, float]]:
         """Return list of (task_title, minutes) for top tasks by time."""
         per_task = defaultdict(int)  # task_id -> seconds
         titles: dict[str, str] = {}
 
+        if span is not None:
+            window = self._analytics_window(selected_courses, span, user)
+            ids = self._session_bin.ids
+            for i in np.flatnonzero(window.per_task > 0).tolist():
+                t = self._tasks_by_id.get(ids[i])
+                if t is not None:
+                    per_task[t.id] = int(window.per_task[i])
+                    titles[t.id] = t.text or "(no title)"
+            top = heapq.nlargest(limit, per_task.items(), key=lambda kv: kv[1])
+            return [(titles[tid], secs / 60.0) for tid, secs in top]  # minutes
+
         for t in self.tasks:
             course = (t.course or "Unassigned").strip() or "Unassigned"
             if selected_courses and course not in selected_courses:
@@ -914,21 +4890,23 @@ class ToDoApp(ctk.CTk):
         top = sorted(per_task.items(), key=lambda kv: kv[1], reverse=True)[:limit]
         return [(titles[tid], secs / 60.0) for tid, secs in top]  # minutes
 
-    def _analytics_time_by_weekday(self, selected_courses: set[str]) -> list[tuple[str, float]]:
+    def _analytics_time_by_weekday(self, selected_courses: set[str],
+                                   span: Optional[tuple[_dt.date, _dt.date]] = None,
+                                   user: str = "chart") -> list[tuple[str, float]]:
         """Return [('Mon', hours), ...] in order Mon..Sun."""
-        per_wd = defaultdict(int)  # weekday_idx -> seconds
-
-        for _t, _course, start, secs in self._iter_sessions(selected_courses, include_archived=True):
-            wd = start.weekday()  # 0=Mon
-            per_wd[wd] += secs
+        if span is None:
+            _days, _per_day, per_wd = self._session_aggregates(selected_courses, include_archived=True)
+        else:
+            per_wd = self._analytics_window(selected_courses, span, user).per_weekday
 
         labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
         result = []
         for i, lbl in enumerate(labels):
-            result.append((lbl, per_wd[i] / 3600.0))
+            result.append((lbl, float(per_wd[i]) / 3600.0))
         return result
 
     def _open_analytics_dialog(self):
+        self._finish_loading()
         win = ctk.CTkToplevel(self)
         win.title("Analytics")
         win.geometry("900x600")
@@ -984,39 +4962,51 @@ class ToDoApp(ctk.CTk):
         self._analytics_chart_type = ctk.StringVar(value="Cumulative time")
         chart_toggle = ctk.CTkSegmentedButton(
             header,
-            values=["Cumulative time", "Time by task", "By weekday"],
+            values=["Cumulative time", "Time by task", "By weekday", "Heatmap"],
             variable=self._analytics_chart_type,
             command=lambda _v: self._analytics_refresh_chart()
         )
         chart_toggle.pack(side="right", padx=10)
 
+        # ----- Right: date range (◀ / ▶ step to the previous / next window) -----
+        range_row = ctk.CTkFrame(right, fg_color="transparent")
+        range_row.pack(fill="x", padx=10, pady=(6, 0))
+
+        self._analytics_range = ctk.StringVar(value="All time")
+        self._analytics_anchor = _dt.date.today()
+        ctk.CTkSegmentedButton(
+            range_row,
+            values=ANALYTICS_RANGES,
+            variable=self._analytics_range,
+            command=lambda _v: self._analytics_refresh_chart()
+        ).pack(side="left")
+
+        ctk.CTkButton(range_row, text="▶", width=28,
+                      command=lambda: self._analytics_step_range(1)).pack(side="right")
+        self._analytics_range_label = ctk.CTkLabel(range_row, text="", width=170)
+        self._analytics_range_label.pack(side="right", padx=4)
+        ctk.CTkButton(range_row, text="◀", width=28,
+                      command=lambda: self._analytics_step_range(-1)).pack(side="right")
+
         # Matplotlib Figure + Canvas
         self._analytics_fig = Figure(figsize=(5, 4), dpi=70)
         self._analytics_ax = self._analytics_fig.add_subplot(111)
+        self._analytics_cbar = None  # heatmap colour bar, removed before each redraw
 
         # 🔹 Dark background for figure + axes
-        bg = "#1e1e1e"
-        fg = "#f5f5f5"
-        self._analytics_fig.patch.set_facecolor(bg)
-        self._analytics_ax.set_facecolor(bg)
-        self._analytics_ax.tick_params(colors=fg)
-        self._analytics_ax.spines["bottom"].set_color(fg)
-        self._analytics_ax.spines["top"].set_color(fg)
-        self._analytics_ax.spines["left"].set_color(fg)
-        self._analytics_ax.spines["right"].set_color(fg)
-        self._analytics_ax.yaxis.label.set_color(fg)
-        self._analytics_ax.xaxis.label.set_color(fg)
-        self._analytics_ax.title.set_color(fg)
+        style_dark_axes(self._analytics_fig, self._analytics_ax)
 
         self._analytics_canvas = FigureCanvasTkAgg(self._analytics_fig, master=right)
         self._analytics_canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
+        self._analytics_canvas.get_tk_widget().bind("<Configure>", lambda _e: self._analytics_refresh_chart(),
+                                                    add="+")
 
         # Kick off first render *after* window is laid out
         def _initial_draw():
             try: win.update_idletasks()
             except Exception:
                 pass
-            self._analytics_refresh_chart()
+            self._analytics_refresh_chart(force=True)  # new figure, even if the inputs match last time
 
         win.after(50, _initial_draw)
 
@@ -1030,14 +5020,46 @@ class ToDoApp(ctk.CTk):
                 selected.add(c)
         return selected
 
-    def _analytics_refresh_chart(self):
+    def _analytics_span(self) -> Optional[tuple[_dt.date, _dt.date]]:
+        """(first, last) date of the range picked in analytics, or None for all time."""
+        kind = self._analytics_range.get() if hasattr(self, "_analytics_range") else "All time"
+        if kind == "All time":
+            return None
+        return period_bounds(kind, self._analytics_anchor)
+
+    def _analytics_step_range(self, direction: int):
+        kind = self._analytics_range.get()
+        if kind == "All time":
+            return
+        self._analytics_anchor = step_period(kind, self._analytics_anchor, direction)
+        self._analytics_refresh_chart()
+
+    def _analytics_refresh_chart(self, force: bool = False):
+        # debounced: ticking several classes or dragging the window edge draws once
+        self._redraw.request("analytics", force=force)
+
+    def _analytics_inputs(self) -> Optional[tuple]:
+        """Everything the chart depends on; an identical tuple means nothing to redraw."""
+        if not hasattr(self, "_analytics_fig"):
+            return None
+        try:
+            widget = self._analytics_canvas.get_tk_widget()
+            size = (widget.winfo_width(), widget.winfo_height())
+        except Exception:
+            size = None
+        data = tuple((t.id, t.course, t.text, t.running_start, len(t.sessions), t.sessions.total_seconds())
+                     for t in self.tasks)
+        return (frozenset(self._analytics_selected_courses()), self._analytics_chart_type.get(),
+                self._analytics_span(), size, data)
+
+    def _draw_analytics_chart(self):
         if not hasattr(self, "_analytics_fig"):
             return
 
-        # Ensure canvas/layout is up to date before sizing the figure
+        # Match the figure to the canvas (the scheduler runs after layout has settled)
+        width = 800
         try:
             widget = self._analytics_canvas.get_tk_widget()
-            widget.update_idletasks()
             width = max(widget.winfo_width(), 100)
             height = max(widget.winfo_height(), 100)
 
@@ -1050,57 +5072,53 @@ class ToDoApp(ctk.CTk):
         selected_courses = self._analytics_selected_courses()
         chart_type = getattr(self, "_analytics_chart_type", None)
         chart_type = chart_type.get() if chart_type is not None else "Cumulative time"
+        span = self._analytics_span()
+        span_text = "" if span is None else f" ({span[0]:%b %d} – {span[1]:%b %d, %Y})"
+        self._analytics_range_label.configure(text=span_text.strip(" ()"))
 
+        if self._analytics_cbar is not None:
+            self._analytics_cbar.remove()  # clear() leaves a previous heatmap's colour bar behind
+            self._analytics_cbar = None
         self._analytics_ax.clear()
 
         # Re-apply dark theme styling on each redraw
-        bg = "#1e1e1e"
-        fg = "#f5f5f5"
-        self._analytics_fig.patch.set_facecolor(bg)
-        self._analytics_ax.set_facecolor(bg)
-        self._analytics_ax.tick_params(colors=fg)
-        for spine in self._analytics_ax.spines.values():
-            spine.set_color(fg)
-        self._analytics_ax.yaxis.label.set_color(fg)
-        self._analytics_ax.xaxis.label.set_color(fg)
-        self._analytics_ax.title.set_color(fg)
-
+        style_dark_axes(self._analytics_fig, self._analytics_ax)
 
         if chart_type == "Cumulative time":
-            data = self._analytics_time_by_day(selected_courses)
-            if not data:
+            days, courses, series = self._analytics_course_series(selected_courses, span=span)
+            if not len(days):
                 self._analytics_ax.text(0.5, 0.5, "No data", ha="center", va="center")
             else:
-                dates = [d for d, _h in data]
-                hours = [h for _d, h in data]
-                self._analytics_ax.plot(dates, hours)
-                self._analytics_ax.set_title("Cumulative time by day")
+                # one stacked band per course, thinned to what the canvas can show
+                shown = downsample_cumulative(days, width)
+                self._analytics_ax.stackplot(days[shown].astype("datetime64[D]"), series[:, shown],
+                                             labels=courses, alpha=0.85)
+                if len(courses) > 1:
+                    legend = self._analytics_ax.legend(loc="upper left", fontsize="small",
+                                                       facecolor=CHART_BG, edgecolor=CHART_FG)
+                    for text in legend.get_texts():
+                        text.set_color(CHART_FG)
+                self._analytics_fig.autofmt_xdate()
+                self._analytics_ax.set_title("Cumulative time by day" + span_text)
                 self._analytics_ax.set_ylabel("Hours")
                 self._analytics_ax.set_xlabel("Date")
         elif chart_type == "Time by task":
-            data = self._analytics_top_tasks(selected_courses)
-            if not data:
+            plot_top_tasks(self._analytics_ax, self._analytics_top_tasks(selected_courses, span=span), span_text)
+        elif chart_type == "Heatmap":
+            grid = self._analytics_heatmap(selected_courses, span=span)
+            if not grid.any():
                 self._analytics_ax.text(0.5, 0.5, "No data", ha="center", va="center")
             else:
-                labels = [t for t, _m in data]
-                minutes = [m for _t, m in data]
-                y_pos = range(len(labels))
-                self._analytics_ax.barh(y_pos, minutes)
-                self._analytics_ax.set_yticks(y_pos)
-                self._analytics_ax.set_yticklabels(labels)
-                self._analytics_ax.invert_yaxis()
-                self._analytics_ax.set_title("Top tasks by time")
-                self._analytics_ax.set_xlabel("Minutes")
+                image = self._analytics_ax.imshow(grid, aspect="auto", cmap="magma", interpolation="nearest")
+                self._analytics_ax.set_yticks(range(7))
+                self._analytics_ax.set_yticklabels(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
+                self._analytics_ax.set_xticks(range(0, 24, 3))
+                self._analytics_ax.set_title("Study hours by weekday and hour" + span_text)
+                self._analytics_ax.set_xlabel("Hour of day")
+                self._analytics_cbar = self._analytics_fig.colorbar(image, ax=self._analytics_ax)
+                self._analytics_cbar.ax.tick_params(colors=CHART_FG)
         else:  # weekday
-            data = self._analytics_time_by_weekday(selected_courses)
-            labels = [lbl for lbl, _h in data]
-            hours = [h for _lbl, h in data]
-            x_pos = range(len(labels))
-            self._analytics_ax.bar(x_pos, hours)
-            self._analytics_ax.set_xticks(x_pos)
-            self._analytics_ax.set_xticklabels(labels)
-            self._analytics_ax.set_title("Time by weekday")
-            self._analytics_ax.set_ylabel("Hours")
+            plot_weekday(self._analytics_ax, self._analytics_time_by_weekday(selected_courses, span=span), span_text)
 
         self._analytics_fig.tight_layout()
         self._analytics_canvas.draw()
@@ -1153,16 +5171,11 @@ class ToDoApp(ctk.CTk):
         # due badge
         if task.due:
             due_badge = self._make_badge(meta, f"Due {task.due}")
-            try:
-                d = _dt.date.fromisoformat(task.due)
-                if not task.done:
-                    if d < _dt.date.today():
-                        due_badge.configure(fg_color=("orange", "dark orange"))
-                    elif d == _dt.date.today():
-                        due_badge.configure(fg_color=("gold", "goldenrod"))
-            except Exception:
-                pass
+            state = self._due_state(task)
+            if state:
+                due_badge.configure(fg_color=DUE_COLORS[state])
             due_badge.pack(side="left", padx=(0, 6))
+            self._due_badge_by_id[task.id] = due_badge
         else:
             self._make_badge(meta, "No due date").pack(side="left", padx=(0, 6))
 
@@ -1235,9 +5248,14 @@ class ToDoApp(ctk.CTk):
 
         for w in (card, inner, left, textwrap, meta):
             w.bind("<Button-1>", _maybe_open, add="+")
+            w.bind("<Shift-Button-1>", lambda _e, tid=task.id: self._select_card(tid, "range"), add="+")
+            w.bind("<Control-Button-1>", lambda _e, tid=task.id: self._select_card(tid, "toggle"), add="+")
             w.bind("<Enter>", _on_hover_enter, add="+")
             w.bind("<Leave>", _on_hover_leave, add="+")
 
+        if task.id in self.selected_ids:
+            card.configure(border_width=2, border_color=SELECTED_BORDER)
+
         # reflect done state in label font live
         def _sync_font(*_):
             text_lbl.configure(font=self.font_done if var.get() else self.font_normal)
@@ -1293,17 +5311,18 @@ class ToDoApp(ctk.CTk):
     def _task_by_id(self, task_id: Optional[str]) -> Optional[Task]:
         if not task_id:
             return None
-        return next((t for t in self.tasks if t.id == task_id), None)
+        return self._tasks_by_id.get(task_id)
 
-    def _validate_due(self, s: str) -> Optional[str]:
-        s = s.strip()
+    def _validate_due(self, s: str, warn: bool = True) -> Optional[str]:
+        s = (s or "").strip()
         if not s:
             return None
         try:
             dt = datetime.strptime(s, "%Y-%m-%d")
             return dt.strftime("%Y-%m-%d")
         except ValueError:
-            messagebox.showwarning("Invalid date", "Use YYYY-MM-DD (e.g., 2025-10-15)")
+            if warn:
+                messagebox.showwarning("Invalid date", "Use YYYY-MM-DD (e.g., 2025-10-15)")
             return "INVALID"
 
     def _set_status(self, text: str):
@@ -1355,6 +5374,363 @@ class ToDoApp(ctk.CTk):
             self._tooltip_window = None
 
 
+    # ---------- Watching data files for outside edits ----------
+    def _start_file_watcher(self):
+        self._zoom_sig = file_signature(ZOOM_LINKS_FILE)
+        self._settings_sig = file_signature(SETTINGS_FILE)
+        self.after(WATCH_INTERVAL_MS, self._watch_files)
+
+    def _watch_files(self):
+        """
+        stat() the three data files every few seconds; anything that changed
+        without us writing it (sync tool, script, another editor) is pulled in.
+        """
+        try:
+            if file_signature(SAVE_FILE) not in (self._store_sig, None) and self._tx is None \
+                    and self._task_stream is None:
+                self._reload_tasks_from_disk()
+            sig = file_signature(ZOOM_LINKS_FILE)
+            if sig != self._zoom_sig:
+                self._zoom_sig = sig
+                self.class_zoom_urls = self._load_zoom_links()
+                self._update_kpi()
+                self._set_status("Reloaded Zoom links changed outside the app.")
+            sig = file_signature(SETTINGS_FILE)
+            if sig != self._settings_sig:
+                self._settings_sig = sig
+                self._load_settings()
+                self.title("Do Your Homework" if self.safe_mode else "Do your fucking homework")
+                self._refresh_list()
+                self._set_status("Reloaded settings changed outside the app.")
+        finally:
+            self.after(WATCH_INTERVAL_MS, self._watch_files)
+
+    def _reload_tasks_from_disk(self):
+        """Apply only the tasks that differ on disk; cards for the rest are left alone."""
+        self._finish_loading()
+        sig = file_signature(SAVE_FILE)
+        try:
+            store = read_task_store(SAVE_FILE)
+        except (OSError, ValueError):
+            return  # mid-write or hand-edited into invalid JSON; try again next tick
+        self._store_sig = sig
+        self._store_version = store["version"]
+        self._tombstones = store["deleted"]
+
+        added, changed, removed = diff_tasks(self.tasks, store, SAVE_FILE)
+        if not (added or changed or removed):
+            return
+        self.history.clear()  # undo steps would overwrite the edits just read
+
+        for tid, delta in changed.items():
+            t = self._tasks_by_id[tid]
+            for name, value in delta.items():
+                setattr(t, name, value)
+            self._due_index.update(t)
+            self._due_scheduler.schedule(t, arm=False)
+        if removed:
+            self.tasks = [t for t in self.tasks if t.id not in removed]
+            self.selected_ids.difference_update(removed)
+            for tid in removed:
+                self._tasks_by_id.pop(tid, None)
+                self._due_index.remove(tid)
+                self._due_scheduler.unschedule(tid)
+        for t in added:
+            self.tasks.append(t)
+            self._tasks_by_id[t.id] = t
+            self._due_index.update(t)
+            self._due_scheduler.schedule(t, arm=False)
+        self._due_scheduler.arm()
+
+        self._week_totals.invalidate()
+        self._tasks_generation += 1
+        self._track_running(set(changed) | removed | {t.id for t in added})
+        self._update_cards(set(changed) | removed | {t.id for t in added},
+                           due_changed=any("due" in d for d in changed.values()))
+        self._update_kpi()
+        self._update_course_values()
+        self._set_status(f"Reloaded tasks.json: {len(added)} added, "
+                         f"{len(changed)} changed, {len(removed)} removed.")
+
+    # ---------- Single instance ----------
+    def _start_instance_server(self):
+        """
+        Listen on a loopback port so later launches (and the CLI) can forward
+        commands here instead of opening a second window.
+        """
+        try:
+            srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            srv.bind(("127.0.0.1", 0))
+            srv.listen(8)
+            srv.setblocking(False)
+            token = secrets.token_hex(16)
+            fd = os.open(INSTANCE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"port": srv.getsockname()[1], "token": token, "pid": os.getpid()}, f)
+        except OSError:
+            return  # single-instance is a convenience; never block startup on it
+        self._instance_server = srv
+        self._instance_token = token
+        try:
+            # event-driven where Tk supports it (POSIX) ...
+            self.tk.createfilehandler(srv, 1, lambda *_: self._accept_instance_clients())  # 1 = READABLE
+        except Exception:
+            # ... otherwise a cheap non-blocking check
+            self._poll_instance_server()
+
+    def _poll_instance_server(self):
+        if getattr(self, "_instance_server", None) is None:
+            return
+        self._accept_instance_clients()
+        self.after(250, self._poll_instance_server)
+
+    def _accept_instance_clients(self):
+        while True:
+            try:
+                conn, _addr = self._instance_server.accept()
+            except (BlockingIOError, OSError):
+                return
+            with conn:
+                try:
+                    conn.settimeout(0.5)
+                    line = conn.makefile("r", encoding="utf-8").readline(65536)
+                    cmd = json.loads(line)
+                    if not secrets.compare_digest(str(cmd.pop("token", "")), self._instance_token):
+                        reply = "error bad token"
+                    else:
+                        reply = self._handle_command(cmd)
+                    conn.sendall((reply + "\n").encode("utf-8"))
+                except (OSError, ValueError):
+                    continue
+
+    def _stop_instance_server(self):
+        srv = getattr(self, "_instance_server", None)
+        if srv is None:
+            return
+        self._instance_server = None
+        try:
+            self.tk.deletefilehandler(srv)
+        except Exception:
+            pass
+        srv.close()
+        try:
+            with open(INSTANCE_FILE, "r", encoding="utf-8") as f:
+                mine = json.load(f).get("pid") == os.getpid()
+            if mine:
+                os.remove(INSTANCE_FILE)
+        except (OSError, ValueError):
+            pass
+
+    def _find_task(self, ref: str) -> Optional[Task]:
+        """Resolve a CLI task reference: exact id, unique id prefix, or title."""
+        ref = (ref or "").strip()
+        self._finish_loading()
+        t = self._task_by_id(ref)
+        if t:
+            return t
+        prefixed = [t for t in self.tasks if t.id.startswith(ref)] if len(ref) >= 4 else []
+        if len(prefixed) == 1:
+            return prefixed[0]
+        titled = [t for t in self.tasks if (t.text or "").strip().lower() == ref.lower()]
+        # prefer an open task when titles repeat
+        titled.sort(key=lambda t: t.done)
+        return titled[0] if titled else None
+
+    def _handle_command(self, cmd: dict) -> str:
+        """Run a forwarded/CLI command; returns 'ok …' or 'error …'."""
+        name = cmd.get("cmd", "focus")
+        if name == "focus":
+            self._raise_window()
+            return "ok focused"
+
+        if name == "add":
+            text = str(cmd.get("text") or "").strip()
+            due = self._validate_due(str(cmd.get("due") or ""), warn=False)
+            if not text:
+                return "error empty task text"
+            if due == "INVALID":
+                return "error due date must be YYYY-MM-DD"
+            course = str(cmd.get("course") or "").strip() or None
+            url = self._normalize_url_or_path(str(cmd.get("url") or "")) or None
+            task = Task(id=str(uuid.uuid4()), text=text, due=due, course=course, url=url)
+            with self._transaction("Add task") as tx:
+                tx.add_task(task)
+            self._set_status(f"Added '{text}' from the command line.")
+            return f"ok added {task.id}"
+
+        if name in ("start", "stop"):
+            t = self._find_task(str(cmd.get("task") or ""))
+            if t is None:
+                return "error no such task"
+            if name == "start":
+                self._check_out_by_id(t.id)
+            else:
+                self._check_in_by_id(t.id)
+            return f"ok {'started' if name == 'start' else 'stopped'} '{t.text}'"
+
+        return f"error unknown command {name}"
+
+    def _raise_window(self):
+        try:
+            self.deiconify()
+            self.lift()
+            self.attributes("-topmost", True)
+            self.after(200, lambda: self.attributes("-topmost", False))
+            self.focus_force()
+        except Exception:
+            pass
+
+    # ---------- Due dates ----------
+    def _due_state(self, task: Task) -> Optional[str]:
+        """'overdue', 'today' or None, against the cached self._today."""
+        d = _parse_due(task.due)
+        if d is None or task.done:
+            return None
+        if d < self._today:
+            return "overdue"
+        if d == self._today:
+            return "today"
+        return None
+
+    def _on_due_transitions(self, due: list[tuple[str, str]]):
+        """Called by DueScheduler when tasks cross into due-today / overdue."""
+        self._today = _dt.date.today()
+        for tid, kind in due:
+            badge = self._due_badge_by_id.get(tid)
+            if badge is not None and badge.winfo_exists():
+                badge.configure(fg_color=DUE_COLORS[kind])
+        if due and self._due_range(self.filter_mode.get()):
+            self._refresh_list()  # the new date moves the due-range filter's bounds
+
+        if due and self.due_notifications:
+            names = [t.text for t in (self._task_by_id(tid) for tid, _k in due) if t]
+            overdue = sum(1 for _tid, kind in due if kind == "overdue")
+            title = "Overdue" if overdue == len(due) else "Due today"
+            body = names[0] if len(names) == 1 else f"{len(names)} tasks"
+            self._notify(f"DYFH — {title}", body)
+        if due:
+            self._set_status(f"{len(due)} task(s) changed due state.")
+
+    def _notify(self, title: str, body: str):
+        """Best-effort local desktop notification; falls back to a bell."""
+        try:
+            system = platform.system()
+            if system == "Darwin":
+                script = f'display notification {json.dumps(body)} with title {json.dumps(title)}'
+                subprocess.Popen(["osascript", "-e", script])
+                return
+            if system == "Linux" and shutil.which("notify-send"):
+                subprocess.Popen(["notify-send", "-a", "DYFH", title, body])
+                return
+        except Exception:
+            pass
+        self.bell()
+
+    # ---------- Multi-select ----------
+    def _select_card(self, task_id: str, mode: str):
+        """Ctrl-click toggles one card; shift-click extends from the last clicked card."""
+        if mode == "range" and self._select_anchor in self._card_by_id and task_id in self._card_by_id:
+            a = self._card_order.index(self._select_anchor)
+            b = self._card_order.index(task_id)
+            lo, hi = sorted((a, b))
+            changed = set(self._card_order[lo:hi + 1]) - self.selected_ids
+            self.selected_ids.update(changed)
+        else:
+            self.selected_ids.symmetric_difference_update({task_id})
+            self._select_anchor = task_id
+            changed = {task_id}
+
+        for tid in changed:
+            self._paint_selection(tid)
+        self._update_batch_bar()
+
+    def _paint_selection(self, task_id: str):
+        card = self._card_by_id.get(task_id)
+        if card is None:
+            return
+        if task_id in self.selected_ids:
+            card.configure(border_width=2, border_color=SELECTED_BORDER)
+        else:
+            card.configure(border_width=0)
+
+    def _clear_selection(self):
+        ids = list(self.selected_ids)
+        self.selected_ids.clear()
+        self._select_anchor = None
+        for tid in ids:
+            self._paint_selection(tid)
+        self._update_batch_bar()
+
+    def _update_batch_bar(self):
+        n = len(self.selected_ids)
+        if n:
+            self.batch_label.configure(text=f"{n} selected")
+            if not self.batch_bar.winfo_manager():
+                self.batch_bar.pack(fill="x", padx=10, pady=(0, 6), before=self.cards)
+        elif self.batch_bar.winfo_manager():
+            self.batch_bar.pack_forget()
+
+    def _selected_tasks(self) -> List[Task]:
+        return [t for t in self.tasks if t.id in self.selected_ids]
+
+    def _batch_set_done(self, val: bool):
+        tasks = self._selected_tasks()
+        if not tasks: return
+        with self._transaction(f"Mark {len(tasks)} {'done' if val else 'not done'}") as tx:
+            for t in tasks:
+                tx.set(t, "done", val)
+        self._set_status(f"Marked {len(tasks)} task(s) {'done' if val else 'not done'}.")
+
+    def _batch_delete(self):
+        tasks = self._selected_tasks()
+        if not tasks: return
+        if not messagebox.askyesno("Delete", f"Delete {len(tasks)} selected task(s)?"):
+            return
+        with self._transaction(f"Delete {len(tasks)} tasks") as tx:
+            for t in tasks:
+                tx.remove_task(t)
+        self._set_focus(None)
+        self._set_status(f"Deleted {len(tasks)} task(s).")
+
+    def _batch_set_course(self):
+        tasks = self._selected_tasks()
+        if not tasks: return
+        course = ctk.CTkInputDialog(title="Set class",
+                                    text=f"Class for {len(tasks)} task(s) (blank clears):").get_input()
+        if course is None:
+            return
+        course = course.strip() or None
+        with self._transaction(f"Set class of {len(tasks)} tasks") as tx:
+            for t in tasks:
+                tx.set(t, "course", course)
+        self._set_status(f"Set class of {len(tasks)} task(s) to {course or 'none'}.")
+
+    def _batch_set_due(self):
+        tasks = self._selected_tasks()
+        if not tasks: return
+        raw = ctk.CTkInputDialog(title="Set due date",
+                                 text=f"Due date for {len(tasks)} task(s), YYYY-MM-DD (blank clears):").get_input()
+        if raw is None:
+            return
+        due = self._validate_due(raw)
+        if due == "INVALID":
+            return
+        with self._transaction(f"Set due date of {len(tasks)} tasks") as tx:
+            for t in tasks:
+                tx.set(t, "due", due)
+        self._set_status(f"Set due date of {len(tasks)} task(s) to {due or 'none'}.")
+
+    def _batch_start_timers(self):
+        idle = [t for t in self._selected_tasks() if not t.running_start]
+        if not idle:
+            self._set_status("Selected timers are already running.")
+            return
+        now = self._now_iso()
+        with self._transaction(f"Start {len(idle)} timers") as tx:
+            for t in idle:
+                tx.set(t, "running_start", now)
+        self._set_status(f"Started {len(idle)} timer(s).")
+
     # ---------- Actions ----------
     def _add_or_update(self):
         text = self.entry.get().strip()
@@ -1371,20 +5747,18 @@ class ToDoApp(ctk.CTk):
             # Update existing
             t = next((x for x in self.tasks if x.id == self.editing_task_id), None)
             if t:
-                t.text = text
-                t.due = due
-                t.course = course
-                t.url = url
-                self._save_tasks()
-                self._refresh_list()
+                with self._transaction("Edit task") as tx:
+                    tx.set(t, "text", text)
+                    tx.set(t, "due", due)
+                    tx.set(t, "course", course)
+                    tx.set(t, "url", url)
                 self._set_status("Updated task.")
             self.editing_task_id = None
             self.add_btn.configure(text="Add")
         else:
             # Create new
-            self.tasks.append(Task(id=str(uuid.uuid4()), text=text, due=due, course=course, url=url))
-            self._save_tasks()
-            self._refresh_list()
+            with self._transaction("Add task") as tx:
+                tx.add_task(Task(id=str(uuid.uuid4()), text=text, due=due, course=course, url=url))
             self._set_status("Added task.")
         if course:
             current_vals = set(self.class_combo.cget("values") or [])
@@ -1417,13 +5791,13 @@ class ToDoApp(ctk.CTk):
         if t.running_start:
             self._set_status("Already running; hit Stop to check in.")
             return
-        t.running_start = self._now_iso()
-        self._save_tasks()
-        self._refresh_list()
+        with self._transaction("Start timer") as tx:
+            tx.set(t, "running_start", self._now_iso())
         self._set_focus(t.id)
         self._set_status(f"Started timer for '{t.text}'")
 
     def _check_in_by_id(self, task_id: Optional[str]):
+        self._idle.settle()  # an away stretch not handled yet comes out of the session first
         t = self._task_by_id(task_id)
         if not t or not t.running_start:
             self._set_status("No running timer to stop.")
@@ -1432,31 +5806,27 @@ class ToDoApp(ctk.CTk):
             start = datetime.fromisoformat(t.running_start)
             end = datetime.now(timezone.utc)
             secs = int((end - start).total_seconds())
-            t.sessions.append({
-                "start": t.running_start, "end": end.isoformat(timespec="seconds"), "seconds": secs
-            })
+            session = {"start": t.running_start, "end": end.isoformat(timespec="seconds"), "seconds": secs}
         except Exception:
             # if parsing fails, still push a session with zero seconds to keep data sane
-            t.sessions.append({"start": t.running_start, "end": self._now_iso(), "seconds": 0})
-        t.running_start = None
-        self._save_tasks()
-        self._refresh_cards()
+            session = {"start": t.running_start, "end": self._now_iso(), "seconds": 0}
+        with self._transaction("Stop timer") as tx:
+            tx.add_session(t, session)
+            tx.set(t, "running_start", None)
         self._set_focus(t.id)
         self._set_status(f"Stopped timer for '{t.text}'")
-        self._update_kpi()
 
     def _reset_time_by_id(self, task_id: Optional[str]):
         t = self._task_by_id(task_id)
         if not t: return
         if messagebox.askyesno("Reset time", f"Reset tracked time for '{t.text}'?"):
-            t.sessions.clear()
-            t.running_start = None
-            self._save_tasks()
-            self._refresh_cards()
+            with self._transaction("Reset time") as tx:
+                tx.clear_sessions(t)
+                tx.set(t, "running_start", None)
             self._set_status("Time cleared.")
-        self._update_kpi()
 
     def destroy(self):
+        self._idle.settle()
         # check in any running tasks to "now"
         changed = False
         for t in self.tasks:
@@ -1470,21 +5840,173 @@ class ToDoApp(ctk.CTk):
                 except Exception:
                     pass
                 t.running_start = None
+                t.modified = utc_clock()
                 changed = True
         if changed:
             self._save_tasks()
+        self._heartbeats.clear()  # clean exit: nothing to recover next time
+        self._stop_instance_server()
+        self._drop_process_pool()
         super().destroy()
 
+    # ---------- Crash-safe timers ----------
+    def _sync_heartbeat(self):
+        """Beat now, and every HEARTBEAT_MS while any timer runs."""
+        if not self._running_ids:
+            return  # a pending tick finds nothing running and stops
+        self._heartbeats.beat()
+        if self._heartbeat_job is None:
+            self._heartbeat_job = self.after(HEARTBEAT_MS, self._heartbeat_tick)
+
+    def _heartbeat_tick(self):
+        self._heartbeat_job = None
+        self._sync_heartbeat()
+
+    def _recover_timers(self):
+        """
+        Timers still running at startup mean the last run never reached
+        destroy() (killed, crashed, or the machine died asleep). Close each
+        one at the last heartbeat rather than now, then offer to trim it.
+        """
+        beat = self._heartbeats.last()
+        if beat is not None:
+            last, owner = beat
+            if owner != os.getpid() and (pid_alive(owner) or time.time() - last < 2 * HEARTBEAT_MS / 1000):
+                beat = None  # another window is still running these timers
+        if beat is None:
+            self._sync_heartbeat()  # clean exit last time; just start beating for any running timer
+            self._idle.arm()
+            return
+        self._finish_loading()
+        orphans = []
+        for t in self.tasks:
+            if not t.running_start:
+                continue
+            try:
+                start = datetime.fromisoformat(t.running_start).timestamp()
+            except ValueError:
+                continue
+            if start <= last:
+                orphans.append((t, int(start)))
+        self._heartbeats.clear(everyone=True)  # nobody alive wrote these
+        if orphans:
+            end = datetime.fromtimestamp(last, timezone.utc)
+            with self._transaction("Recover timers") as tx:
+                for t, start in orphans:
+                    tx.add_session(t, {"start": t.running_start,
+                                       "end": end.isoformat(timespec="seconds"), "seconds": last - start})
+                    tx.set(t, "running_start", None)
+            self._set_status(f"Recovered {len(orphans)} timer(s) left running when DYFH last closed.")
+            self._open_recovered_timers_dialog([t for t, _start in orphans], end)
+        self._sync_heartbeat()
+        self._idle.arm()
+
+    def _open_recovered_timers_dialog(self, tasks: List[Task], end: datetime):
+        """Keep the recovered sessions as they are, or trim each to the minutes entered."""
+        win = ctk.CTkToplevel(self)
+        win.title("Recovered timers")
+        win.resizable(False, False)
+        win.grab_set()
+
+        when = end.astimezone().strftime("%a %d %b %H:%M")
+        ctk.CTkLabel(
+            win,
+            text=f"DYFH did not shut down cleanly, so these timers were stopped\n"
+                 f"at {when}, the last time they were seen running.\n"
+                 f"Keep the recovered time, or trim it to the minutes you really studied.",
+            justify="left"
+        ).pack(anchor="w", padx=16, pady=(12, 8))
+
+        rows = ctk.CTkFrame(win, fg_color="transparent")
+        rows.pack(fill="x", padx=16)
+        minute_vars: Dict[str, ctk.StringVar] = {}
+        for t in tasks:
+            secs = t.sessions[-1].get("seconds", 0)
+            row = ctk.CTkFrame(rows, fg_color="transparent")
+            row.pack(fill="x", pady=2)
+            ctk.CTkLabel(row, text=f"{t.text[:40]} ({self._fmt_seconds(secs)})").pack(side="left")
+            ctk.CTkLabel(row, text="min").pack(side="right", padx=(4, 0))
+            minute_vars[t.id] = ctk.StringVar(value=str(secs // 60))
+            ctk.CTkEntry(row, width=70, textvariable=minute_vars[t.id]).pack(side="right")
+
+        def trim():
+            kept: Dict[str, int] = {}
+            for tid, var in minute_vars.items():
+                try:
+                    kept[tid] = max(0, int(float(var.get().strip() or 0) * 60))
+                except ValueError:
+                    messagebox.showwarning("Recovered timers", "Minutes must be a number.")
+                    return
+            self._trim_recovered_sessions(tasks, kept)
+            win.destroy()
+
+        btn_row = ctk.CTkFrame(win, fg_color="transparent")
+        btn_row.pack(fill="x", padx=16, pady=12)
+        ctk.CTkButton(btn_row,
+                      text="Keep",
+                      command=win.destroy,
+                      fg_color="#daf2ec",
+                      text_color="#171717",
+                      hover_color="#a5e8d7").pack(side="right", padx=(8, 0))
+        ctk.CTkButton(btn_row, text="Trim", command=trim).pack(side="left")
+        win.focus_set()
+
+    def _trim_recovered_sessions(self, tasks: List[Task], kept: Dict[str, int]):
+        """Shorten each task's recovered (last) session to kept[task id] seconds; 0 drops it."""
+        with self._transaction("Trim recovered time") as tx:
+            for t in tasks:
+                if self._task_by_id(t.id) is not t or not len(t.sessions):
+                    continue  # deleted or reset since recovery
+                last = t.sessions[-1]
+                secs = kept.get(t.id, last.get("seconds", 0))
+                if secs >= last.get("seconds", 0):
+                    continue  # trimming only; the heartbeat is the upper bound
+                tx.pop_sessions(t, 1)
+                if secs > 0:
+                    end = datetime.fromisoformat(last["start"]) + _dt.timedelta(seconds=secs)
+                    tx.add_session(t, {"start": last["start"],
+                                       "end": end.isoformat(timespec="seconds"), "seconds": secs})
+        self._set_status("Trimmed recovered time." if tx.changed else "Kept recovered time.")
+
+    def _apply_idle_gap(self, idle_start: float, idle_end: float):
+        """
+        Take an away-from-keyboard stretch out of every timer that was
+        running when it began: the session is closed at idle_start and, in
+        "split" mode, a new one starts at idle_end ("stop" leaves it stopped).
+        """
+        running = []
+        for t in self.tasks:
+            if not t.running_start:
+                continue
+            try:
+                start = datetime.fromisoformat(t.running_start).timestamp()
+            except ValueError:
+                continue
+            if start < idle_start:
+                running.append((t, start))
+        if not running:
+            return
+        cut = datetime.fromtimestamp(idle_start, timezone.utc).isoformat(timespec="seconds")
+        resume = datetime.fromtimestamp(idle_end, timezone.utc).isoformat(timespec="seconds")
+        with self._transaction("Idle time removed") as tx:
+            for t, start in running:
+                tx.add_session(t, {"start": t.running_start, "end": cut, "seconds": int(idle_start - start)})
+                tx.set(t, "running_start", resume if self.idle_action == "split" else None)
+        away = self._fmt_seconds(int(idle_end - idle_start))
+        if self.idle_action == "split":
+            self._set_status(f"Away for {away}; left that out of {len(running)} running timer(s).")
+        else:
+            self._set_status(f"Away for {away}; stopped {len(running)} timer(s) when you left.")
+
     def _clear_completed(self):
         count = sum(1 for t in self.tasks if t.done)
         if count == 0:
             self._set_status("No completed tasks to clear.")
             return
         if messagebox.askyesno("Clear completed", f"Remove {count} completed task(s)?"):
-            self.tasks = [t for t in self.tasks if not t.done]
-            self._save_tasks()
-            self._refresh_list()
-            self._update_kpi()
+            with self._transaction("Delete completed") as tx:
+                for t in [t for t in self.tasks if t.done]:
+                    tx.remove_task(t)
 
     def _start_edit_by_id(self, task_id: Optional[str]):
         t = self._task_by_id(task_id)
@@ -1504,25 +6026,18 @@ class ToDoApp(ctk.CTk):
     def _toggle_done_by_id(self, task_id: Optional[str], new_val: Optional[bool] = None):
         t = self._task_by_id(task_id)
         if not t: return
-        t.done = (not t.done) if new_val is None else bool(new_val)
-        self._save_tasks()
-        self._refresh_cards()
+        done = (not t.done) if new_val is None else bool(new_val)
+        with self._transaction("Mark done" if done else "Mark not done") as tx:
+            tx.set(t, "done", done)
         self._set_focus(t.id)
 
     def _delete_by_id(self, task_id: Optional[str]):
         t = self._task_by_id(task_id)
         if not t: return
         if messagebox.askyesno("Delete", f"Delete '{t.text}'?"):
-            self.tasks = [x for x in self.tasks if x.id != t.id]
-            if self.editing_task_id == t.id:
-                self.editing_task_id = None
-                self.add_btn.configure(text="Add")
-                self.entry.delete(0, "end");
-                self.due_var.set("")
-            self._save_tasks()
-            self._refresh_cards()
+            with self._transaction("Delete task") as tx:
+                tx.remove_task(t)
             self._set_focus(None)
-            self._update_kpi()
 
     def _clear_class(self):
         t = self._get_selected_task()
@@ -1580,17 +6095,10 @@ class ToDoApp(ctk.CTk):
             messagebox.showerror("Open link", f"Could not open link:\n{target}\n\n{e}")
 
     # ---------- Sorting ----------
-    def _due_key(self, t: "Task"):
-        # None goes last when ascending (first when descending by reversing)
-        none_flag = (t.due is None)
-        return (none_flag, t.due or "", t.created)
-
     def _sort_by_due(self):
-        # Stable sort by: has_due -> due_date -> created
-        self.tasks.sort(key=self._due_key)
-        if not self.sort_asc:
-            self.tasks.reverse()
-        self._save_tasks()
+        # View-only: order comes from the due index (due -> created), undated last
+        # when ascending; self.tasks and the saved file keep their order.
+        self.sort_mode = "asc" if self.sort_asc else "desc"
         self._refresh_list()
 
         # Toggle for next click + update button label
@@ -1605,5 +6113,14 @@ if __name__ == "__main__":
         windll.shcore.SetProcessDpiAwareness(1)
     except Exception:
         pass
+    if CLI_COMMAND["cmd"] == "sync":
+        print(sync_folders(os.path.dirname(SAVE_FILE), CLI_COMMAND["folder"]))
+        sys.exit(0)
+    if CLI_COMMAND["cmd"] == "bench-memory":
+        print(bench_memory(CLI_COMMAND["tasks"], CLI_COMMAND["sessions"]))
+        sys.exit(0)
     app = ToDoApp()
+    app._start_instance_server()
+    if CLI_COMMAND.get("cmd") != "focus":
+        app.after(0, lambda: app._handle_command(CLI_COMMAND))
     app.mainloop()